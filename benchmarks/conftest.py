@@ -0,0 +1,174 @@
+# uv run pytest benchmarks --no-cov [--bench-sizes 1000,100000,1000000]
+#   [--bench-threshold 1.5] [--update-baselines]
+import csv
+import io
+import json
+import shutil
+import statistics
+import time
+from collections.abc import Callable
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from benchmarks.synthetic import generate_track_pairs
+from spotify_assistant.clients.quota import reset_quota_ledger
+from spotify_assistant.clients.search_cache import close_search_cache
+from spotify_assistant.models.tracks import TrackPair
+from spotify_assistant.services.csv_manager import write_track_pairs
+from spotify_assistant.services.global_index import close_global_index
+from spotify_assistant.settings import settings
+from tests.conftest import fake_search  # noqa: F401  (shared fixture)
+
+BASELINES_PATH = Path(__file__).with_name("baselines.json")
+DEFAULT_SIZES = "1000,10000"
+NOISE_FLOOR = 0.1  # seconds; slowdowns smaller than this never fail
+DEFAULT_REPEAT = 5
+
+type Bench = Callable[..., float]
+
+
+def pytest_addoption(parser: pytest.Parser) -> None:
+    group = parser.getgroup("benchmarks")
+    group.addoption(
+        "--bench-sizes",
+        default=DEFAULT_SIZES,
+        help=f"comma-separated dataset sizes in rows (default {DEFAULT_SIZES})",
+    )
+    group.addoption(
+        "--bench-threshold",
+        type=float,
+        default=1.5,
+        help="fail when a benchmark is this many times slower than its baseline",
+    )
+    group.addoption(
+        "--update-baselines",
+        action="store_true",
+        help=f"record the timings of this run in {BASELINES_PATH.name}",
+    )
+
+
+def pytest_generate_tests(metafunc: pytest.Metafunc) -> None:
+    if "rows" in metafunc.fixturenames:
+        sizes = metafunc.config.getoption("--bench-sizes").split(",")
+        metafunc.parametrize("rows", [int(size) for size in sizes], ids=str)
+
+
+def _calibrate() -> float:
+    """Seconds to parse a fixed in-memory CSV: the unit timings are stored in.
+
+    Dividing by it lets baselines recorded on one machine gate another.
+    """
+    data = "".join(
+        f'Artist {i},"Track, {i}",Other,Song,,,True,,False\n' for i in range(20_000)
+    )
+    best = float("inf")
+    for _ in range(5):
+        started = time.perf_counter()
+        for _row in csv.reader(io.StringIO(data)):
+            pass
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+@pytest.fixture(scope="session")
+def calibration() -> float:
+    return _calibrate()
+
+
+@pytest.fixture(scope="session")
+def baselines(request: pytest.FixtureRequest) -> Iterator[dict[str, float]]:
+    recorded: dict[str, float] = (
+        json.loads(BASELINES_PATH.read_text("utf-8")) if BASELINES_PATH.exists() else {}
+    )
+    yield recorded
+    if request.config.getoption("--update-baselines"):
+        BASELINES_PATH.write_text(
+            json.dumps(recorded, indent=2, sort_keys=True) + "\n", encoding="utf-8"
+        )
+
+
+@pytest.fixture(autouse=True)
+def isolated_state(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Iterator[None]:
+    """Keep caches, indexes and the dataset of main.py in a temporary directory."""
+    monkeypatch.setattr(settings, "STATE_DIR", tmp_path / "state")
+    monkeypatch.setattr(settings, "DATA_DIR", tmp_path / "data")
+    monkeypatch.setattr(settings, "TRACK_PAIRS_FILENAME", "track_pairs.csv")
+    reset_quota_ledger()
+    yield
+    close_search_cache()
+    close_global_index()
+
+
+@pytest.fixture(scope="session")
+def _synthetic_csvs() -> dict[int, tuple[Path, list[TrackPair]]]:
+    return {}
+
+
+@pytest.fixture
+def dataset(
+    rows: int,
+    _synthetic_csvs: dict[int, tuple[Path, list[TrackPair]]],
+    tmp_path_factory: pytest.TempPathFactory,
+) -> tuple[Path, list[TrackPair]]:
+    """Fresh copy of a synthetic CSV of `rows` rows (at settings.track_pairs_path).
+
+    Each size is generated once per session and copied for every benchmark.
+    """
+    if rows not in _synthetic_csvs:
+        source = tmp_path_factory.mktemp("synthetic") / f"pairs_{rows}.csv"
+        pairs = generate_track_pairs(rows)
+        write_track_pairs(source, pairs, pad_status=True)
+        _synthetic_csvs[rows] = (source, pairs)
+    source, pairs = _synthetic_csvs[rows]
+    csv_path = settings.track_pairs_path
+    csv_path.parent.mkdir(parents=True, exist_ok=True)
+    shutil.copyfile(source, csv_path)
+    return csv_path, pairs
+
+
+@pytest.fixture
+def bench(
+    request: pytest.FixtureRequest, calibration: float, baselines: dict[str, float]
+) -> Bench:
+    """Time fn (median of `repeat` runs) and gate it against the stored baseline.
+
+    setup, if given, runs untimed before each run and returns fn's arguments.
+    A benchmark fails only when it is both --bench-threshold times slower than
+    its baseline and NOISE_FLOOR seconds slower: scheduler jitter moves short
+    timings by more than any relative tolerance allows.
+    """
+    threshold = request.config.getoption("--bench-threshold")
+    update = request.config.getoption("--update-baselines")
+
+    def run(
+        fn: Callable[..., Any],
+        setup: Callable[[], tuple[Any, ...]] | None = None,
+        repeat: int = DEFAULT_REPEAT,
+    ) -> float:
+        timings = []
+        for _ in range(repeat):
+            args = setup() if setup is not None else ()
+            started = time.perf_counter()
+            fn(*args)
+            timings.append(time.perf_counter() - started)
+        elapsed = statistics.median(timings)
+
+        name = request.node.name
+        score = elapsed / calibration
+        if update:
+            baselines[name] = round(score, 3)
+        elif (
+            name in baselines
+            and score > baselines[name] * threshold
+            and elapsed - baselines[name] * calibration > NOISE_FLOOR
+        ):
+            pytest.fail(
+                f"{name} regressed: {elapsed:.4f}s, {score / baselines[name]:.2f}x "
+                f"its baseline (threshold {threshold}x)"
+            )
+        return elapsed
+
+    return run
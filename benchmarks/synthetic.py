@@ -0,0 +1,138 @@
+# uv run python -m benchmarks.synthetic data/synthetic_pairs.csv --rows 100000
+import argparse
+import random
+from datetime import UTC
+from datetime import datetime
+from datetime import timedelta
+from pathlib import Path
+
+from spotify_assistant.models.tracks import TrackPair
+from spotify_assistant.services.csv_manager import write_track_pairs
+
+# A few prolific artists cover most songs, as in the real datasets
+BRAZILIAN_ARTISTS = [
+    "Calcinha Preta",
+    "Aviões do Forró",
+    "Banda DJavú",
+    "Mastruz com Leite",
+    "Forró Estourado",
+    "Companhia do Tecno",
+    "Banda Calypso",
+    "Limão com Mel",
+    "Magníficos",
+    "Forró da Brucelose",
+    "Fruto Sensual",
+    "Sedutora",
+]
+ORIGINAL_ARTISTS = [
+    "Kansas",
+    "Guns N' Roses",
+    "Nirvana",
+    "Natalie Imbruglia",
+    "Heart",
+    "Beyoncé",
+    "Hoobastank",
+    "Bonnie Tyler",
+    "Van Halen",
+    "Miley Cyrus",
+    "Céline Dion",
+    "Roxette",
+]
+BRAZILIAN_TITLES = [
+    "Louca Por Ti",
+    "Te Quero Mais",
+    "Hoje à Noite",
+    "Que Tontos, Que Loucos",
+    "Blá Blá Blá",
+    "Coração Apaixonado",
+    "Sonhar",
+    "Está no Ar",
+    'Amor de "Verão"',
+    "Bateu a Química",
+]
+ORIGINAL_TITLES = [
+    "Dust in the Wind",
+    "Sweet Child O' Mine",
+    "Come As You Are",
+    "Torn",
+    "Alone",
+    "Halo",
+    "The Reason",
+    "Total Eclipse of the Heart",
+    "Dreams",
+    "Wrecking Ball",
+    "Love, Actually",
+]
+SOURCES = [None, "manual", "playlist import", "Jornal da Paraíba"]
+STATUSES = [None, True, False]
+
+
+def _pick_artist(rng: random.Random, artists: list[str]) -> str:
+    # Zipf-like weights: the first artists repeat far more than the last ones
+    return rng.choices(artists, weights=[1 / (i + 1) for i in range(len(artists))])[0]
+
+
+def _title(titles: list[str], index: int) -> str:
+    """Pool title, numbered once the pool is used up so every pair is unique."""
+    title = titles[index % len(titles)]
+    return title if index < len(titles) else f"{title} {index // len(titles) + 1}"
+
+
+def generate_track_pairs(rows: int, seed: int = 0) -> list[TrackPair]:
+    """Deterministic, realistic-looking pairs with unique pair keys.
+
+    Artists repeat, names carry accents, quoted commas and quotes, and
+    statuses mix unchecked, found, not found and already added rows.
+    """
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1, tzinfo=UTC)
+    pairs: list[TrackPair] = []
+    for index in range(rows):
+        brazilian_has_spotify = rng.choice(STATUSES)
+        original_has_spotify = (
+            None if brazilian_has_spotify is None else rng.choice(STATUSES)
+        )
+        added_at = start + timedelta(minutes=index)
+        pairs.append(
+            TrackPair(
+                brazilian_artist=_pick_artist(rng, BRAZILIAN_ARTISTS),
+                brazilian_track=_title(BRAZILIAN_TITLES, index),
+                original_artist=_pick_artist(rng, ORIGINAL_ARTISTS),
+                original_track=_title(ORIGINAL_TITLES, index),
+                added_at=added_at.isoformat() if rng.random() < 0.8 else None,
+                source=rng.choice(SOURCES),
+                brazilian_has_spotify=brazilian_has_spotify,
+                original_has_spotify=original_has_spotify,
+                in_playlist=bool(
+                    brazilian_has_spotify
+                    and original_has_spotify
+                    and rng.random() < 0.7
+                ),
+            )
+        )
+    return pairs
+
+
+def write_synthetic_csv(
+    csv_path: Path, rows: int, seed: int = 0, pad_status: bool = False
+) -> list[TrackPair]:
+    """Write a synthetic track pairs CSV and return its pairs."""
+    pairs = generate_track_pairs(rows, seed)
+    write_track_pairs(csv_path, pairs, pad_status=pad_status)
+    return pairs
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Write a synthetic track pairs CSV")
+    parser.add_argument("csv_path", type=Path)
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--pad-status", action="store_true", help="fixed-width status cells"
+    )
+    args = parser.parse_args(argv)
+    write_synthetic_csv(args.csv_path, args.rows, args.seed, args.pad_status)
+
+
+if __name__ == "__main__":
+    main()
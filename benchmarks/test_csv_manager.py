@@ -0,0 +1,93 @@
+from itertools import count
+
+import pytest
+
+from benchmarks.synthetic import generate_track_pairs
+from spotify_assistant.main import load_dataset
+from spotify_assistant.main import save_dataset
+from spotify_assistant.models.tracks import TrackPair
+from spotify_assistant.services.csv_manager import append_track_pair
+from spotify_assistant.services.csv_manager import find_duplicate
+from spotify_assistant.services.csv_manager import read_track_pairs
+from spotify_assistant.services.csv_manager import update_track_pair
+from spotify_assistant.services.csv_manager import write_track_pairs
+
+# Pairs absent from every synthetic dataset (their titles are not in the pools)
+_new_pairs = (
+    TrackPair(
+        brazilian_artist="Banda Nova",
+        brazilian_track=f"Inédita {i}",
+        original_artist="New Artist",
+        original_track=f"Unreleased, Vol. {i}",
+        added_at=None,
+        source=None,
+        brazilian_has_spotify=None,
+        original_has_spotify=None,
+        in_playlist=False,
+    )
+    for i in count()
+)
+
+
+def toggled(pair: TrackPair) -> TrackPair:
+    return {**pair, "in_playlist": not pair["in_playlist"]}
+
+
+def test_read_track_pairs(dataset, bench):
+    csv_path, _ = dataset
+    bench(lambda: read_track_pairs(csv_path))
+
+
+def test_write_track_pairs(dataset, bench):
+    csv_path, pairs = dataset
+    bench(lambda: write_track_pairs(csv_path, pairs))
+
+
+def test_append_track_pair(dataset, bench):
+    csv_path, _ = dataset
+    bench(lambda pair: append_track_pair(csv_path, pair), lambda: (next(_new_pairs),))
+
+
+def test_find_duplicate(dataset, bench):
+    """Worst case: the pair is not in the dataset."""
+    _, pairs = dataset
+    missing = next(_new_pairs)
+    bench(lambda: find_duplicate(pairs, missing))
+
+
+def test_update_track_pair(dataset, bench):
+    csv_path, pairs = dataset
+    row = len(pairs) // 2
+    current = [pairs[row]]
+
+    def update() -> None:
+        current[0] = toggled(current[0])
+        update_track_pair(csv_path, row, current[0])
+
+    bench(update)
+
+
+def test_update_track_pair_in_place(dataset, bench):
+    csv_path, pairs = dataset
+    row = len(pairs) // 2
+    current = [pairs[row]]
+
+    def update() -> None:
+        current[0] = toggled(current[0])
+        update_track_pair(csv_path, row, current[0], in_place=True)
+
+    bench(update)
+
+
+@pytest.mark.usefixtures("dataset")
+def test_load_dataset(bench):
+    bench(load_dataset)
+
+
+@pytest.mark.usefixtures("dataset")
+def test_save_dataset(bench):
+    bench(save_dataset, lambda: (load_dataset(),))
+
+
+def test_generate_track_pairs(rows, bench):
+    bench(lambda: generate_track_pairs(rows), repeat=3)
@@ -0,0 +1,44 @@
+import threading
+from itertools import count
+
+from spotify_assistant.models.ingestion import TrackPairInput
+from spotify_assistant.services.ingestion import IngestionStore
+from spotify_assistant.services.ingestion import close_ingestion_store
+from spotify_assistant.services.ingestion import ingest_track_pairs
+from spotify_assistant.services.ingestion import open_ingestion_store
+
+WRITERS = 8
+
+
+def test_ingest_track_pairs_concurrent(rows, bench, tmp_path):
+    """WRITERS threads ingest `rows` pairs, each pair sent by two of them."""
+    runs = count()
+
+    def open_store() -> tuple[IngestionStore]:
+        csv_path = tmp_path / f"track_pairs_{next(runs)}.csv"
+        return (open_ingestion_store(csv_path, resolve=False),)
+
+    def ingest(store: IngestionStore) -> None:
+        def writer(worker: int) -> None:
+            names = range(worker // 2, rows, WRITERS // 2)
+            ingest_track_pairs(
+                store,
+                (
+                    TrackPairInput(
+                        brazilian_artist=f"BA {i}",
+                        brazilian_track=f"BT {i}",
+                        original_artist=f"OA {i}",
+                        original_track=f"OT {i}",
+                    )
+                    for i in names
+                ),
+            )
+
+        threads = [threading.Thread(target=writer, args=(w,)) for w in range(WRITERS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        close_ingestion_store(store)
+
+    bench(ingest, open_store)
@@ -0,0 +1,70 @@
+import statistics
+import sys
+import time
+from unittest.mock import MagicMock
+
+import pytest
+from loguru import logger
+
+from spotify_assistant import main
+from spotify_assistant.logs import configure_logging
+from spotify_assistant.main import load_dataset
+from spotify_assistant.main import process_row
+
+# The run must be this much faster than with loguru's default handler
+MIN_SPEEDUP = 1.2
+REPEAT = 3  # runs of each configuration, compared by their medians
+
+
+def _default_logging(sink) -> None:
+    """loguru's default handler, as runs used it before configure_logging:
+    every level from DEBUG, written synchronously."""
+    logger.remove()
+    logger.add(sink, level="DEBUG")
+
+
+@pytest.mark.usefixtures("dataset")
+def test_process_row_logging(bench, monkeypatch, tmp_path, fake_search):
+    """main.process_row over every row, with the run's logging to a file,
+    against the same rows logged through loguru's default handler (median of
+    REPEAT runs each)."""
+
+    def search_track(track_name, artist):
+        if track_name.endswith("0"):
+            return None  # some tracks are not found, as in real runs
+        return fake_search(track_name, artist)
+
+    monkeypatch.setattr(main, "search_track", search_track)
+    monkeypatch.setattr(main, "add_tracks_to_playlist", MagicMock())
+    monkeypatch.setattr(main, "REQUEST_DELAY", 0)
+    df = load_dataset()
+    df["in_playlist"] = False
+    df["brazilian_has_spotify"] = None
+    df["original_has_spotify"] = None
+    rows = [df.iloc[position] for position in range(len(df))]
+
+    def run() -> None:
+        for row in rows:
+            process_row(row.copy())
+
+    def configured() -> tuple[()]:
+        configure_logging("INFO", tmp_path / "run.log")
+        return ()
+
+    try:
+        timings = []
+        for _ in range(REPEAT):
+            _default_logging(tmp_path / "default.log")
+            started = time.perf_counter()
+            run()
+            timings.append(time.perf_counter() - started)
+        default_elapsed = statistics.median(timings)
+
+        elapsed = bench(run, configured, repeat=REPEAT)
+    finally:
+        logger.remove()  # waits for the queued records
+        logger.add(sys.stderr)
+
+    assert default_elapsed / elapsed >= MIN_SPEEDUP, (
+        f"configure_logging: {elapsed:.3f}s, default handler: {default_elapsed:.3f}s"
+    )
@@ -0,0 +1,78 @@
+# uv run --extra api python -m spotify_assistant.api
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from pathlib import Path
+
+import uvicorn
+from fastapi import Depends
+from fastapi import FastAPI
+from fastapi import HTTPException
+from fastapi import Request
+from fastapi import status
+
+from spotify_assistant.exceptions import DuplicateTrackPairError
+from spotify_assistant.exceptions import InvalidTrackPairError
+from spotify_assistant.logs import configure_logging
+from spotify_assistant.models.ingestion import IngestionStats
+from spotify_assistant.models.ingestion import IngestResult
+from spotify_assistant.models.ingestion import TrackPairInput
+from spotify_assistant.models.tracks import TrackPair
+from spotify_assistant.services.ingestion import IngestionStore
+from spotify_assistant.services.ingestion import close_ingestion_store
+from spotify_assistant.services.ingestion import get_ingestion_stats
+from spotify_assistant.services.ingestion import ingest_track_pair
+from spotify_assistant.services.ingestion import ingest_track_pairs
+from spotify_assistant.services.ingestion import open_ingestion_store
+from spotify_assistant.settings import settings
+
+
+def get_store(request: Request) -> IngestionStore:
+    store: IngestionStore = request.app.state.store
+    return store
+
+
+def create_app(csv_path: Path | None = None, resolve: bool | None = None) -> FastAPI:
+    """Ingestion service owning the track pairs CSV (settings.track_pairs_path)."""
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+        app.state.store = open_ingestion_store(
+            csv_path or settings.track_pairs_path, resolve
+        )
+        try:
+            yield
+        finally:
+            close_ingestion_store(app.state.store)
+
+    app = FastAPI(title="Spotify Assistant ingestion", lifespan=lifespan)
+
+    @app.post("/track-pairs", status_code=status.HTTP_202_ACCEPTED)
+    async def post_track_pair(
+        pair: TrackPairInput, store: IngestionStore = Depends(get_store)
+    ) -> TrackPair:
+        """Accept a pair; it reaches the CSV with the next write-behind flush."""
+        try:
+            return ingest_track_pair(store, pair)
+        except InvalidTrackPairError as error:
+            raise HTTPException(
+                status.HTTP_422_UNPROCESSABLE_CONTENT, str(error)
+            ) from error
+        except DuplicateTrackPairError as error:
+            raise HTTPException(status.HTTP_409_CONFLICT, str(error)) from error
+
+    @app.post("/track-pairs/batch")
+    async def post_track_pairs(
+        pairs: list[TrackPairInput], store: IngestionStore = Depends(get_store)
+    ) -> list[IngestResult]:
+        return ingest_track_pairs(store, pairs)
+
+    @app.get("/stats")
+    async def get_stats(store: IngestionStore = Depends(get_store)) -> IngestionStats:
+        return get_ingestion_stats(store)
+
+    return app
+
+
+if __name__ == "__main__":
+    configure_logging()
+    uvicorn.run(create_app(), host=settings.API_HOST, port=settings.API_PORT)
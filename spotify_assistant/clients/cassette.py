@@ -0,0 +1,109 @@
+import gzip
+import json
+import threading
+import time
+from pathlib import Path
+from typing import Any
+from typing import Literal
+from typing import TypedDict
+
+import requests
+
+from spotify_assistant.exceptions import CassetteFormatError
+from spotify_assistant.exceptions import CassetteMissError
+
+CASSETTE_VERSION = 1
+
+type CassetteMode = Literal["record", "replay"]
+
+
+class RecordedResponse(TypedDict):
+    status: int
+    body: str  # response text, JSON for the Web API
+
+
+def _load_cassette(path: Path) -> dict[str, RecordedResponse]:
+    if not path.exists():
+        return {}
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        data = json.load(f)
+    if data.get("version") != CASSETTE_VERSION:
+        raise CassetteFormatError(
+            f"{path} has cassette version {data.get('version')}, "
+            f"expected {CASSETTE_VERSION}"
+        )
+    interactions: dict[str, RecordedResponse] = data["interactions"]
+    return interactions
+
+
+def request_key(method: str, url: str, params: Any = None, data: Any = None) -> str:
+    """Identity of a request: method, URL with sorted query and the body.
+
+    Headers (and so the access token) are not part of it.
+    """
+    full_url = requests.Request(method, url, params=params).prepare().url or url
+    base, _, query = full_url.partition("?")
+    key = f"{method.upper()} {base}"
+    if query:
+        key += "?" + "&".join(sorted(query.split("&")))
+    if data:
+        key += f" {data.decode() if isinstance(data, bytes) else data}"
+    return key
+
+
+class CassetteSession(requests.Session):
+    """requests session that records Web API responses or replays them.
+
+    In record mode requests go to the network and every response is kept;
+    save() writes them to a gzip compressed JSON cassette. In replay mode no
+    request leaves the process: responses come from the cassette, after
+    `latency` seconds to simulate the network, and unknown requests raise
+    CassetteMissError.
+    """
+
+    def __init__(self, path: Path, mode: CassetteMode, latency: float = 0.0):
+        super().__init__()
+        self.path = path
+        self.mode = mode
+        self.latency = latency
+        self.interactions = _load_cassette(path)
+        self.lock = threading.Lock()
+
+    def request(  # type: ignore[override]
+        self, method: str, url: str, **kwargs: Any
+    ) -> requests.Response:
+        key = request_key(method, url, kwargs.get("params"), kwargs.get("data"))
+        if self.mode == "replay":
+            return self._replay(key, url)
+
+        response = super().request(method, url, **kwargs)
+        with self.lock:
+            self.interactions[key] = RecordedResponse(
+                status=response.status_code, body=response.text
+            )
+        return response
+
+    def _replay(self, key: str, url: str) -> requests.Response:
+        with self.lock:
+            recorded = self.interactions.get(key)
+        if recorded is None:
+            raise CassetteMissError(f"No recorded response for {key}")
+        if self.latency:
+            time.sleep(self.latency)
+        response = requests.Response()
+        response.status_code = recorded["status"]
+        response._content = recorded["body"].encode()
+        response.encoding = "utf-8"
+        response.url = url
+        response.headers["Content-Type"] = "application/json"
+        return response
+
+    def save(self) -> None:
+        """Write the recorded responses (atomic replace of the cassette)."""
+        with self.lock:
+            payload = {"version": CASSETTE_VERSION, "interactions": self.interactions}
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix(".tmp")
+            with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+                json.dump(payload, f, sort_keys=True)
+            tmp_path.replace(self.path)
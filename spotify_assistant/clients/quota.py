@@ -0,0 +1,147 @@
+import fcntl
+import json
+import os
+import threading
+from collections.abc import Iterator
+from contextlib import contextmanager
+from datetime import UTC
+from datetime import datetime
+from typing import Literal
+from typing import TypedDict
+
+from spotify_assistant.exceptions import ApiCallLimitError
+from spotify_assistant.settings import settings
+
+LEDGER_FLUSH_EVERY = 20  # calls recorded in memory before the ledger is saved
+
+type ApiCallKind = Literal["search_calls", "write_calls"]
+
+
+class ApiUsage(TypedDict):
+    # Read calls: track searches (each query ladder step is one call) and
+    # tracks-by-ID requests (one per 50 IDs)
+    search_calls: int
+    write_calls: int  # playlist add/remove requests
+
+
+_lock = threading.Lock()
+# Calls not yet added to the ledger file, by UTC day
+_unsaved: dict[str, ApiUsage] = {}
+_unsaved_count = 0
+# Calls made by this process since start (or reset), for per-run budgets
+_session = ApiUsage(search_calls=0, write_calls=0)
+# Session call counts at which record_api_call refuses more (limit_session_calls)
+_session_limits: dict[ApiCallKind, int] = {}
+
+
+def _today() -> str:
+    return datetime.now(UTC).date().isoformat()
+
+
+def _read_ledger() -> dict[str, ApiUsage]:
+    path = settings.quota_ledger_path
+    if not path.exists():
+        return {}
+    ledger: dict[str, ApiUsage] = json.loads(path.read_text("utf-8"))
+    return ledger
+
+
+def _flush_locked() -> None:
+    """Add the unsaved calls to the ledger file. Caller holds _lock.
+
+    The file is re-read under an exclusive flock so concurrent runs add up
+    instead of overwriting each other.
+    """
+    global _unsaved_count
+    if not _unsaved:
+        return
+    path = settings.quota_ledger_path
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd = os.open(path.with_suffix(".lock"), os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        ledger = _read_ledger()
+        for day, usage in _unsaved.items():
+            saved = ledger.setdefault(day, ApiUsage(search_calls=0, write_calls=0))
+            saved["search_calls"] += usage["search_calls"]
+            saved["write_calls"] += usage["write_calls"]
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp_path.write_text(json.dumps(ledger, indent=2, sort_keys=True), "utf-8")
+        tmp_path.replace(path)
+    finally:
+        os.close(fd)
+    _unsaved.clear()
+    _unsaved_count = 0
+
+
+def record_api_call(kind: ApiCallKind) -> None:
+    """Count one Spotify API call in the session and the persisted ledger.
+
+    Called before the call is made. Raises ApiCallLimitError, counting
+    nothing, once the session reached its limit for kind (see
+    limit_session_calls): the caller must not make the call.
+    """
+    global _unsaved_count
+    with _lock:
+        limit = _session_limits.get(kind)
+        if limit is not None and _session[kind] >= limit:
+            raise ApiCallLimitError(f"Session limit of {limit} {kind} reached")
+        _session[kind] += 1
+        usage = _unsaved.setdefault(_today(), ApiUsage(search_calls=0, write_calls=0))
+        usage[kind] += 1
+        _unsaved_count += 1
+        if _unsaved_count >= LEDGER_FLUSH_EVERY:
+            _flush_locked()
+
+
+@contextmanager
+def limit_session_calls(kind: ApiCallKind, limit: int) -> Iterator[None]:
+    """Refuse calls of kind within the block once the session made `limit`.
+
+    `limit` counts from process start (or reset), like get_session_usage.
+    """
+    with _lock:
+        previous = _session_limits.get(kind)
+        _session_limits[kind] = limit
+    try:
+        yield
+    finally:
+        with _lock:
+            if previous is None:
+                _session_limits.pop(kind, None)
+            else:
+                _session_limits[kind] = previous
+
+
+def flush_quota_ledger() -> None:
+    """Persist the calls recorded since the last flush (end of every run)."""
+    with _lock:
+        _flush_locked()
+
+
+def get_session_usage() -> ApiUsage:
+    with _lock:
+        return _session.copy()
+
+
+def get_daily_usage(day: str | None = None) -> ApiUsage:
+    """Calls made on a UTC day (default today) by all runs, saved or not."""
+    day = day or _today()
+    with _lock:
+        saved = _read_ledger().get(day, ApiUsage(search_calls=0, write_calls=0))
+        unsaved = _unsaved.get(day, ApiUsage(search_calls=0, write_calls=0))
+    return ApiUsage(
+        search_calls=saved["search_calls"] + unsaved["search_calls"],
+        write_calls=saved["write_calls"] + unsaved["write_calls"],
+    )
+
+
+def reset_quota_ledger() -> None:
+    """Drop unsaved calls and session counters (the ledger file is kept)."""
+    global _unsaved_count
+    with _lock:
+        _unsaved.clear()
+        _unsaved_count = 0
+        _session_limits.clear()
+        _session["search_calls"] = 0
+        _session["write_calls"] = 0
@@ -0,0 +1,373 @@
+import gzip
+import json
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from collections.abc import Iterable
+from datetime import UTC
+from datetime import datetime
+from datetime import timedelta
+from pathlib import Path
+from typing import TypedDict
+
+from spotify_assistant.exceptions import SearchCacheFormatError
+from spotify_assistant.models.spotify import CachedSearch
+from spotify_assistant.models.spotify import SpotifyTrack
+from spotify_assistant.settings import settings
+
+PRELOAD_BATCH_SIZE = 500  # keys per SELECT, below sqlite's variable limit
+EXPORT_SCHEMA_VERSION = 2  # 2: searches scored by the current matcher only
+# Bumped when the way a search picks its track changes; entries stored by an
+# older matcher are searched again (1: top result taken unscored)
+MATCHER_VERSION = 2
+
+
+class SearchCacheStats(TypedDict):
+    memory_hits: int
+    disk_hits: int
+    misses: int
+    evictions: int  # entries dropped from the memory tier
+
+
+class SearchCacheImport(TypedDict):
+    searches: int  # entries added or replaced by a newer verification
+    kept: int  # local entries verified at the same time or later
+    expired: int  # artifact entries older than its TTL
+    recordings: int  # ISRC representatives added
+
+
+_connection: sqlite3.Connection | None = None
+_connection_path: Path | None = None
+# Memory tier: least recently used first, bounded by SEARCH_CACHE_MEMORY_SIZE
+_memory: OrderedDict[str, CachedSearch] = OrderedDict()
+_stats = SearchCacheStats(memory_hits=0, disk_hits=0, misses=0, evictions=0)
+_lock = threading.Lock()
+
+
+def _get_connection() -> sqlite3.Connection:
+    """Get or open the search cache database at settings.search_cache_path."""
+    global _connection, _connection_path
+    path = settings.search_cache_path
+    if _connection is None or _connection_path != path:
+        if _connection is not None:
+            _connection.close()
+        _memory.clear()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        _connection = sqlite3.connect(path, check_same_thread=False)
+        _connection.executescript(
+            "CREATE TABLE IF NOT EXISTS searches ("
+            " key TEXT PRIMARY KEY,"
+            " track TEXT,"  # SpotifyTrack JSON, NULL when not found
+            " verified_at TEXT NOT NULL,"
+            " matcher INTEGER NOT NULL DEFAULT 1"  # MATCHER_VERSION of the search
+            ");"
+            # ISRC index: one representative release per recording
+            "CREATE TABLE IF NOT EXISTS recordings ("
+            " isrc TEXT PRIMARY KEY,"
+            " track TEXT NOT NULL"  # SpotifyTrack JSON
+            ");"
+            "CREATE TABLE IF NOT EXISTS track_isrcs ("
+            " track_id TEXT PRIMARY KEY,"
+            " isrc TEXT NOT NULL"
+            ");"
+        )
+        columns = {row[1] for row in _connection.execute("PRAGMA table_info(searches)")}
+        if "matcher" not in columns:
+            # Created before searches were scored: every entry is from matcher 1
+            _connection.execute(
+                "ALTER TABLE searches ADD COLUMN matcher INTEGER NOT NULL DEFAULT 1"
+            )
+        _connection_path = path
+    return _connection
+
+
+def close_search_cache() -> None:
+    global _connection, _connection_path
+    with _lock:
+        if _connection is not None:
+            _connection.close()
+        _connection = None
+        _connection_path = None
+        _memory.clear()
+
+
+def get_search_cache_stats() -> SearchCacheStats:
+    with _lock:
+        return _stats.copy()
+
+
+def reset_search_cache_stats() -> None:
+    with _lock:
+        _stats["memory_hits"] = 0
+        _stats["disk_hits"] = 0
+        _stats["misses"] = 0
+        _stats["evictions"] = 0
+
+
+def _remember(key: str, entry: CachedSearch) -> None:
+    """Insert into the memory tier as most recently used, evicting the oldest."""
+    _memory[key] = entry
+    _memory.move_to_end(key)
+    while len(_memory) > settings.SEARCH_CACHE_MEMORY_SIZE:
+        _memory.popitem(last=False)
+        _stats["evictions"] += 1
+
+
+def _from_row(track_json: str | None, verified_at: str) -> CachedSearch:
+    track: SpotifyTrack | None = json.loads(track_json) if track_json else None
+    return CachedSearch(track=track, verified_at=verified_at)
+
+
+def _miss_cutoff() -> str:
+    """verified_at below which a cached "not found" is stale ("" when kept)."""
+    ttl_days = settings.SEARCH_CACHE_MISS_TTL_DAYS
+    return _expiry_cutoff(ttl_days * 86_400 if ttl_days is not None else None)
+
+
+def _is_stale_miss(entry: CachedSearch, cutoff: str) -> bool:
+    return entry["track"] is None and entry["verified_at"] < cutoff
+
+
+def get_cached_search(key: str) -> CachedSearch | None:
+    """Cached search outcome for a canonical key.
+
+    None if never searched, searched by an older matcher (see
+    MATCHER_VERSION), or if the search found nothing more than
+    settings.SEARCH_CACHE_MISS_TTL_DAYS ago: the track may have been
+    released since, so the caller searches again.
+    """
+    cutoff = _miss_cutoff()
+    with _lock:
+        connection = _get_connection()
+        entry = _memory.get(key)
+        if entry is not None and not _is_stale_miss(entry, cutoff):
+            _memory.move_to_end(key)
+            _stats["memory_hits"] += 1
+            return entry
+
+        row = connection.execute(
+            "SELECT track, verified_at FROM searches WHERE key = ? AND matcher >= ?",
+            (key, MATCHER_VERSION),
+        ).fetchone()
+        if row is None or (row[0] is None and row[1] < cutoff):
+            _memory.pop(key, None)
+            _stats["misses"] += 1
+            return None
+        _stats["disk_hits"] += 1
+        entry = _from_row(row[0], row[1])
+        _remember(key, entry)
+        return entry
+
+
+def get_cached_track_id(key: str) -> str | None:
+    """Spotify ID a canonical key was resolved to, None if not cached or not found."""
+    cached = get_cached_search(key)
+    if cached is None or cached["track"] is None:
+        return None
+    return cached["track"]["id"]
+
+
+def set_cached_search(key: str, track: SpotifyTrack | None) -> None:
+    """Store a search outcome (None = not found), written through to disk."""
+    entry = CachedSearch(track=track, verified_at=datetime.now(UTC).isoformat())
+    payload = json.dumps(track) if track is not None else None
+    with _lock:
+        connection = _get_connection()
+        connection.execute(
+            "INSERT OR REPLACE INTO searches (key, track, verified_at, matcher)"
+            " VALUES (?, ?, ?, ?)",
+            (key, payload, entry["verified_at"], MATCHER_VERSION),
+        )
+        connection.commit()
+        _remember(key, entry)
+
+
+def preload_search_cache(keys: Iterable[str]) -> int:
+    """Warm the memory tier with the given keys in batched reads.
+
+    Returns how many keys were found on disk (stale entries are skipped, see
+    get_cached_search). Keys beyond the memory tier capacity evict earlier
+    ones, so preload only the rows about to be processed.
+    """
+    loaded = 0
+    cutoff = _miss_cutoff()
+    with _lock:
+        connection = _get_connection()
+        pending = list(dict.fromkeys(key for key in keys if key not in _memory))
+        for start in range(0, len(pending), PRELOAD_BATCH_SIZE):
+            batch = pending[start : start + PRELOAD_BATCH_SIZE]
+            placeholders = ",".join("?" * len(batch))
+            rows = connection.execute(
+                "SELECT key, track, verified_at FROM searches"
+                f" WHERE key IN ({placeholders}) AND matcher >= ?"
+                " AND (track IS NOT NULL OR verified_at >= ?)",
+                [*batch, MATCHER_VERSION, cutoff],
+            ).fetchall()
+            for key, track_json, verified_at in rows:
+                _remember(key, _from_row(track_json, verified_at))
+            loaded += len(rows)
+    return loaded
+
+
+def register_recording(track: SpotifyTrack) -> SpotifyTrack:
+    """Collapse equivalent releases (compilation, single, remaster) by ISRC.
+
+    The first release seen for an ISRC becomes its representative and is
+    returned for every later release, so all cache keys of one recording share
+    one track ID. Tracks without ISRC are returned unchanged.
+    """
+    isrc = track.get("isrc")
+    if not isrc:
+        return track
+    with _lock:
+        connection = _get_connection()
+        connection.execute(
+            "INSERT OR IGNORE INTO recordings (isrc, track) VALUES (?, ?)",
+            (isrc, json.dumps(track)),
+        )
+        connection.execute(
+            "INSERT OR REPLACE INTO track_isrcs (track_id, isrc) VALUES (?, ?)",
+            (track["id"], isrc),
+        )
+        connection.commit()
+        row = connection.execute(
+            "SELECT track FROM recordings WHERE isrc = ?", (isrc,)
+        ).fetchone()
+    representative: SpotifyTrack = json.loads(row[0])
+    return representative
+
+
+def record_track_isrcs(isrcs: dict[str, str]) -> None:
+    """Remember the ISRC of track IDs (track_id -> isrc), e.g. playlist items."""
+    with _lock:
+        connection = _get_connection()
+        connection.executemany(
+            "INSERT OR REPLACE INTO track_isrcs (track_id, isrc) VALUES (?, ?)",
+            isrcs.items(),
+        )
+        connection.commit()
+
+
+def get_isrcs(track_ids: Iterable[str]) -> dict[str, str]:
+    """Known ISRC of each track ID (IDs never seen are left out)."""
+    found: dict[str, str] = {}
+    pending = list(dict.fromkeys(track_ids))
+    with _lock:
+        connection = _get_connection()
+        for start in range(0, len(pending), PRELOAD_BATCH_SIZE):
+            batch = pending[start : start + PRELOAD_BATCH_SIZE]
+            placeholders = ",".join("?" * len(batch))
+            found.update(
+                connection.execute(
+                    "SELECT track_id, isrc FROM track_isrcs"
+                    f" WHERE track_id IN ({placeholders})",
+                    batch,
+                ).fetchall()
+            )
+    return found
+
+
+def _expiry_cutoff(ttl_seconds: float | None) -> str:
+    """verified_at below which a search is expired ("" when there is no TTL).
+
+    verified_at values are UTC ISO timestamps, so they compare as strings.
+    """
+    if ttl_seconds is None:
+        return ""
+    return (datetime.now(UTC) - timedelta(seconds=ttl_seconds)).isoformat()
+
+
+def export_search_cache(path: Path, ttl_days: float | None = None) -> int:
+    """Write the resolved searches to a gzip compressed JSON artifact.
+
+    Searches verified more than ttl_days ago (default
+    settings.SEARCH_CACHE_EXPORT_TTL_DAYS) or by an older matcher (see
+    MATCHER_VERSION) are left out, and the TTL is
+    stored so importers drop entries that expire in transit. The ISRC tables
+    go along, so imported track IDs still collapse by recording. Returns the
+    number of searches exported.
+    """
+    if ttl_days is None:
+        ttl_days = settings.SEARCH_CACHE_EXPORT_TTL_DAYS
+    ttl_seconds = ttl_days * 86_400 if ttl_days is not None else None
+    with _lock:
+        connection = _get_connection()
+        searches = connection.execute(
+            "SELECT key, track, verified_at FROM searches"
+            " WHERE verified_at >= ? AND matcher >= ? ORDER BY key",
+            (_expiry_cutoff(ttl_seconds), MATCHER_VERSION),
+        ).fetchall()
+        recordings = connection.execute(
+            "SELECT isrc, track FROM recordings ORDER BY isrc"
+        ).fetchall()
+        track_isrcs = connection.execute(
+            "SELECT track_id, isrc FROM track_isrcs ORDER BY track_id"
+        ).fetchall()
+    artifact = {
+        "schema_version": EXPORT_SCHEMA_VERSION,
+        "exported_at": datetime.now(UTC).isoformat(),
+        "ttl_seconds": ttl_seconds,
+        # Rows as lists, track objects as their stored JSON text
+        "searches": searches,
+        "recordings": recordings,
+        "track_isrcs": track_isrcs,
+    }
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+        json.dump(artifact, f, separators=(",", ":"))
+    tmp_path.replace(path)
+    return len(searches)
+
+
+def import_search_cache(path: Path) -> SearchCacheImport:
+    """Merge an export_search_cache artifact into the local cache.
+
+    For a key known on both sides the most recently verified search wins,
+    unless the local one is from an older matcher.
+    Recordings and track ISRCs already known locally are kept, so cached
+    track IDs stay stable. Raises SearchCacheFormatError for an artifact of
+    another schema version.
+    """
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        artifact = json.load(f)
+    if artifact.get("schema_version") != EXPORT_SCHEMA_VERSION:
+        raise SearchCacheFormatError(
+            f"{path} has schema version {artifact.get('schema_version')}, "
+            f"expected {EXPORT_SCHEMA_VERSION}"
+        )
+    cutoff = _expiry_cutoff(artifact["ttl_seconds"])
+    searches = [row for row in artifact["searches"] if row[2] >= cutoff]
+    with _lock:
+        connection = _get_connection()
+        before = connection.total_changes
+        connection.executemany(
+            "INSERT INTO searches (key, track, verified_at, matcher)"
+            " VALUES (?, ?, ?, ?)"
+            " ON CONFLICT (key) DO UPDATE SET"
+            " track = excluded.track, verified_at = excluded.verified_at,"
+            " matcher = excluded.matcher"
+            " WHERE excluded.verified_at > searches.verified_at"
+            " OR searches.matcher < excluded.matcher",
+            [(*row, MATCHER_VERSION) for row in searches],
+        )
+        changed = connection.total_changes - before
+        connection.executemany(
+            "INSERT OR IGNORE INTO recordings (isrc, track) VALUES (?, ?)",
+            artifact["recordings"],
+        )
+        recordings = connection.total_changes - before - changed
+        connection.executemany(
+            "INSERT OR IGNORE INTO track_isrcs (track_id, isrc) VALUES (?, ?)",
+            artifact["track_isrcs"],
+        )
+        connection.commit()
+        # Entries may have been replaced on disk
+        _memory.clear()
+    return SearchCacheImport(
+        searches=changed,
+        kept=len(searches) - changed,
+        expired=len(artifact["searches"]) - len(searches),
+        recordings=recordings,
+    )
@@ -0,0 +1,107 @@
+import asyncio
+import threading
+from collections.abc import Awaitable
+from collections.abc import Callable
+from dataclasses import dataclass
+from dataclasses import field
+from typing import Any
+from typing import TypedDict
+
+
+class SingleFlightStats(TypedDict):
+    executed: int  # calls that actually ran (threaded layer)
+    coalesced: int  # calls that waited on an identical in-flight call instead
+
+
+@dataclass
+class _InFlightCall:
+    done: threading.Event = field(default_factory=threading.Event)
+    result: Any = None
+    error: BaseException | None = None
+
+
+_lock = threading.Lock()
+_in_flight: dict[str, _InFlightCall] = {}
+# (event loop id, key) -> future, asyncio futures are bound to one loop
+_in_flight_async: dict[tuple[int, str], asyncio.Future[Any]] = {}
+_stats = SingleFlightStats(executed=0, coalesced=0)
+
+
+def get_single_flight_stats() -> SingleFlightStats:
+    with _lock:
+        return _stats.copy()
+
+
+def reset_single_flight_stats() -> None:
+    with _lock:
+        _stats["executed"] = 0
+        _stats["coalesced"] = 0
+
+
+def run_once[T](key: str, fn: Callable[[], T]) -> T:
+    """Run fn, unless a call with the same key is in flight in another thread.
+
+    Concurrent callers with the same key wait for the first one and share its
+    result or exception. Nothing is kept once the call completes.
+    """
+    with _lock:
+        call = _in_flight.get(key)
+        leader = call is None
+        if call is None:
+            call = _in_flight[key] = _InFlightCall()
+            _stats["executed"] += 1
+        else:
+            _stats["coalesced"] += 1
+
+    if not leader:
+        call.done.wait()
+        if call.error is not None:
+            raise call.error
+        result: T = call.result
+        return result
+
+    try:
+        call.result = fn()
+        return call.result
+    except BaseException as error:
+        call.error = error
+        raise
+    finally:
+        with _lock:
+            del _in_flight[key]
+        call.done.set()
+
+
+async def run_once_async[T](key: str, fn: Callable[[], Awaitable[T]]) -> T:
+    """Asyncio counterpart of run_once for callers on the same event loop."""
+    loop = asyncio.get_running_loop()
+    flight_key = (id(loop), key)
+    with _lock:
+        future = _in_flight_async.get(flight_key)
+        leader = future is None
+        if future is None:
+            # executed is counted by run_once inside fn when it reaches a thread
+            future = _in_flight_async[flight_key] = loop.create_future()
+        else:
+            _stats["coalesced"] += 1
+
+    if not leader:
+        # shield: a cancelled follower must not cancel the shared call
+        shared: T = await asyncio.shield(future)
+        return shared
+
+    try:
+        result = await fn()
+    except asyncio.CancelledError:
+        future.cancel()
+        raise
+    except BaseException as error:
+        future.set_exception(error)
+        future.exception()  # mark retrieved when there are no followers
+        raise
+    else:
+        future.set_result(result)
+        return result
+    finally:
+        with _lock:
+            del _in_flight_async[flight_key]
@@ -1,9 +1,30 @@
+import asyncio
+import atexit
 from typing import Any
 
+import numpy as np
 import spotipy
 from spotipy.oauth2 import SpotifyOAuth
 
+from spotify_assistant.clients.cassette import CassetteSession
+from spotify_assistant.clients.quota import record_api_call
+from spotify_assistant.clients.search_cache import get_cached_search
+from spotify_assistant.clients.search_cache import record_track_isrcs
+from spotify_assistant.clients.search_cache import register_recording
+from spotify_assistant.clients.search_cache import set_cached_search
+from spotify_assistant.clients.single_flight import run_once
+from spotify_assistant.clients.single_flight import run_once_async
+from spotify_assistant.exceptions import SearchNeedsReviewError
+from spotify_assistant.matching import record_for_review
+from spotify_assistant.matching import score_candidates
+from spotify_assistant.models.spotify import PlaylistDetails
+from spotify_assistant.models.spotify import PlaylistItemPositions
+from spotify_assistant.models.spotify import PlaylistSnapshot
 from spotify_assistant.models.spotify import SpotifyTrack
+from spotify_assistant.models.spotify import TrackMetadata
+from spotify_assistant.normalization import canonical_key
+from spotify_assistant.normalization import query_variants
+from spotify_assistant.normalization import record_variant_result
 from spotify_assistant.settings import settings
 
 PLAYLIST_SCOPES = [
@@ -11,16 +32,38 @@ PLAYLIST_SCOPES = [
     "playlist-modify-private",
 ]
 
+PLAYLIST_WRITE_BATCH_SIZE = 100  # Spotify max items per add/remove request
+PLAYLIST_PAGE_SIZE = 100  # Spotify max items per playlist page
+TRACKS_BATCH_SIZE = 50  # Spotify max IDs per tracks-by-ID request
+
 _client: spotipy.Spotify | None = None
 
 
+def _cassette_session() -> CassetteSession | None:
+    """HTTP session for settings.SPOTIFY_CASSETTE_MODE, None when off."""
+    mode = settings.SPOTIFY_CASSETTE_MODE
+    if mode == "off":
+        return None
+    session = CassetteSession(
+        settings.SPOTIFY_CASSETTE_PATH, mode, settings.SPOTIFY_CASSETTE_LATENCY
+    )
+    if mode == "record":
+        atexit.register(session.save)
+    return session
+
+
 def get_spotify_client() -> spotipy.Spotify:
     """Get or create Spotify client using OAuth flow.
 
-    Uses a cached client instance to avoid repeated auth prompts.
+    Uses a cached client instance to avoid repeated auth prompts. In cassette
+    replay mode no credentials are needed and nothing goes to the network.
     """
     global _client
     if _client is None:
+        session = _cassette_session()
+        if session is not None and session.mode == "replay":
+            _client = spotipy.Spotify(auth="replay", requests_session=session)
+            return _client
         auth_manager = SpotifyOAuth(
             client_id=settings.SPOTIFY_CLIENT_ID,
             client_secret=settings.SPOTIFY_CLIENT_SECRET,
@@ -28,38 +71,262 @@ def get_spotify_client() -> spotipy.Spotify:
             scope=" ".join(PLAYLIST_SCOPES),
             cache_path=".cache",
         )
-        _client = spotipy.Spotify(auth_manager=auth_manager)
+        _client = spotipy.Spotify(
+            auth_manager=auth_manager, requests_session=session or True
+        )
     return _client
 
 
+def _to_spotify_track(item: dict[str, Any]) -> SpotifyTrack:
+    """Full track object (search or tracks-by-ID response) to SpotifyTrack."""
+    return SpotifyTrack(
+        id=item["id"],
+        name=item["name"],
+        artist=item["artists"][0]["name"],
+        uri=item["uri"],
+        url=item["external_urls"]["spotify"],
+        isrc=item.get("external_ids", {}).get("isrc"),
+        album=item.get("album", {}).get("name", ""),
+        duration_ms=item.get("duration_ms", 0),
+    )
+
+
+def track_id_from_uri(uri: str) -> str:
+    """spotify:track:xxx -> xxx."""
+    return uri.rsplit(":", 1)[-1]
+
+
+def _search_items(query: str) -> list[dict[str, Any]]:
+    """Top settings.SEARCH_CANDIDATES results of one search call."""
+    client = get_spotify_client()
+    record_api_call("search_calls")
+    results = client.search(q=query, type="track", limit=settings.SEARCH_CANDIDATES)
+    if results is None or "tracks" not in results:
+        return []
+    items: list[dict[str, Any]] = [
+        item for item in results["tracks"]["items"] if item is not None
+    ]
+    return items
+
+
+def _search_with_ladder(track_name: str, artist: str) -> SpotifyTrack | None:
+    """Walk the query ladder until the first hit and pick its best candidate.
+
+    Candidates are scored locally (matching.score_candidates). When even the
+    best one is below settings.SEARCH_MIN_CONFIDENCE, the search is recorded
+    for review and SearchNeedsReviewError is raised: no looser query is tried.
+    """
+    for variant, query in query_variants(track_name, artist):
+        items = _search_items(query)
+        record_variant_result(variant, bool(items))
+        if not items:
+            continue
+        candidates = [_to_spotify_track(item) for item in items]
+        scores = score_candidates(track_name, artist, candidates)
+        best = int(np.argmax(scores))
+        if scores[best] < settings.SEARCH_MIN_CONFIDENCE:
+            record_for_review(track_name, artist, query, candidates, scores)
+            raise SearchNeedsReviewError(f"{artist} - {track_name}")
+        track = candidates[best]
+        track["match_confidence"] = round(float(scores[best]), 3)
+        return track
+    return None
+
+
 def search_track(track_name: str, artist: str) -> SpotifyTrack | None:
     """Search for a track on Spotify by name and artist.
 
+    Results (including misses) are cached by canonical key. On a cache miss the
+    query ladder is tried from strictest to loosest, stopping at the first hit;
+    concurrent callers searching the same song share that one search.
+    Low-confidence matches are sent to review and raise SearchNeedsReviewError
+    instead; they are not cached, so later runs search them again.
     Returns track info if found, None otherwise.
     """
+    key = canonical_key(track_name, artist)
+    cached = get_cached_search(key)
+    if cached is not None:
+        return cached["track"]
+
+    def search_and_cache() -> SpotifyTrack | None:
+        # A call that completed after our lookup may have filled the cache
+        cached = get_cached_search(key)
+        if cached is not None:
+            return cached["track"]
+        track = _search_with_ladder(track_name, artist)
+        if track is not None:
+            track = register_recording(track)
+        set_cached_search(key, track)
+        return track
+
+    return run_once(key, search_and_cache)
+
+
+async def search_track_async(track_name: str, artist: str) -> SpotifyTrack | None:
+    """search_track for asyncio callers, coalesced per event loop."""
+    key = canonical_key(track_name, artist)
+    return await run_once_async(
+        key, lambda: asyncio.to_thread(search_track, track_name, artist)
+    )
+
+
+def _get_track_items(track_ids: list[str]) -> list[dict[str, Any] | None]:
+    """Raw track objects by ID, in batches of 50; None for unknown IDs.
+
+    Results keep the order of track_ids. ISRCs are added to the ISRC index.
+    Each request counts as a search call (see quota.ApiUsage).
+    """
     client = get_spotify_client()
-    query = f"track:{track_name} artist:{artist}"
-    results = client.search(q=query, type="track", limit=1)
-    if results is None or "tracks" not in results:
-        return None
+    items: list[dict[str, Any] | None] = []
+    for start in range(0, len(track_ids), TRACKS_BATCH_SIZE):
+        batch = track_ids[start : start + TRACKS_BATCH_SIZE]
+        record_api_call("search_calls")
+        items.extend(client.tracks(batch)["tracks"])
+    isrcs: dict[str, str] = {}
+    for track_id, item in zip(track_ids, items, strict=True):
+        isrc = item.get("external_ids", {}).get("isrc") if item else None
+        if isrc:
+            isrcs[track_id] = isrc
+    record_track_isrcs(isrcs)
+    return items
 
-    items = results["tracks"]["items"]
-    if not items:
-        return None
 
-    track = items[0]
-    return SpotifyTrack(
-        id=track["id"],
-        name=track["name"],
-        artist=track["artists"][0]["name"],
-        uri=track["uri"],
-        url=track["external_urls"]["spotify"],
+def get_tracks(track_ids: list[str]) -> list[SpotifyTrack | None]:
+    """Full tracks by ID, in batches of 50; None for unknown IDs."""
+    return [
+        _to_spotify_track(item) if item else None
+        for item in _get_track_items(track_ids)
+    ]
+
+
+def _to_track_metadata(item: dict[str, Any]) -> TrackMetadata:
+    album = item.get("album", {})
+    images = album.get("images") or []  # widest first
+    return TrackMetadata(
+        id=item["id"],
+        isrc=item.get("external_ids", {}).get("isrc"),
+        duration_ms=item.get("duration_ms", 0),
+        popularity=item.get("popularity", 0),
+        release_date=album.get("release_date"),
+        album_image_url=images[0]["url"] if images else None,
     )
 
 
+def get_track_metadata(track_ids: list[str]) -> list[TrackMetadata | None]:
+    """Enrichment details by ID, in batches of 50; None for unknown IDs."""
+    return [
+        _to_track_metadata(item) if item else None
+        for item in _get_track_items(track_ids)
+    ]
+
+
 def add_tracks_to_playlist(playlist_id: str, track_uris: list[str]) -> Any:
-    """Add tracks to a Spotify playlist."""
+    """Add tracks to a Spotify playlist, in batches of 100 URIs.
+
+    Returns the response of the last batch (holds the new snapshot_id).
+    """
     if not track_uris:
         return
     client = get_spotify_client()
-    return client.playlist_add_items(playlist_id, track_uris)
+    response = None
+    for start in range(0, len(track_uris), PLAYLIST_WRITE_BATCH_SIZE):
+        batch = track_uris[start : start + PLAYLIST_WRITE_BATCH_SIZE]
+        record_api_call("write_calls")
+        response = client.playlist_add_items(playlist_id, batch)
+    return response
+
+
+def get_playlist_snapshot_id(playlist_id: str) -> str:
+    """Current snapshot_id of a playlist (changes with every modification)."""
+    client = get_spotify_client()
+    snapshot_id: str = client.playlist(playlist_id, fields="snapshot_id")["snapshot_id"]
+    return snapshot_id
+
+
+def get_playlist_details(playlist_id: str) -> PlaylistDetails:
+    """Name, public and collaborative flags of a playlist (public may be None)."""
+    client = get_spotify_client()
+    playlist = client.playlist(playlist_id, fields="name,public,collaborative")
+    return PlaylistDetails(
+        name=playlist["name"],
+        public=playlist.get("public"),
+        collaborative=playlist.get("collaborative", False),
+    )
+
+
+def create_playlist(
+    name: str, description: str = "", public: bool = True, collaborative: bool = False
+) -> str:
+    """Create a playlist owned by the current user; returns its ID.
+
+    Spotify only allows collaborative playlists that are not public.
+    """
+    client = get_spotify_client()
+    user_id = client.current_user()["id"]
+    record_api_call("write_calls")
+    playlist = client.user_playlist_create(
+        user_id,
+        name,
+        public=public and not collaborative,
+        collaborative=collaborative,
+        description=description,
+    )
+    playlist_id: str = playlist["id"]
+    return playlist_id
+
+
+def get_playlist_snapshot(playlist_id: str) -> PlaylistSnapshot:
+    """Get the playlist snapshot_id and all item URIs (and ISRCs) in order.
+
+    The snapshot_id is read before paging so removals by position are validated
+    against the state the positions were taken from. Item ISRCs are added to
+    the ISRC index.
+    """
+    client = get_spotify_client()
+    snapshot_id = get_playlist_snapshot_id(playlist_id)
+
+    uris: list[str | None] = []
+    isrcs: list[str | None] = []
+    page = client.playlist_items(
+        playlist_id,
+        fields="items(track(uri,external_ids(isrc))),next",
+        limit=PLAYLIST_PAGE_SIZE,
+        additional_types=("track",),
+    )
+    while page:
+        for item in page["items"]:
+            track = item.get("track")
+            # Unavailable items still occupy a position
+            uris.append(track["uri"] if track else None)
+            isrcs.append(track.get("external_ids", {}).get("isrc") if track else None)
+        page = client.next(page) if page.get("next") else None
+
+    record_track_isrcs(
+        {
+            track_id_from_uri(uri): isrc
+            for uri, isrc in zip(uris, isrcs, strict=True)
+            if uri is not None and isrc is not None
+        }
+    )
+    return PlaylistSnapshot(snapshot_id=snapshot_id, uris=uris, isrcs=isrcs)
+
+
+def remove_tracks_from_playlist(
+    playlist_id: str, items: list[PlaylistItemPositions], snapshot_id: str
+) -> Any:
+    """Remove specific occurrences of tracks from a playlist, in batches of 100.
+
+    Every batch is validated against the same snapshot_id, so positions stay
+    relative to the playlist state they were read from.
+    """
+    if not items:
+        return
+    client = get_spotify_client()
+    response = None
+    for start in range(0, len(items), PLAYLIST_WRITE_BATCH_SIZE):
+        batch = items[start : start + PLAYLIST_WRITE_BATCH_SIZE]
+        record_api_call("write_calls")
+        response = client.playlist_remove_specific_occurrences_of_items(
+            playlist_id, batch, snapshot_id=snapshot_id
+        )
+    return response
@@ -8,3 +8,43 @@ class CSVFormatError(CSVError):
 
 class DuplicateTrackPairError(CSVError):
     """Raised when attempting to add a duplicate track pair."""
+
+
+class InvalidTrackPairError(CSVError):
+    """Raised when a track pair fails validate_track_pair."""
+
+
+class StaleDatasetError(CSVError):
+    """Raised when the CSV rows changed since they were read (optimistic check)."""
+
+
+class SearchNeedsReviewError(Exception):
+    """Raised when a search's best match is below SEARCH_MIN_CONFIDENCE.
+
+    The search is recorded for review and not cached: the track is neither
+    found nor missing, so its pair stays pending.
+    """
+
+
+class ApiCallLimitError(Exception):
+    """Raised instead of a Spotify API call past the run's call budget."""
+
+
+class CassetteError(Exception):
+    """Base exception for recorded Spotify API responses."""
+
+
+class CassetteFormatError(CassetteError):
+    """Raised when a cassette file has an unknown format version."""
+
+
+class CassetteMissError(CassetteError):
+    """Raised when replaying a request that was never recorded."""
+
+
+class SearchCacheError(Exception):
+    """Base exception for search cache artifacts."""
+
+
+class SearchCacheFormatError(SearchCacheError):
+    """Raised when a search cache artifact has an unknown schema version."""
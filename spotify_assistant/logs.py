@@ -0,0 +1,75 @@
+import sys
+import time
+from collections import Counter
+from dataclasses import dataclass
+from dataclasses import field
+from typing import Any
+
+from loguru import logger
+
+from spotify_assistant.settings import settings
+
+
+def configure_logging(level: str | None = None, sink: Any = sys.stderr) -> int:
+    """Replace loguru's default handler by a non-blocking one.
+
+    Records are queued and written by a background thread (enqueue=True), so
+    hot loops never wait on the terminal or the disk. Returns the handler id.
+    """
+    logger.remove()
+    return logger.add(sink, level=level or settings.LOG_LEVEL, enqueue=True)
+
+
+@dataclass
+class Progress:
+    """Rows processed by a long loop, logged every `every` rows."""
+
+    label: str
+    total: int
+    every: int = field(default_factory=lambda: settings.LOG_PROGRESS_EVERY)
+    done: int = 0
+    outcomes: Counter[str] = field(default_factory=Counter)
+    started_at: float = field(default_factory=time.monotonic)
+
+
+def format_eta(seconds: float) -> str:
+    """Compact duration: 45s, 3m07s, 2h05m."""
+    seconds = round(seconds)
+    if seconds < 60:
+        return f"{seconds}s"
+    minutes, seconds = divmod(seconds, 60)
+    if minutes < 60:
+        return f"{minutes}m{seconds:02d}s"
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}h{minutes:02d}m"
+
+
+def log_progress(progress: Progress) -> None:
+    """One INFO line: rows done, rate, ETA and outcome counts so far."""
+    elapsed = time.monotonic() - progress.started_at
+    rate = progress.done / elapsed if elapsed > 0 else 0.0
+    left = progress.total - progress.done
+    eta = format_eta(left / rate) if rate else "?"
+    percent = 100 * progress.done / progress.total if progress.total else 100.0
+    outcomes = "".join(
+        f", {count} {outcome}" for outcome, count in sorted(progress.outcomes.items())
+    )
+    logger.info(
+        "{}: {}/{} rows ({:.1f}%), {:.1f} rows/s, ETA {}{}",
+        progress.label,
+        progress.done,
+        progress.total,
+        percent,
+        rate,
+        eta,
+        outcomes,
+    )
+
+
+def advance_progress(progress: Progress, outcome: str | None = None) -> None:
+    """Count one processed row (and its outcome, e.g. "added") and log if due."""
+    progress.done += 1
+    if outcome is not None:
+        progress.outcomes[outcome] += 1
+    if progress.done % progress.every == 0 or progress.done == progress.total:
+        log_progress(progress)
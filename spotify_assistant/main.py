@@ -1,11 +1,60 @@
-# uv run python -m spotify_assistant.main
+# uv run python -m spotify_assistant.main [--sync|--plan|--watch|--enrich|--stats]
+import argparse
 import time
+from pathlib import Path
+from typing import Any
 
 import pandas as pd
 from loguru import logger
 
+from spotify_assistant.clients.quota import flush_quota_ledger
+from spotify_assistant.clients.search_cache import export_search_cache
+from spotify_assistant.clients.search_cache import import_search_cache
 from spotify_assistant.clients.spotify import add_tracks_to_playlist
 from spotify_assistant.clients.spotify import search_track
+from spotify_assistant.exceptions import ApiCallLimitError
+from spotify_assistant.exceptions import SearchNeedsReviewError
+from spotify_assistant.exceptions import StaleDatasetError
+from spotify_assistant.logs import Progress
+from spotify_assistant.logs import advance_progress
+from spotify_assistant.logs import configure_logging
+from spotify_assistant.models.tracks import TrackPair
+from spotify_assistant.normalization import make_pair_key
+from spotify_assistant.services.budget import RunBudget
+from spotify_assistant.services.budget import can_start_pair
+from spotify_assistant.services.budget import can_write
+from spotify_assistant.services.budget import create_run_budget
+from spotify_assistant.services.budget import enforce_search_budget
+from spotify_assistant.services.budget import is_limited
+from spotify_assistant.services.budget import prioritize_rows
+from spotify_assistant.services.csv_rows import atomic_csv_writer
+from spotify_assistant.services.csv_rows import build_row_offsets
+from spotify_assistant.services.csv_rows import read_track_pairs_range
+from spotify_assistant.services.dataset_lock import bump_dataset_version
+from spotify_assistant.services.dataset_lock import check_dataset_version
+from spotify_assistant.services.dataset_lock import dataset_lock
+from spotify_assistant.services.dataset_lock import get_dataset_version
+from spotify_assistant.services.enrichment import all_genre_stats
+from spotify_assistant.services.enrichment import enrich_csv
+from spotify_assistant.services.enrichment import format_stats_table
+from spotify_assistant.services.planner import plan_playlist_build
+from spotify_assistant.services.playlist_builder import sync_playlist_with_csv
+from spotify_assistant.services.retry_queue import get_retry_entries
+from spotify_assistant.services.retry_queue import is_deferred
+from spotify_assistant.services.retry_queue import record_failure
+from spotify_assistant.services.retry_queue import record_success
+from spotify_assistant.services.shards import get_volumes
+from spotify_assistant.services.shards import is_sharded
+from spotify_assistant.services.shards import target_playlists
+from spotify_assistant.services.snapshot import frame_from_table
+from spotify_assistant.services.snapshot import load_snapshot
+from spotify_assistant.services.snapshot import table_from_frame
+from spotify_assistant.services.snapshot import write_snapshot
+from spotify_assistant.services.status_index import get_status_counts
+from spotify_assistant.services.status_index import pending_rows
+from spotify_assistant.services.status_index import record_rewrite_codes
+from spotify_assistant.services.status_index import status_codes_of_frame
+from spotify_assistant.services.watcher import watch_csvs
 from spotify_assistant.settings import settings
 
 DTYPES = {
@@ -20,35 +69,111 @@ DTYPES = {
     "in_playlist": "boolean",
 }
 
-REQUEST_DELAY = 0.1  # seconds between API calls
+STATUS_COLUMNS = ["brazilian_has_spotify", "original_has_spotify", "in_playlist"]
+
+REQUEST_DELAY = settings.SPOTIFY_REQUEST_DELAY
 
 
 def load_dataset() -> pd.DataFrame:
-    """Load track pairs CSV into DataFrame."""
-    return pd.read_csv(
-        settings.track_pairs_path,
-        low_memory=False,
-        dtype=DTYPES,  # type: ignore
-        keep_default_na=True,
-        na_values=["", "null", "None"],
-    )
+    """Load track pairs CSV into DataFrame.
+
+    A fresh Arrow snapshot of the CSV (see services.snapshot) is read instead
+    of parsing it. Values follow read_track_pairs, whichever path is taken:
+    an artist named "None" stays text and a blank in_playlist is False. The
+    dataset version is kept in df.attrs so save_dataset can detect rows
+    modified by another writer meanwhile.
+    """
+    path = settings.track_pairs_path
+    with dataset_lock(path):
+        table = load_snapshot(path)
+        if table is None:
+            # Raw text: the values follow read_track_pairs, not pandas' NA rules
+            raw = pd.read_csv(path, dtype=str, keep_default_na=False, low_memory=False)
+            table = table_from_frame(raw)
+            write_snapshot(path, table)
+        df = frame_from_table(table)
+        df.attrs["dataset_version"] = get_dataset_version(path)
+    return df
 
 
 def save_dataset(df: pd.DataFrame) -> None:
-    """Save DataFrame back to CSV."""
-    df.to_csv(settings.track_pairs_path, index=False)
-    logger.info(f"Saved {len(df)} rows to {settings.track_pairs_path}")
+    """Save DataFrame back to CSV, keeping rows other writers appended meanwhile.
+
+    Raises StaleDatasetError if existing rows were modified since load_dataset.
+    """
+    path = settings.track_pairs_path
+    with dataset_lock(path, exclusive=True):
+        check_dataset_version(path, df.attrs.get("dataset_version"))
+        offsets = build_row_offsets(path)
+        if len(offsets) - 1 > len(df):
+            appended = read_track_pairs_range(path, offsets[len(df)], offsets[-1])
+            logger.info(f"Keeping {len(appended)} rows appended during the run")
+            tail = pd.DataFrame(appended, columns=df.columns).astype(DTYPES)
+            df = pd.concat([df, tail], ignore_index=True)
+        with atomic_csv_writer(path) as f:
+            df.to_csv(f, index=False)
+        bump_dataset_version(path)
+        record_rewrite_codes(path, status_codes_of_frame(df))
+        write_snapshot(path, table_from_frame(df))
+    logger.info(f"Saved {len(df)} rows to {path}")
+
+
+def _row_key(row: Any) -> str:
+    return make_pair_key(
+        row.brazilian_track,
+        row.brazilian_artist,
+        row.original_track,
+        row.original_artist,
+    )
+
+
+def merge_run_rows(df: pd.DataFrame, run_rows: pd.DataFrame) -> pd.DataFrame:
+    """Copy the statuses of run_rows onto the rows of df holding the same pair.
+
+    Rows are matched by pair key, so rows that moved in the file still get
+    their statuses; pairs deleted meanwhile are dropped.
+    """
+    sources = {_row_key(row): row.Index for row in run_rows.itertuples()}
+    for row in df.itertuples():
+        source = sources.get(_row_key(row))
+        if source is not None:
+            df.loc[row.Index, STATUS_COLUMNS] = run_rows.loc[source, STATUS_COLUMNS]
+    return df
+
+
+def save_run(df: pd.DataFrame, processed: list[int]) -> None:
+    """Save the dataset at the end of a run.
+
+    When rows were modified meanwhile (StaleDatasetError), the statuses of the
+    processed rows are merged into a fresh load instead: their tracks may
+    already be in the playlist. If that save conflicts too, the processed rows
+    are appended to settings.unsaved_rows_path and the error is re-raised.
+    """
+    try:
+        save_dataset(df)
+        return
+    except StaleDatasetError:
+        logger.warning("Rows were modified during the run, merging this run's rows")
+    run_rows = df.loc[processed]
+    try:
+        save_dataset(merge_run_rows(load_dataset(), run_rows))
+    except StaleDatasetError:
+        path = settings.unsaved_rows_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        run_rows.to_csv(path, mode="a", header=not path.exists(), index=False)
+        logger.error(f"Rows were modified again, this run's rows are in {path}")
+        raise
 
 
 def search_brazilian_track(row: pd.Series) -> str | None:
     """Search for Brazilian track. Returns URI if found, None otherwise."""
     brazilian = search_track(row.brazilian_track, row.brazilian_artist)
     if not brazilian:
-        logger.warning(
-            f"  BR not found: {row.brazilian_artist} - {row.brazilian_track}"
+        logger.debug(
+            "  BR not found: {} - {}", row.brazilian_artist, row.brazilian_track
         )
         return None
-    logger.success(f"  BR found: {brazilian['name']} by {brazilian['artist']}")
+    logger.debug("  BR found: {} by {}", brazilian["name"], brazilian["artist"])
     time.sleep(REQUEST_DELAY)
     return brazilian["uri"]
 
@@ -57,11 +182,11 @@ def search_original_track(row: pd.Series) -> str | None:
     """Search for Original track. Returns URI if found, None otherwise."""
     original = search_track(row.original_track, row.original_artist)
     if not original:
-        logger.warning(
-            f"  ORIG not found: {row.original_artist} - {row.original_track}"
+        logger.debug(
+            "  ORIG not found: {} - {}", row.original_artist, row.original_track
         )
         return None
-    logger.success(f"  ORIG found: {original['name']} by {original['artist']}")
+    logger.debug("  ORIG found: {} by {}", original["name"], original["artist"])
     time.sleep(REQUEST_DELAY)
     return original["uri"]
 
@@ -77,19 +202,76 @@ def should_skip_row(row: pd.Series) -> bool:
     return False
 
 
-def process_row(row: pd.Series) -> pd.Series:
-    """Process a single track pair row."""
-    pair_name = (
+def row_to_pair(row: pd.Series) -> TrackPair:
+    """Convert a DataFrame row (pandas NA for unset cells) to a TrackPair."""
+
+    def value(name: str) -> Any:
+        return None if pd.isna(row[name]) else row[name]
+
+    return TrackPair(
+        brazilian_artist=row.brazilian_artist,
+        brazilian_track=row.brazilian_track,
+        original_artist=row.original_artist,
+        original_track=row.original_track,
+        added_at=value("added_at"),
+        source=value("source"),
+        brazilian_has_spotify=value("brazilian_has_spotify"),
+        original_has_spotify=value("original_has_spotify"),
+        in_playlist=value("in_playlist") or False,
+    )
+
+
+def pair_name(row: pd.Series) -> str:
+    return (
         f"{row.brazilian_artist} - {row.brazilian_track} -> "
         f"{row.original_artist} - {row.original_track}"
     )
 
+
+def process_row(row: pd.Series, budget: RunBudget | None = None) -> pd.Series:
+    """Process a single track pair row.
+
+    Errors from Spotify calls do not abort the run: the pair goes to the retry
+    queue and the row is returned with whatever was resolved before the error.
+    A search refused by the budget or sent to review leaves the row pending
+    instead. Per-row logs are DEBUG and only formatted when enabled; errors are logged
+    in full.
+    """
+    lazy = logger.opt(lazy=True)
     if should_skip_row(row):
-        logger.debug(f"SKIP: {pair_name}")
+        lazy.debug("SKIP: {}", lambda: pair_name(row))
+        return row
+
+    pair = row_to_pair(row)
+    if is_deferred(pair):
+        lazy.debug("RETRY LATER: {}", lambda: pair_name(row))
         return row
 
-    logger.info(f"Processing: {pair_name}")
+    lazy.debug("Processing: {}", lambda: pair_name(row))
+    try:
+        row = search_and_add_row(row, budget)
+    except ApiCallLimitError:
+        if budget is not None:
+            budget.exhausted = budget.exhausted or "search calls"
+        return row
+    except SearchNeedsReviewError:
+        lazy.debug("REVIEW: {}", lambda: pair_name(row))
+        return row
+    except Exception as error:
+        entry = record_failure(pair, error)
+        logger.error(
+            "Error on {} (attempt {}): {!r}", pair_name(row), entry["attempts"], error
+        )
+        return row
+    record_success(pair)
+    return row
+
+
+def search_and_add_row(row: pd.Series, budget: RunBudget | None = None) -> pd.Series:
+    """Search both tracks of a pending row and add them to the playlist.
 
+    Past the write budget the row is left pending, with its search results.
+    """
     # Search Brazilian track
     brazilian_uri = search_brazilian_track(row)
     if not brazilian_uri:
@@ -105,15 +287,185 @@ def process_row(row: pd.Series) -> pd.Series:
     row["original_has_spotify"] = True
 
     # Add to playlist
-    add_tracks_to_playlist(settings.TARGET_PLAYLIST_ID, [brazilian_uri, original_uri])
+    if not can_write(budget):
+        logger.info("  Write budget spent, left for the next run")
+        return row
+    pair = row_to_pair(row)
+    (playlist_id,) = target_playlists(settings.TARGET_PLAYLIST_ID, [pair]).values()
+    add_tracks_to_playlist(playlist_id, [brazilian_uri, original_uri])
     row["in_playlist"] = True
-    logger.success("  Added to playlist!")
+    logger.debug("  Added to playlist!")
 
     return row
 
 
-def main() -> None:
-    """Main entry point for processing track pairs."""
+def sync() -> None:
+    """Converge the target playlist and the CSV (adds missing, removes stale)."""
+    logger.info(
+        f"Syncing {settings.TARGET_PLAYLIST_ID} with {settings.track_pairs_path}"
+    )
+    try:
+        result = sync_playlist_with_csv(
+            settings.track_pairs_path, settings.TARGET_PLAYLIST_ID
+        )
+    finally:
+        flush_quota_ledger()
+    logger.info("=" * 50)
+    logger.info("SYNC SUMMARY")
+    logger.info(f"  Expected pairs: {result['expected_pairs']}")
+    logger.info(f"  Tracks added: {len(result['added_uris'])}")
+    removed_count = sum(len(item["positions"]) for item in result["removed"])
+    logger.info(f"  Tracks removed: {removed_count}")
+    logger.info(f"  CSV rows updated: {result['updated_rows']}")
+    if is_sharded():
+        for volume in get_volumes(settings.TARGET_PLAYLIST_ID):
+            logger.info(
+                f"  Vol. {volume['volume']}: {volume['pairs']} pairs "
+                f"({volume['playlist_id']})"
+            )
+
+
+def plan() -> None:
+    """Report what a run would cost, without calling the Spotify API."""
+    result = plan_playlist_build(settings.track_pairs_path)
+    logger.info("=" * 50)
+    logger.info(f"PLAN for {settings.track_pairs_path}")
+    logger.info(f"  Total pairs: {result['total_rows']}")
+    logger.info(f"  Pending pairs: {result['pending_rows']}")
+    logger.info(f"  Search cache hits: {result['cache_hits']}")
+    logger.info(
+        f"  Search cache misses: {result['cache_misses']} "
+        f"(up to {result['max_search_calls']} calls)"
+    )
+    logger.info(f"  Known not found: {result['known_not_found']}")
+    logger.info(f"  Playlist write batches: {result['write_batches']}")
+    logger.info(f"  Estimated time: {result['estimated_seconds']:.1f}s")
+
+
+def watch() -> None:
+    """Keep running and process pairs as they are appended to the CSV."""
+    try:
+        watch_csvs({settings.track_pairs_path: settings.TARGET_PLAYLIST_ID})
+    except KeyboardInterrupt:
+        logger.info("Stopped watching")
+
+
+def enrich() -> None:
+    """Fetch track metadata for every resolved track of the CSVs in DATA_DIR."""
+    for csv_path in sorted(settings.DATA_DIR.glob("*.csv")):
+        logger.info(f"Enriching tracks of {csv_path}")
+        enrich_csv(csv_path)
+
+
+def stats() -> None:
+    """Log per-genre playlist figures from local data, without API calls."""
+    logger.info("GENRE STATS")
+    for line in format_stats_table(all_genre_stats()).splitlines():
+        logger.info(f"  {line}")
+
+
+def export_cache(path: Path) -> None:
+    """Write the search cache to a portable artifact, see export_search_cache."""
+    exported = export_search_cache(path)
+    logger.info(f"Exported {exported} cached searches to {path}")
+
+
+def import_cache(path: Path) -> None:
+    """Merge a search cache artifact into the local cache."""
+    result = import_search_cache(path)
+    logger.info(
+        f"Imported {result['searches']} searches from {path} "
+        f"({result['kept']} local ones newer, {result['expired']} expired)"
+    )
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Build the cover playlist from CSV")
+    parser.add_argument(
+        "--sync",
+        action="store_true",
+        help="two-way sync: also remove playlist tracks no longer in the CSV",
+    )
+    parser.add_argument(
+        "--plan",
+        action="store_true",
+        help="estimate API calls and runtime without touching Spotify or the CSV",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="daemon mode: process rows appended to the CSV as they arrive",
+    )
+    parser.add_argument(
+        "--enrich",
+        action="store_true",
+        help="fetch duration, popularity and album art of the resolved tracks",
+    )
+    parser.add_argument(
+        "--stats",
+        action="store_true",
+        help="print the per-genre README table from local data (no API calls)",
+    )
+    parser.add_argument(
+        "--export-cache",
+        type=Path,
+        metavar="PATH",
+        help="write the search cache to a compressed artifact (no API calls)",
+    )
+    parser.add_argument(
+        "--import-cache",
+        type=Path,
+        metavar="PATH",
+        help="merge a search cache artifact into the local cache (no API calls)",
+    )
+    parser.add_argument(
+        "--max-minutes",
+        type=float,
+        help="stop starting new pairs after this many minutes",
+    )
+    parser.add_argument(
+        "--max-searches",
+        type=int,
+        help="stop once this many search calls were made",
+    )
+    parser.add_argument(
+        "--max-writes",
+        type=int,
+        help="make at most this many playlist write calls",
+    )
+    return parser.parse_args(argv)
+
+
+def row_order(df: pd.DataFrame, budget: RunBudget | None) -> list[Any]:
+    """Index of the rows to visit: the pending rows from the status index, in
+    CSV order, or best first with a limited budget (see prioritize_rows).
+    """
+    positions = [
+        position
+        for position in pending_rows(settings.track_pairs_path)
+        if position < len(df)  # rows appended since load_dataset
+    ]
+    if budget is not None and is_limited(budget):
+        pending = [(position, row_to_pair(df.iloc[position])) for position in positions]
+        positions = [position for position, _ in prioritize_rows(pending)]
+    return [df.index[position] for position in positions]
+
+
+def row_outcome(initial_in_playlist: Any, row: pd.Series) -> str | None:
+    """Outcome of a processed row counted in the progress lines."""
+    if row.in_playlist is True and initial_in_playlist is not True:
+        return "added"
+    if row.brazilian_has_spotify is False or row.original_has_spotify is False:
+        return "not found"
+    return None
+
+
+def main(budget: RunBudget | None = None) -> None:
+    """Main entry point for processing track pairs.
+
+    With a budget the run stops before the first row that does not fit, and
+    the dataset is saved as usual.
+    """
     logger.info(f"Loading dataset from {settings.track_pairs_path}")
     df = load_dataset()
     logger.info(f"Loaded {len(df)} track pairs")
@@ -121,33 +473,63 @@ def main() -> None:
     already_in_playlist = df["in_playlist"].sum()
     logger.info(f"Already in playlist: {already_in_playlist}")
 
-    processed = []
-    added_count = 0
-    not_found_count = 0
-
-    for _, row in df.iterrows():
-        initial_in_playlist = row.in_playlist
-        updated_row = process_row(row.copy())
-        processed.append(updated_row)
-
-        if updated_row.in_playlist is True and initial_in_playlist is not True:
-            added_count += 1
-        if (
-            updated_row.brazilian_has_spotify is False
-            or updated_row.original_has_spotify is False
-        ):
-            not_found_count += 1
-
-    result_df = pd.DataFrame(processed)
-    save_dataset(result_df)
-
+    order = row_order(df, budget)
+    progress = Progress(label="Pending pairs", total=len(order))
+    processed: list[int] = []
+
+    # Rows are updated in place and the dataset is saved even if the run is
+    # interrupted, so finished rows are never searched or added twice.
+    try:
+        with enforce_search_budget(budget):
+            for idx in order:
+                if not can_start_pair(budget):
+                    break
+                row = df.loc[idx]
+                initial_in_playlist = row.in_playlist
+                updated_row = process_row(row.copy(), budget)
+                df.loc[idx] = updated_row
+                processed.append(idx)
+                advance_progress(
+                    progress, row_outcome(initial_in_playlist, updated_row)
+                )
+    finally:
+        save_run(df, processed)
+        flush_quota_ledger()
+
+    counts = get_status_counts(settings.track_pairs_path)
     logger.info("=" * 50)
     logger.info("SUMMARY")
-    logger.info(f"  Total pairs: {len(df)}")
-    logger.info(f"  Added to playlist this run: {added_count}")
-    logger.info(f"  Not found on Spotify: {not_found_count}")
-    logger.info(f"  Total in playlist: {result_df['in_playlist'].sum()}")
+    logger.info(f"  Total pairs: {counts['rows']}")
+    logger.info(f"  Added to playlist this run: {progress.outcomes['added']}")
+    logger.info(f"  Not found on Spotify: {counts['not_found']}")
+    logger.info(f"  Queued for retry: {len(get_retry_entries())}")
+    logger.info(f"  Total in playlist: {counts['in_playlist']}")
+    if budget is not None and budget.exhausted is not None:
+        logger.info(f"  Stopped early: {budget.exhausted} budget spent")
 
 
 if __name__ == "__main__":
-    main()
+    args = parse_args()
+    configure_logging()
+    if args.plan:
+        plan()
+    elif args.sync:
+        sync()
+    elif args.watch:
+        watch()
+    elif args.enrich:
+        enrich()
+    elif args.stats:
+        stats()
+    elif args.export_cache:
+        export_cache(args.export_cache)
+    elif args.import_cache:
+        import_cache(args.import_cache)
+    else:
+        main(
+            create_run_budget(
+                max_seconds=args.max_minutes * 60 if args.max_minutes else None,
+                max_search_calls=args.max_searches,
+                max_write_calls=args.max_writes,
+            )
+        )
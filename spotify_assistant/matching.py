@@ -0,0 +1,153 @@
+import json
+import threading
+from collections.abc import Sequence
+from datetime import UTC
+from datetime import datetime
+
+import numpy as np
+import numpy.typing as npt
+
+from spotify_assistant.models.spotify import SpotifyTrack
+from spotify_assistant.normalization import normalize_text
+from spotify_assistant.normalization import primary_artist
+from spotify_assistant.normalization import strip_version_suffix
+from spotify_assistant.settings import settings
+
+TITLE_WEIGHT = 0.6
+ARTIST_WEIGHT = 0.4
+# Below this artist similarity, even an exact title is another artist's song
+MIN_ARTIST_SIMILARITY = 0.5
+ARTIST_MISMATCH_PENALTY = 0.5  # keeps an exact title alone under review
+# Renditions that are not the recording asked for, unless the query says so.
+# Matched as whole words of the normalized candidate title only: a live album
+# or an "Acústico" artist page still holds studio-titled recordings.
+VERSION_KEYWORDS = (
+    "karaoke",
+    "tribute",
+    "instrumental",
+    "playback",
+    "live",
+    "ao vivo",
+    "en vivo",
+    "remix",
+    "cover",
+    "acoustic",
+    "acustico",
+    "made famous",
+    "originally performed",
+    "in the style of",
+    "sped up",
+    "slowed",
+    "lullaby",
+)
+VERSION_PENALTY = 0.5  # puts even an exact title and artist under review
+# Shorter is a snippet or intro, longer a medley or a full set
+MIN_DURATION_MS = 60_000
+MAX_DURATION_MS = 600_000
+DURATION_PENALTY = 0.2
+
+_review_lock = threading.Lock()
+
+
+def _tokens(value: str) -> set[str]:
+    return set(normalize_text(value).split())
+
+
+def _dice(
+    query: set[str], candidates: list[set[str]], vocabulary: dict[str, int]
+) -> npt.NDArray[np.float64]:
+    """Token overlap of every candidate with the query, 0 to 1, in one pass."""
+    matrix = np.zeros((len(candidates), len(vocabulary)), np.float64)
+    for row, tokens in enumerate(candidates):
+        matrix[row, [vocabulary[token] for token in tokens]] = 1
+    wanted = np.zeros(len(vocabulary), np.float64)
+    wanted[[vocabulary[token] for token in query]] = 1
+    overlap = matrix @ wanted
+    sizes = matrix.sum(axis=1) + wanted.sum()
+    return np.divide(2 * overlap, sizes, out=np.zeros_like(overlap), where=sizes > 0)
+
+
+def _similarity(query: str, candidates: list[str]) -> npt.NDArray[np.float64]:
+    query_tokens = _tokens(query)
+    candidate_tokens = [_tokens(candidate) for candidate in candidates]
+    vocabulary = {
+        token: index
+        for index, token in enumerate(query_tokens.union(*candidate_tokens))
+    }
+    return _dice(query_tokens, candidate_tokens, vocabulary)
+
+
+def _has_keyword(text: str, keywords: Sequence[str]) -> bool:
+    padded = f" {normalize_text(text)} "
+    return any(f" {keyword} " in padded for keyword in keywords)
+
+
+def score_candidates(
+    track_name: str, artist: str, candidates: Sequence[SpotifyTrack]
+) -> npt.NDArray[np.float64]:
+    """Match confidence of each search candidate, 0 to 1.
+
+    Weighted title and primary artist similarity (version suffixes such as
+    "- Remastered 2011" stripped), minus a penalty for another artist, for
+    renditions the query did not ask for (karaoke, live, tribute... in the
+    candidate's title) and for implausible durations.
+    """
+    titles = _similarity(
+        strip_version_suffix(track_name),
+        [strip_version_suffix(candidate["name"]) for candidate in candidates],
+    )
+    artists = _similarity(
+        primary_artist(artist),
+        [primary_artist(candidate["artist"]) for candidate in candidates],
+    )
+    unwanted = [
+        keyword
+        for keyword in VERSION_KEYWORDS
+        if not _has_keyword(f"{track_name} {artist}", [keyword])
+    ]
+    versions = np.array([_has_keyword(c["name"], unwanted) for c in candidates], bool)
+    durations = np.array([c.get("duration_ms", 0) for c in candidates], np.int64)
+    implausible = (durations > 0) & (
+        (durations < MIN_DURATION_MS) | (durations > MAX_DURATION_MS)
+    )
+    scores = (
+        TITLE_WEIGHT * titles
+        + ARTIST_WEIGHT * artists
+        - ARTIST_MISMATCH_PENALTY * (artists < MIN_ARTIST_SIMILARITY)
+        - VERSION_PENALTY * versions
+        - DURATION_PENALTY * implausible
+    )
+    return np.clip(scores, 0.0, 1.0)
+
+
+def record_for_review(
+    track_name: str,
+    artist: str,
+    query: str,
+    candidates: Sequence[SpotifyTrack],
+    scores: npt.NDArray[np.float64],
+) -> None:
+    """Append a low-confidence search to settings.search_review_path.
+
+    One JSON line per search, candidates best first, for a human to settle
+    instead of spending more API calls on looser queries.
+    """
+    order = np.argsort(-scores, kind="stable")
+    line = json.dumps(
+        {
+            "track_name": track_name,
+            "artist": artist,
+            "query": query,
+            "searched_at": datetime.now(UTC).isoformat(),
+            "candidates": [
+                {**candidates[i], "confidence": round(float(scores[i]), 3)}
+                for i in order
+            ],
+        },
+        ensure_ascii=False,
+    )
+    path = settings.search_review_path
+    with _review_lock:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with path.open("a", encoding="utf-8") as f:
+            f.write(line + "\n")
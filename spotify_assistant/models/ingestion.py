@@ -0,0 +1,52 @@
+from typing import NotRequired
+from typing import TypedDict
+
+from spotify_assistant.models.tracks import TrackPair
+
+
+class TrackPairInput(TypedDict):
+    """Track pair submitted to the ingestion service.
+
+    Fields:
+        brazilian_artist: Artist of the Forró cover
+        brazilian_track: Title of the Forró cover
+        original_artist: Artist of the original song
+        original_track: Title of the original song
+        source: URL where the pair was found
+    """
+
+    brazilian_artist: str
+    brazilian_track: str
+    original_artist: str
+    original_track: str
+    source: NotRequired[str | None]
+
+
+class IngestResult(TypedDict):
+    """Outcome of one submitted pair.
+
+    Fields:
+        status: "accepted", "duplicate" or "invalid"
+        errors: Validation or duplicate messages, empty when accepted
+        pair: Stored row (with added_at) when accepted, None otherwise
+    """
+
+    status: str
+    errors: list[str]
+    pair: TrackPair | None
+
+
+class IngestionStats(TypedDict):
+    """Counters of a running ingestion store.
+
+    Fields:
+        rows: Pairs known to the index (on disk + waiting to be written)
+        pending_writes: Accepted pairs not flushed to the CSV yet
+        pending_resolutions: Accepted pairs waiting for a Spotify search
+        flushed_batches: Batched writes done since the store was opened
+    """
+
+    rows: int
+    pending_writes: int
+    pending_resolutions: int
+    flushed_batches: int
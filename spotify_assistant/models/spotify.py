@@ -1,3 +1,4 @@
+from typing import NotRequired
 from typing import TypedDict
 
 
@@ -9,3 +10,57 @@ class SpotifyTrack(TypedDict):
     artist: str
     uri: str  # spotify:track:xxx format for playlist creation
     url: str  # https://open.spotify.com/track/xxx web URL
+    # Absent from entries cached before they were captured
+    isrc: NotRequired[str | None]  # recording identity shared by all its releases
+    album: NotRequired[str]
+    duration_ms: NotRequired[int]
+    match_confidence: NotRequired[float]  # 0 to 1, see matching.score_candidates
+
+
+class CachedSearch(TypedDict):
+    """Search outcome stored in the search cache."""
+
+    track: SpotifyTrack | None  # None when the search found nothing
+    verified_at: str  # ISO timestamp of the search
+
+
+class PlaylistItemPositions(TypedDict):
+    """Occurrences of a track in a playlist, as used by item removal."""
+
+    uri: str
+    positions: list[int]  # 0-based positions in the playlist snapshot
+
+
+class PlaylistSnapshot(TypedDict):
+    """Playlist contents at a given snapshot."""
+
+    snapshot_id: str
+    uris: list[str | None]  # item URIs by position, None for unavailable items
+    isrcs: NotRequired[list[str | None]]  # ISRC of each item, same positions
+
+
+class PlaylistDetails(TypedDict):
+    """Name and visibility of a playlist."""
+
+    name: str
+    public: bool | None  # None when Spotify does not report it
+    collaborative: bool
+
+
+class PlaylistVolume(TypedDict):
+    """One playlist of a sharded playlist family (see services.shards)."""
+
+    volume: int  # 1 is the family's base playlist
+    playlist_id: str
+    pairs: int  # track pairs mapped to the volume
+
+
+class TrackMetadata(TypedDict):
+    """Track details kept in the local enrichment store."""
+
+    id: str
+    isrc: str | None
+    duration_ms: int
+    popularity: int  # 0-100, recomputed by Spotify over time
+    release_date: str | None  # album release: "YYYY", "YYYY-MM" or "YYYY-MM-DD"
+    album_image_url: str | None  # largest album cover
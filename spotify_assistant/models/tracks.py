@@ -1,3 +1,4 @@
+from typing import NotRequired
 from typing import TypedDict
 
 
@@ -13,3 +14,38 @@ class TrackPair(TypedDict):
     brazilian_has_spotify: bool | None  # True, False, or None (not checked)
     original_has_spotify: bool | None  # True, False, or None (not checked)
     in_playlist: bool  # True if added to playlist, False otherwise
+
+
+class RetryEntry(TypedDict):
+    """Track pair whose processing raised an error, queued for another attempt."""
+
+    pair_key: str  # canonical pair key, see normalization.pair_key
+    pair: TrackPair
+    attempts: int  # failed attempts so far
+    next_attempt_at: str  # ISO timestamp, the pair is skipped until then
+    last_error: str  # repr of the last exception
+
+
+class WatchCursor(TypedDict):
+    """How far a watched CSV has been processed."""
+
+    row_index: int  # index of the next row to process
+    offset: int  # byte offset where that row starts
+    fingerprint: str  # hash of the bytes just before offset, detects rewrites
+    mtime_ns: int  # file mtime when the cursor was committed
+    # Rows before the cursor whose processing raised, retried once due
+    retry_rows: NotRequired[list[int]]
+
+
+class GlobalIndexEntry(TypedDict):
+    """One track pair of one genre CSV in the global cross-genre index."""
+
+    csv_path: str
+    genre: str  # CSV name without "_pairs.csv", e.g. "forro"
+    row: int  # row index in that CSV
+    pair_key: str  # see normalization.pair_key
+    brazilian_key: str  # see normalization.canonical_key
+    original_key: str
+    original_artist: str  # normalized primary artist of the original
+    brazilian_id: str | None  # Spotify IDs from the search cache, once resolved
+    original_id: str | None
@@ -0,0 +1,164 @@
+import re
+import threading
+import unicodedata
+from functools import lru_cache
+
+from spotify_assistant.models.tracks import TrackPair
+
+# "feat. X", "(ft X)", "[featuring X]", "part. X" (Portuguese credit)
+_FEATURING_PATTERN = re.compile(
+    r"\s*[\(\[]?\s*\b(?:feat\.?|ft\.?|featuring|part\.)\s.*$", re.IGNORECASE
+)
+# "(Ao Vivo)", "[Remastered 2011]", "- Live at Wembley", "- Radio Edit"
+_VERSION_SUFFIX_PATTERN = re.compile(r"\s*(?:[\(\[][^\)\]]*[\)\]]|\s-\s.*)$")
+_ARTIST_SEPARATOR_PATTERN = re.compile(
+    r"\s*(?:,|&|/|\+|\bx\b|\be\b|\band\b|\bwith\b)\s*", re.IGNORECASE
+)
+_PUNCTUATION_PATTERN = re.compile(r"[^\w\s]")
+_WHITESPACE_PATTERN = re.compile(r"\s+")
+
+KEY_SEPARATOR = "\x1f"  # cannot appear in normalized text
+
+
+@lru_cache(maxsize=65536)
+def clean_text(value: str) -> str:
+    """Drop featuring credits, quotes and punctuation; collapse whitespace.
+
+    Case and accents are kept, so the result is still a good search query.
+    """
+    value = _FEATURING_PATTERN.sub("", value)
+    value = _PUNCTUATION_PATTERN.sub(" ", value)
+    return _WHITESPACE_PATTERN.sub(" ", value).strip()
+
+
+@lru_cache(maxsize=65536)
+def normalize_text(value: str) -> str:
+    """Canonical form for comparisons: clean_text, accents stripped, casefolded."""
+    decomposed = unicodedata.normalize("NFKD", clean_text(value))
+    without_accents = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return without_accents.casefold()
+
+
+def strip_version_suffix(track_name: str) -> str:
+    """Remove trailing version markers like "(Ao Vivo)" or "- Remastered 2011"."""
+    stripped = _VERSION_SUFFIX_PATTERN.sub("", track_name).strip()
+    return stripped or track_name
+
+
+def primary_artist(artist: str) -> str:
+    """First credited artist of "A & B", "A, B", "A e B", "A feat. B"..."""
+    artist = _FEATURING_PATTERN.sub("", artist)
+    return _ARTIST_SEPARATOR_PATTERN.split(artist, maxsplit=1)[0].strip() or artist
+
+
+def canonical_key(track_name: str, artist: str) -> str:
+    """Identity of a track, shared by the search cache and duplicate checks."""
+    return f"{normalize_text(track_name)}{KEY_SEPARATOR}{normalize_text(artist)}"
+
+
+def pair_track_keys(pair: TrackPair) -> tuple[str, str]:
+    """Canonical keys of the Brazilian and original tracks of a pair."""
+    return (
+        canonical_key(pair["brazilian_track"], pair["brazilian_artist"]),
+        canonical_key(pair["original_track"], pair["original_artist"]),
+    )
+
+
+def make_pair_key(
+    brazilian_track: str,
+    brazilian_artist: str,
+    original_track: str,
+    original_artist: str,
+) -> str:
+    """Identity of a track pair (Brazilian + original canonical keys)."""
+    brazilian = canonical_key(brazilian_track, brazilian_artist)
+    original = canonical_key(original_track, original_artist)
+    return f"{brazilian}{KEY_SEPARATOR}{original}"
+
+
+def pair_key(pair: TrackPair) -> str:
+    """Identity of a track pair, see make_pair_key."""
+    return make_pair_key(
+        pair["brazilian_track"],
+        pair["brazilian_artist"],
+        pair["original_track"],
+        pair["original_artist"],
+    )
+
+
+def _exact_query(track_name: str, artist: str) -> str:
+    return f"track:{track_name} artist:{artist}"
+
+
+def _cleaned_query(track_name: str, artist: str) -> str:
+    return f"track:{clean_text(track_name)} artist:{clean_text(artist)}"
+
+
+def _primary_artist_query(track_name: str, artist: str) -> str:
+    return f"track:{clean_text(track_name)} artist:{clean_text(primary_artist(artist))}"
+
+
+def _bare_title_query(track_name: str, artist: str) -> str:
+    bare_title = clean_text(strip_version_suffix(track_name))
+    return f"track:{bare_title} artist:{clean_text(primary_artist(artist))}"
+
+
+def _free_text_query(track_name: str, artist: str) -> str:
+    return f"{clean_text(track_name)} {clean_text(primary_artist(artist))}"
+
+
+# Ordered from strictest to loosest; free_text always stays the last resort
+QUERY_LADDER = {
+    "exact": _exact_query,
+    "cleaned": _cleaned_query,
+    "primary_artist": _primary_artist_query,
+    "bare_title": _bare_title_query,
+    "free_text": _free_text_query,
+}
+FALLBACK_VARIANT = "free_text"
+
+# variant -> [attempts, hits]
+_variant_stats: dict[str, list[int]] = {name: [0, 0] for name in QUERY_LADDER}
+_variant_stats_lock = threading.Lock()
+
+
+def record_variant_result(variant: str, hit: bool) -> None:
+    """Count one search attempt of a ladder variant."""
+    with _variant_stats_lock:
+        stats = _variant_stats[variant]
+        stats[0] += 1
+        stats[1] += int(hit)
+
+
+def get_variant_stats() -> dict[str, tuple[int, int]]:
+    """(attempts, hits) per ladder variant."""
+    return {name: (stats[0], stats[1]) for name, stats in _variant_stats.items()}
+
+
+def reset_variant_stats() -> None:
+    for stats in _variant_stats.values():
+        stats[0] = stats[1] = 0
+
+
+def _hit_rate(variant: str) -> float:
+    attempts, hits = _variant_stats[variant]
+    return (hits + 1) / (attempts + 2)  # Laplace smoothing: untried variants = 0.5
+
+
+def query_variants(track_name: str, artist: str) -> list[tuple[str, str]]:
+    """(variant, query) pairs to try in order, without duplicate queries.
+
+    Variants are ordered by observed hit rate (ties keep ladder order), so the
+    ones that keep missing on this dataset stop burning calls up front.
+    """
+    adaptive = [name for name in QUERY_LADDER if name != FALLBACK_VARIANT]
+    ordered = [*sorted(adaptive, key=_hit_rate, reverse=True), FALLBACK_VARIANT]
+
+    variants: list[tuple[str, str]] = []
+    seen: set[str] = set()
+    for name in ordered:
+        query = QUERY_LADDER[name](track_name, artist)
+        if query not in seen:
+            seen.add(query)
+            variants.append((name, query))
+    return variants
@@ -0,0 +1,155 @@
+import time
+from collections.abc import Iterable
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from dataclasses import field
+
+from loguru import logger
+
+from spotify_assistant.clients.quota import ApiCallKind
+from spotify_assistant.clients.quota import ApiUsage
+from spotify_assistant.clients.quota import get_daily_usage
+from spotify_assistant.clients.quota import get_session_usage
+from spotify_assistant.clients.quota import limit_session_calls
+from spotify_assistant.clients.search_cache import get_cached_search
+from spotify_assistant.clients.search_cache import preload_search_cache
+from spotify_assistant.models.tracks import TrackPair
+from spotify_assistant.normalization import pair_track_keys
+from spotify_assistant.settings import settings
+
+
+@dataclass
+class RunBudget:
+    """Limits of one run, counted from its creation (see create_run_budget).
+
+    Limits are checked before a pair is started, and search calls are also
+    refused one by one past max_search_calls (see enforce_search_budget), so
+    pairs in flight cannot overshoot it. Playlist writes are never started
+    past max_write_calls.
+    """
+
+    max_seconds: float | None = None
+    max_search_calls: int | None = None
+    max_write_calls: int | None = None
+    started_at: float = field(default_factory=time.monotonic)
+    start_usage: ApiUsage = field(default_factory=get_session_usage)
+    exhausted: str | None = None  # limit that stopped the run, if any
+
+
+def _smallest(*limits: int | None) -> int | None:
+    present = [limit for limit in limits if limit is not None]
+    return min(present) if present else None
+
+
+def create_run_budget(
+    max_seconds: float | None = None,
+    max_search_calls: int | None = None,
+    max_write_calls: int | None = None,
+) -> RunBudget:
+    """Budget of a run, also capped by what is left of today's quotas.
+
+    Daily quotas (settings.DAILY_SEARCH_QUOTA / DAILY_WRITE_QUOTA) are shared
+    by all runs through the quota ledger in STATE_DIR.
+    """
+    today = get_daily_usage()
+    search_left = write_left = None
+    if settings.DAILY_SEARCH_QUOTA is not None:
+        search_left = max(settings.DAILY_SEARCH_QUOTA - today["search_calls"], 0)
+    if settings.DAILY_WRITE_QUOTA is not None:
+        write_left = max(settings.DAILY_WRITE_QUOTA - today["write_calls"], 0)
+    return RunBudget(
+        max_seconds=max_seconds,
+        max_search_calls=_smallest(max_search_calls, search_left),
+        max_write_calls=_smallest(max_write_calls, write_left),
+    )
+
+
+def is_limited(budget: RunBudget) -> bool:
+    return (
+        budget.max_seconds is not None
+        or budget.max_search_calls is not None
+        or budget.max_write_calls is not None
+    )
+
+
+def _used(budget: RunBudget, kind: ApiCallKind) -> int:
+    return get_session_usage()[kind] - budget.start_usage[kind]
+
+
+def can_write(budget: RunBudget | None) -> bool:
+    """True if another playlist write call fits in the budget."""
+    return (
+        budget is None
+        or budget.max_write_calls is None
+        or _used(budget, "write_calls") < budget.max_write_calls
+    )
+
+
+def _exhausted_limit(budget: RunBudget) -> str | None:
+    elapsed = time.monotonic() - budget.started_at
+    if budget.max_seconds is not None and elapsed >= budget.max_seconds:
+        return "time"
+    if (
+        budget.max_search_calls is not None
+        and _used(budget, "search_calls") >= budget.max_search_calls
+    ):
+        return "search calls"
+    if (
+        budget.max_write_calls is not None
+        and _used(budget, "write_calls") >= budget.max_write_calls
+    ):
+        return "write calls"
+    return None
+
+
+@contextmanager
+def enforce_search_budget(budget: RunBudget | None) -> Iterator[None]:
+    """Refuse search calls past budget.max_search_calls within the block.
+
+    A refused search raises ApiCallLimitError (see quota.record_api_call);
+    callers leave its pair pending and mark the budget exhausted.
+    """
+    if budget is None or budget.max_search_calls is None:
+        yield
+        return
+    limit = budget.start_usage["search_calls"] + budget.max_search_calls
+    with limit_session_calls("search_calls", limit):
+        yield
+
+
+def can_start_pair(budget: RunBudget | None) -> bool:
+    """True if the run may start another pair; records which limit was hit."""
+    if budget is None:
+        return True
+    if budget.exhausted is None:
+        budget.exhausted = _exhausted_limit(budget)
+        if budget.exhausted is not None:
+            logger.info(f"Run budget reached ({budget.exhausted}), stopping")
+    return budget.exhausted is None
+
+
+def last_checked_at(pair: TrackPair) -> str | None:
+    """Oldest search time of the pair's songs, None if one was never searched."""
+    checked = []
+    for key in pair_track_keys(pair):
+        cached = get_cached_search(key)
+        if cached is None:
+            return None
+        checked.append(cached["verified_at"])
+    return min(checked)
+
+
+def prioritize_rows(
+    pending: Iterable[tuple[int, TrackPair]],
+) -> list[tuple[int, TrackPair]]:
+    """Order pending rows: never-checked pairs first, then the oldest checks.
+
+    Ties keep the CSV order. Only the pending rows are held in memory.
+    """
+    rows = list(pending)
+    preload_search_cache(key for _, pair in rows for key in pair_track_keys(pair))
+    checked = {idx: last_checked_at(pair) for idx, pair in rows}
+    return sorted(
+        rows, key=lambda row: (checked[row[0]] is not None, checked[row[0]] or "")
+    )
@@ -1,96 +1,133 @@
 import csv
+import mmap
+import os
+from collections.abc import Callable
+from collections.abc import Sequence
 from datetime import UTC
 from datetime import datetime
 from pathlib import Path
 
-from spotify_assistant.exceptions import CSVFormatError
+from loguru import logger
+
 from spotify_assistant.exceptions import DuplicateTrackPairError
 from spotify_assistant.models.tracks import TrackPair
-
-TRACK_PAIRS_HEADERS = [
-    "brazilian_artist",
-    "brazilian_track",
-    "original_artist",
-    "original_track",
-    "added_at",
-    "source",
-    "brazilian_has_spotify",
-    "original_has_spotify",
-    "in_playlist",
-]
-
-
-def _parse_bool(value: str | None) -> bool | None:
-    """Parse CSV string to bool. Empty string or None returns None."""
-    if value is None or value == "":
-        return None
-    return value.lower() in ["true", "t", "1"]
-
-
-def _bool_to_csv(value: bool | None) -> str:
-    """Convert bool to CSV string. None returns empty string."""
+from spotify_assistant.normalization import pair_key
+from spotify_assistant.services.csv_rows import TRACK_PAIRS_HEADERS
+from spotify_assistant.services.csv_rows import atomic_csv_writer
+from spotify_assistant.services.csv_rows import cached_row_offsets
+from spotify_assistant.services.csv_rows import ensure_csv_exists
+from spotify_assistant.services.csv_rows import forget_row_offsets
+from spotify_assistant.services.csv_rows import iter_track_pairs
+from spotify_assistant.services.csv_rows import keep_row_offsets
+from spotify_assistant.services.csv_rows import read_track_pairs_parallel
+from spotify_assistant.services.dataset_lock import bump_dataset_version
+from spotify_assistant.services.dataset_lock import check_dataset_version
+from spotify_assistant.services.dataset_lock import dataset_lock
+from spotify_assistant.services.dataset_lock import get_dataset_version
+from spotify_assistant.services.global_index import find_pair_in_other_genres
+from spotify_assistant.services.resolver import resolve_in_background
+from spotify_assistant.services.snapshot import load_snapshot
+from spotify_assistant.services.snapshot import table_from_pairs
+from spotify_assistant.services.snapshot import wants_snapshot
+from spotify_assistant.services.snapshot import write_snapshot
+from spotify_assistant.services.status_index import csv_identity
+from spotify_assistant.services.status_index import record_rewrite
+from spotify_assistant.services.status_index import record_status_patch
+from spotify_assistant.settings import settings
+
+STATUS_COLUMNS_COUNT = 3  # trailing has_spotify/in_playlist columns
+STATUS_CELL_WIDTH = len("False")
+
+# Files at least this large are parsed in a process pool by read_track_pairs
+PARALLEL_PARSE_MIN_BYTES = 64 * 1024 * 1024
+
+
+def _bool_to_csv(value: bool | None, pad: bool = False) -> str:
+    """Convert bool to CSV string. None returns empty string.
+
+    With pad=True the cell is space-padded to a fixed width so it can later be
+    patched in place without changing the row length.
+    """
     if value is None:
-        return ""
-    return "True" if value else "False"
+        text = ""
+    else:
+        text = "True" if value else "False"
+    return text.ljust(STATUS_CELL_WIDTH) if pad else text
+
+
+def _track_pair_to_row(pair: TrackPair, pad_status: bool = False) -> list[str]:
+    return [
+        pair["brazilian_artist"],
+        pair["brazilian_track"],
+        pair["original_artist"],
+        pair["original_track"],
+        pair["added_at"] or "",
+        pair["source"] or "",
+        _bool_to_csv(pair["brazilian_has_spotify"], pad_status),
+        _bool_to_csv(pair["original_has_spotify"], pad_status),
+        _bool_to_csv(pair["in_playlist"], pad_status),
+    ]
+
+
+def _parse_track_pairs(csv_path: Path) -> list[TrackPair]:
+    if (
+        csv_path.stat().st_size >= PARALLEL_PARSE_MIN_BYTES
+        and (os.cpu_count() or 1) > 1
+    ):
+        return read_track_pairs_parallel(csv_path)
+    return list(iter_track_pairs(csv_path))
 
 
-def _str_or_none(value: str) -> str | None:
-    """Convert empty string to None."""
-    return value if value else None
+def read_track_pairs(csv_path: Path) -> list[TrackPair]:
+    """Read all track pairs from CSV file.
 
+    For files of DATASET_SNAPSHOT_MIN_BYTES or more, a fresh Arrow snapshot
+    (see services.snapshot) is read instead of parsing, and a parse refreshes
+    it. Files of
+    PARALLEL_PARSE_MIN_BYTES or more are parsed in a process pool.
+    """
+    ensure_csv_exists(csv_path)
+    if not wants_snapshot(csv_path):
+        return _parse_track_pairs(csv_path)
 
-def ensure_csv_exists(csv_path: Path) -> None:
-    """Ensure CSV file exists with proper headers. Creates it if missing."""
-    csv_path.parent.mkdir(parents=True, exist_ok=True)
+    with dataset_lock(csv_path):
+        table = load_snapshot(csv_path)
+        if table is not None:
+            pairs: list[TrackPair] = table.to_pylist()
+            return pairs
+        pairs = _parse_track_pairs(csv_path)
+        write_snapshot(csv_path, table_from_pairs(pairs))
+        return pairs
 
-    if not csv_path.exists():
-        with csv_path.open("w", newline="", encoding="utf-8") as f:
-            writer = csv.writer(f)
-            writer.writerow(TRACK_PAIRS_HEADERS)
 
+def read_track_pairs_versioned(csv_path: Path) -> tuple[list[TrackPair], int]:
+    """Read all track pairs with the dataset version they correspond to.
 
-def read_track_pairs(csv_path: Path) -> list[TrackPair]:
-    """Read all track pairs from CSV file."""
+    Pass the version as expected_version to a later write to detect rows
+    modified by another writer in between.
+    """
     ensure_csv_exists(csv_path)
+    with dataset_lock(csv_path):
+        return read_track_pairs(csv_path), get_dataset_version(csv_path)
 
-    with csv_path.open("r", newline="", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
 
-        if reader.fieldnames is None:
-            return []
-
-        if list(reader.fieldnames) != TRACK_PAIRS_HEADERS:
-            actual = list(reader.fieldnames)
-            raise CSVFormatError(
-                f"Invalid CSV headers. Expected {TRACK_PAIRS_HEADERS}, got {actual}"
-            )
-
-        rows: list[TrackPair] = []
-        for row in reader:
-            track_pair = TrackPair(
-                brazilian_artist=row["brazilian_artist"],
-                brazilian_track=row["brazilian_track"],
-                original_artist=row["original_artist"],
-                original_track=row["original_track"],
-                added_at=_str_or_none(row["added_at"]),
-                source=_str_or_none(row["source"]),
-                brazilian_has_spotify=_parse_bool(row["brazilian_has_spotify"]),
-                original_has_spotify=_parse_bool(row["original_has_spotify"]),
-                in_playlist=_parse_bool(row["in_playlist"]) or False,
-            )
-            rows.append(track_pair)
-        return rows
+def build_duplicate_index(dataset: list[TrackPair]) -> dict[str, int]:
+    """Map each row's canonical pair key to its index (first occurrence wins)."""
+    index: dict[str, int] = {}
+    for idx, row in enumerate(dataset):
+        index.setdefault(pair_key(row), idx)
+    return index
 
 
 def find_duplicate(dataset: list[TrackPair], pair: TrackPair) -> TrackPair | None:
-    """Find a duplicate track pair in the dataset (case-insensitive comparison)."""
+    """Find a duplicate track pair in the dataset.
+
+    Comparison uses the canonical pair key: case, accents, punctuation and
+    featuring credits are ignored.
+    """
+    key = pair_key(pair)
     for row in dataset:
-        if (
-            row["brazilian_artist"].lower() == pair["brazilian_artist"].lower()
-            and row["brazilian_track"].lower() == pair["brazilian_track"].lower()
-            and row["original_artist"].lower() == pair["original_artist"].lower()
-            and row["original_track"].lower() == pair["original_track"].lower()
-        ):
+        if pair_key(row) == key:
             return row
     return None
 
@@ -111,80 +148,208 @@ def validate_track_pair(pair: TrackPair) -> list[str]:
     return errors
 
 
-def append_track_pair(csv_path: Path, pair: TrackPair) -> TrackPair:
-    """Append a track pair to CSV. Raises DuplicateTrackPairError if exists."""
+def append_track_pair(
+    csv_path: Path,
+    pair: TrackPair,
+    on_append: Callable[[TrackPair], None] | None = None,
+) -> TrackPair:
+    """Append a track pair to CSV. Raises DuplicateTrackPairError if exists.
+
+    The same pair in another genre CSV of the directory is only logged, through
+    the global index (see global_index.find_pair_in_other_genres).
+    on_append is called with the written row once the lock is released. It
+    defaults to resolver.resolve_in_background when settings.RESOLVE_ON_APPEND
+    is set, so the row is searched before the next build.
+    """
     ensure_csv_exists(csv_path)
 
-    existing = read_track_pairs(csv_path)
-    duplicate = find_duplicate(existing, pair)
-
-    if duplicate is not None:
-        artist = pair["brazilian_artist"]
-        track = pair["brazilian_track"]
-        raise DuplicateTrackPairError(f"Track pair already exists: {artist} - {track}")
-
-    added_at = datetime.now(UTC).isoformat()
-    row = TrackPair(
-        brazilian_artist=pair["brazilian_artist"],
-        brazilian_track=pair["brazilian_track"],
-        original_artist=pair["original_artist"],
-        original_track=pair["original_track"],
-        added_at=added_at,
-        source=pair["source"],
-        brazilian_has_spotify=pair["brazilian_has_spotify"],
-        original_has_spotify=pair["original_has_spotify"],
-        in_playlist=False,
-    )
-
-    with csv_path.open("a", newline="", encoding="utf-8") as f:
-        writer = csv.writer(f)
-        writer.writerow(
-            [
-                row["brazilian_artist"],
-                row["brazilian_track"],
-                row["original_artist"],
-                row["original_track"],
-                row["added_at"] or "",
-                row["source"] or "",
-                _bool_to_csv(row["brazilian_has_spotify"]),
-                _bool_to_csv(row["original_has_spotify"]),
-                _bool_to_csv(row["in_playlist"]),
-            ]
+    # Checked before locking csv_path, since it takes the other files' locks
+    for entry in find_pair_in_other_genres(csv_path, pair):
+        logger.warning(
+            f"Pair already in {entry['genre']} ({entry['csv_path']}, "
+            f"row {entry['row']}): {pair['brazilian_artist']} - "
+            f"{pair['brazilian_track']}"
         )
 
-    return row
+    with dataset_lock(csv_path, exclusive=True):
+        existing = read_track_pairs(csv_path)
 
+        if pair_key(pair) in build_duplicate_index(existing):
+            artist = pair["brazilian_artist"]
+            track = pair["brazilian_track"]
+            raise DuplicateTrackPairError(
+                f"Track pair already exists: {artist} - {track}"
+            )
 
-def write_track_pairs(csv_path: Path, pairs: list[TrackPair]) -> None:
-    """Write all track pairs to CSV, overwriting existing content."""
-    csv_path.parent.mkdir(parents=True, exist_ok=True)
+        added_at = datetime.now(UTC).isoformat()
+        row = TrackPair(
+            brazilian_artist=pair["brazilian_artist"],
+            brazilian_track=pair["brazilian_track"],
+            original_artist=pair["original_artist"],
+            original_track=pair["original_track"],
+            added_at=added_at,
+            source=pair["source"],
+            brazilian_has_spotify=pair["brazilian_has_spotify"],
+            original_has_spotify=pair["original_has_spotify"],
+            in_playlist=False,
+        )
+
+        with csv_path.open("a", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(_track_pair_to_row(row))
 
-    with csv_path.open("w", newline="", encoding="utf-8") as f:
+    if on_append is None and settings.RESOLVE_ON_APPEND:
+        on_append = resolve_in_background
+    if on_append is not None:
+        on_append(row)
+    return row
+
+
+def append_track_pairs(
+    csv_path: Path, pairs: Sequence[TrackPair], pad_status: bool = False
+) -> None:
+    """Append already validated and deduplicated pairs in a single write."""
+    ensure_csv_exists(csv_path)
+    with (
+        dataset_lock(csv_path, exclusive=True),
+        csv_path.open("a", newline="", encoding="utf-8") as f,
+    ):
         writer = csv.writer(f)
-        writer.writerow(TRACK_PAIRS_HEADERS)
-
-        for pair in pairs:
-            writer.writerow(
-                [
-                    pair["brazilian_artist"],
-                    pair["brazilian_track"],
-                    pair["original_artist"],
-                    pair["original_track"],
-                    pair["added_at"] or "",
-                    pair["source"] or "",
-                    _bool_to_csv(pair["brazilian_has_spotify"]),
-                    _bool_to_csv(pair["original_has_spotify"]),
-                    _bool_to_csv(pair["in_playlist"]),
-                ]
-            )
+        writer.writerows(_track_pair_to_row(pair, pad_status) for pair in pairs)
+
+
+def write_track_pairs(
+    csv_path: Path,
+    pairs: list[TrackPair],
+    pad_status: bool = False,
+    expected_version: int | None = None,
+) -> None:
+    """Write all track pairs to CSV, atomically replacing existing content.
+
+    pad_status writes fixed-width status cells, see update_track_pair(in_place=True).
+    With expected_version (see read_track_pairs_versioned) StaleDatasetError is
+    raised instead of overwriting rows another writer modified since.
+    """
+    with dataset_lock(csv_path, exclusive=True):
+        check_dataset_version(csv_path, expected_version)
+        forget_row_offsets(csv_path)
+        with atomic_csv_writer(csv_path) as f:
+            writer = csv.writer(f)
+            writer.writerow(TRACK_PAIRS_HEADERS)
+            writer.writerows(_track_pair_to_row(pair, pad_status) for pair in pairs)
+        bump_dataset_version(csv_path)
+        record_rewrite(csv_path, pairs)
+
+
+def patch_track_pair_status(csv_path: Path, index: int, pair: TrackPair) -> bool:
+    """Overwrite the status cells of one row in place through mmap.
+
+    Returns False (file untouched) when the patch is not possible: the row's
+    other fields differ from pair, or a new cell is longer than the old one.
+    """
+    with dataset_lock(csv_path, exclusive=True):
+        before = csv_identity(csv_path)
+        if not _patch_status_cells(csv_path, index, pair):
+            return False
+        bump_dataset_version(csv_path)
+        record_status_patch(csv_path, index, pair, before)
+    return True
+
+
+def _patch_status_cells(csv_path: Path, index: int, pair: TrackPair) -> bool:
+    offsets = cached_row_offsets(csv_path)
+    if index < 0 or index >= len(offsets) - 1:
+        raise IndexError(
+            f"Track pair index {index} out of range (0-{len(offsets) - 2})"
+        )
+    start, end = offsets[index], offsets[index + 1]
+
+    with csv_path.open("r+b") as f, mmap.mmap(f.fileno(), 0) as mm:
+        row = mm[start:end].rstrip(b"\r\n")
+        # Status cells never contain commas or quotes, so the last commas split them
+        parts = row.rsplit(b",", STATUS_COLUMNS_COUNT)
+        if len(parts) != STATUS_COLUMNS_COUNT + 1:
+            return False
+        prefix, old_cells = parts[0], parts[1:]
+
+        fields = next(csv.reader([prefix.decode("utf-8")]), [])
+        expected = [
+            pair["brazilian_artist"],
+            pair["brazilian_track"],
+            pair["original_artist"],
+            pair["original_track"],
+            pair["added_at"] or "",
+            pair["source"] or "",
+        ]
+        if fields != expected:
+            return False
+
+        new_values = [
+            pair["brazilian_has_spotify"],
+            pair["original_has_spotify"],
+            pair["in_playlist"],
+        ]
+        new_cells = []
+        for old, value in zip(old_cells, new_values, strict=True):
+            new = _bool_to_csv(value).encode()
+            if len(new) > len(old):
+                return False
+            new_cells.append(new.ljust(len(old)))
+
+        cells_start = start + len(prefix) + 1
+        mm[cells_start : cells_start + len(row) - len(prefix) - 1] = b",".join(
+            new_cells
+        )
+        mm.flush()
 
+    keep_row_offsets(csv_path, offsets)
+    return True
 
-def update_track_pair(csv_path: Path, index: int, pair: TrackPair) -> None:
-    """Update a track pair at specific index (reads all, updates one, rewrites)."""
-    pairs = read_track_pairs(csv_path)
 
-    if index < 0 or index >= len(pairs):
-        raise IndexError(f"Track pair index {index} out of range (0-{len(pairs) - 1})")
+def update_track_pair(
+    csv_path: Path, index: int, pair: TrackPair, in_place: bool = False
+) -> None:
+    """Update a track pair at specific index (reads all, updates one, rewrites).
+
+    With in_place=True only the status cells are patched through mmap when the
+    row length allows it; otherwise the file is rewritten with fixed-width
+    status cells so later updates to the row can be patched in place.
+    """
+    with dataset_lock(csv_path, exclusive=True):
+        if in_place and patch_track_pair_status(csv_path, index, pair):
+            return
+
+        pairs = read_track_pairs(csv_path)
+
+        if index < 0 or index >= len(pairs):
+            raise IndexError(
+                f"Track pair index {index} out of range (0-{len(pairs) - 1})"
+            )
 
-    pairs[index] = pair
-    write_track_pairs(csv_path, pairs)
+        pairs[index] = pair
+        write_track_pairs(csv_path, pairs, pad_status=in_place)
+
+
+def update_track_pairs(
+    csv_path: Path,
+    updates: dict[int, TrackPair],
+    pad_status: bool = True,
+    expected_version: int | None = None,
+) -> None:
+    """Apply several row updates with a single rewrite.
+
+    Rows are re-read under the exclusive lock, so pairs appended by other
+    writers are kept. See write_track_pairs for expected_version.
+    """
+    if not updates:
+        return
+    with dataset_lock(csv_path, exclusive=True):
+        check_dataset_version(csv_path, expected_version)
+        pairs = read_track_pairs(csv_path)
+        for index, pair in updates.items():
+            if index < 0 or index >= len(pairs):
+                raise IndexError(
+                    f"Track pair index {index} out of range (0-{len(pairs) - 1})"
+                )
+            pairs[index] = pair
+        write_track_pairs(csv_path, pairs, pad_status=pad_status)
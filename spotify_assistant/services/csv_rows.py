@@ -0,0 +1,347 @@
+import csv
+import io
+import multiprocessing
+import os
+import re
+from collections.abc import Iterator
+from collections.abc import Sequence
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from typing import BinaryIO
+from typing import TextIO
+
+import numpy as np
+import numpy.typing as npt
+
+from spotify_assistant.exceptions import CSVFormatError
+from spotify_assistant.models.tracks import TrackPair
+from spotify_assistant.services.dataset_lock import dataset_lock
+
+TRACK_PAIRS_HEADERS = [
+    "brazilian_artist",
+    "brazilian_track",
+    "original_artist",
+    "original_track",
+    "added_at",
+    "source",
+    "brazilian_has_spotify",
+    "original_has_spotify",
+    "in_playlist",
+]
+
+PARALLEL_PARSE_CHUNKS_PER_WORKER = 4  # smaller chunks even out the workers' load
+
+_STATUS_CELL = rb"(?:True *|False| *)"
+# End of a record: its three status cells and the newline
+_RECORD_END = re.compile(rb"," + rb",".join([_STATUS_CELL] * 3) + rb"\r?\n")
+_RECORD_END_MAX_LENGTH = 3 * len(",False") + len("\r\n")
+_SCAN_BLOCK_SIZE = 64 * 1024  # bytes read at a time looking for a record end
+
+# csv_path -> ((inode, mtime_ns, size), row start offsets + end of the last row)
+_row_offsets_cache: dict[Path, tuple[tuple[int, int, int], list[int]]] = {}
+
+
+def _parse_bool(value: str | None) -> bool | None:
+    """Parse CSV string to bool. Empty (or padding-only) string or None returns None."""
+    if value is None:
+        return None
+    value = value.strip()
+    if value == "":
+        return None
+    return value.lower() in ["true", "t", "1"]
+
+
+def _str_or_none(value: str) -> str | None:
+    """Convert empty string to None."""
+    return value if value else None
+
+
+@contextmanager
+def atomic_csv_writer(csv_path: Path) -> Iterator[TextIO]:
+    """Write to a temp file next to csv_path and rename it over csv_path.
+
+    Readers see either the old or the new file, never a partial one. Callers
+    hold the exclusive dataset lock.
+    """
+    csv_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = csv_path.with_name(f".{csv_path.name}.{os.getpid()}.tmp")
+    try:
+        with tmp_path.open("w", newline="", encoding="utf-8") as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        tmp_path.replace(csv_path)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+
+
+def ensure_csv_exists(csv_path: Path) -> None:
+    """Ensure CSV file exists with proper headers. Creates it if missing."""
+    if csv_path.exists():
+        return
+    with dataset_lock(csv_path, exclusive=True):
+        if not csv_path.exists():
+            with atomic_csv_writer(csv_path) as f:
+                csv.writer(f).writerow(TRACK_PAIRS_HEADERS)
+
+
+def _validate_headers(fieldnames: Sequence[str]) -> None:
+    if list(fieldnames) != TRACK_PAIRS_HEADERS:
+        actual = list(fieldnames)
+        raise CSVFormatError(
+            f"Invalid CSV headers. Expected {TRACK_PAIRS_HEADERS}, got {actual}"
+        )
+
+
+def _row_to_track_pair(row: dict[str, str]) -> TrackPair:
+    return TrackPair(
+        brazilian_artist=row["brazilian_artist"],
+        brazilian_track=row["brazilian_track"],
+        original_artist=row["original_artist"],
+        original_track=row["original_track"],
+        added_at=_str_or_none(row["added_at"]),
+        source=_str_or_none(row["source"]),
+        brazilian_has_spotify=_parse_bool(row["brazilian_has_spotify"]),
+        original_has_spotify=_parse_bool(row["original_has_spotify"]),
+        in_playlist=_parse_bool(row["in_playlist"]) or False,
+    )
+
+
+def _iter_lines(f: BinaryIO, end: int) -> Iterator[str]:
+    """Decoded lines of f up to byte offset end."""
+    remaining = end - f.tell()
+    while remaining > 0:
+        line = f.readline(remaining)
+        if not line:
+            return
+        remaining -= len(line)
+        yield line.decode("utf-8")
+
+
+def iter_track_pairs(csv_path: Path) -> Iterator[TrackPair]:
+    """Stream track pairs from CSV file, one row at a time.
+
+    The file is opened and sized under the shared lock, then streamed without
+    holding it: rewrites replace the file (this handle keeps the old one) and
+    rows appended meanwhile are left out, so no partial row is ever read.
+    """
+    ensure_csv_exists(csv_path)
+
+    with dataset_lock(csv_path):
+        f = csv_path.open("rb")
+        end = os.fstat(f.fileno()).st_size
+    with f:
+        reader = csv.DictReader(_iter_lines(f, end))
+
+        if reader.fieldnames is None:
+            return
+
+        _validate_headers(reader.fieldnames)
+        for row in reader:
+            yield _row_to_track_pair(row)
+
+
+def _parse_rows(data: bytes) -> list[TrackPair]:
+    """Parse whole data rows (no header) of a file with validated headers."""
+    reader = csv.DictReader(
+        io.StringIO(data.decode("utf-8"), newline=""), fieldnames=TRACK_PAIRS_HEADERS
+    )
+    return [_row_to_track_pair(row) for row in reader]
+
+
+def _read_header(f: BinaryIO) -> list[str] | None:
+    """Validated header of an open CSV, None if the file is empty."""
+    header = f.readline().decode("utf-8")
+    if not header:
+        return None
+    fieldnames = next(csv.reader([header]), [])
+    _validate_headers(fieldnames)
+    return fieldnames
+
+
+def read_track_pairs_range(csv_path: Path, start: int, end: int) -> list[TrackPair]:
+    """Read the rows stored between two row-boundary byte offsets.
+
+    Offsets come from build_row_offsets; only the header and the range are read.
+    """
+    with dataset_lock(csv_path), csv_path.open("rb") as f:
+        _read_header(f)
+        f.seek(start)
+        data = f.read(end - start)
+    return _parse_rows(data)
+
+
+def read_track_pairs_at(
+    f: BinaryIO,
+    indices: Sequence[int],
+    offsets: Sequence[int] | npt.NDArray[np.uint64],
+) -> list[TrackPair]:
+    """Read only the given rows of an open CSV, located with its row offsets
+    (see build_row_offsets).
+
+    Offsets must describe the file behind f, e.g. from the status index.
+    """
+    chunks = []
+    for index in indices:
+        start, end = int(offsets[index]), int(offsets[index + 1])
+        f.seek(start)
+        chunks.append(f.read(end - start))
+    return _parse_rows(b"".join(chunks))
+
+
+def _parse_file_range(csv_path: Path, start: int, end: int) -> list[TrackPair]:
+    with csv_path.open("rb") as f:
+        f.seek(start)
+        return _parse_rows(f.read(end - start))
+
+
+def _parse_chunk(csv_path: Path, start: int, end: int) -> list[TrackPair] | None:
+    """Process pool task: parse a chunk, None if it is not whole records.
+
+    The caller holds the dataset lock for the workers.
+    """
+    with csv_path.open("rb") as f:
+        f.seek(start)
+        data = f.read(end - start)
+    reader = csv.reader(io.StringIO(data.decode("utf-8"), newline=""))
+    try:
+        # Blank lines are skipped, like csv.DictReader does
+        rows = [row for row in reader if row]
+    except csv.Error:
+        return None
+    if any(len(row) != len(TRACK_PAIRS_HEADERS) for row in rows):
+        return None  # cut inside a quoted field
+    return [
+        _row_to_track_pair(dict(zip(TRACK_PAIRS_HEADERS, row, strict=True)))
+        for row in rows
+    ]
+
+
+def _next_record_start(f: BinaryIO, pos: int, end: int) -> int:
+    """Offset of the first likely record start after pos, end if none.
+
+    Records end with their three status cells, which never hold quotes: a
+    newline right after them is taken as a record end. Text in a quoted field
+    can fake that, so chunks cut this way are checked (see _parse_chunk).
+    """
+    f.seek(pos)
+    carry = b""
+    while pos < end:
+        block = f.read(min(_SCAN_BLOCK_SIZE, end - pos))
+        if not block:
+            break
+        data = carry + block
+        match = _RECORD_END.search(data)
+        if match is not None:
+            return pos - len(carry) + match.end()
+        pos += len(block)
+        carry = data[-_RECORD_END_MAX_LENGTH:]
+    return end
+
+
+def read_track_pairs_parallel(
+    csv_path: Path, workers: int | None = None
+) -> list[TrackPair]:
+    """Read all track pairs, parsing chunks of rows in a process pool.
+
+    Chunk boundaries are found by seeking near each split point and scanning
+    to the next record end, so the parent reads a few blocks instead of the
+    whole file. A chunk that does not parse into whole records (a quoted
+    field faked a record end) makes the file parse serially. Rows are
+    returned in file order. The shared lock is held until every chunk is
+    parsed.
+    """
+    ensure_csv_exists(csv_path)
+    workers = workers or os.cpu_count() or 1
+
+    with dataset_lock(csv_path), csv_path.open("rb") as f:
+        if _read_header(f) is None:
+            return []
+        start, end = f.tell(), os.fstat(f.fileno()).st_size
+        if workers == 1:
+            return _parse_file_range(csv_path, start, end)
+        chunks = workers * PARALLEL_PARSE_CHUNKS_PER_WORKER
+
+        splits = [
+            _next_record_start(f, start + (end - start) * i // chunks, end)
+            for i in range(1, chunks)
+        ]
+        bounds = sorted({start, *splits, end})
+        # spawn: forking would copy the locks held by this process's threads
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+            parsed = list(
+                pool.map(
+                    _parse_chunk,
+                    [csv_path] * (len(bounds) - 1),
+                    bounds[:-1],
+                    bounds[1:],
+                )
+            )
+        if any(chunk is None for chunk in parsed):
+            return _parse_file_range(csv_path, start, end)
+        return [pair for chunk in parsed if chunk is not None for pair in chunk]
+
+
+def _scan_row_ends(data: bytes, pos: int) -> list[int]:
+    """Offsets right after each record that starts at or after pos.
+
+    A newline ends a record when the number of quotes before it (from pos) is
+    even; escaped quotes ("") come in pairs and keep the parity. Trailing
+    bytes without a newline are left out: they may be a row still being
+    appended.
+    """
+    view = np.frombuffer(data, np.uint8)[pos:]
+    newlines = np.flatnonzero(view == ord("\n"))
+    quotes = np.flatnonzero(view == ord('"'))
+    outside_quotes = np.searchsorted(quotes, newlines) % 2 == 0
+    ends: list[int] = (newlines[outside_quotes] + pos + 1).tolist()
+    return ends
+
+
+def build_row_offsets(csv_path: Path, start: int | None = None) -> list[int]:
+    """Byte offset where each data row starts, plus the end of the last
+    complete row (the end of file unless a row is still being appended).
+
+    Row i spans offsets[i]:offsets[i + 1]. Newlines inside quoted fields do not
+    end a record: a line only closes one when the quote count so far is even.
+    With `start` (a known row boundary) only the rows from there on are scanned
+    and the result begins with start.
+    """
+    with dataset_lock(csv_path), csv_path.open("rb") as f:
+        if start is not None:
+            f.seek(start)
+            return [start + end for end in [0, *_scan_row_ends(f.read(), 0)]]
+        data = f.read()
+
+    header_end = data.find(b"\n")
+    if header_end == -1:
+        return [len(data)]
+    return [header_end + 1, *_scan_row_ends(data, header_end + 1)]
+
+
+def _file_identity(csv_path: Path) -> tuple[int, int, int]:
+    stat = csv_path.stat()
+    # The inode changes with every atomic replace, even within one mtime tick
+    return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+
+def cached_row_offsets(csv_path: Path) -> list[int]:
+    """Row offsets for csv_path, rebuilt only when the file changed."""
+    identity = _file_identity(csv_path)
+    cached = _row_offsets_cache.get(csv_path)
+    if cached is not None and cached[0] == identity:
+        return cached[1]
+    offsets = build_row_offsets(csv_path)
+    _row_offsets_cache[csv_path] = (identity, offsets)
+    return offsets
+
+
+def keep_row_offsets(csv_path: Path, offsets: list[int]) -> None:
+    """Cache offsets still valid after an in-place edit of the file."""
+    _row_offsets_cache[csv_path] = (_file_identity(csv_path), offsets)
+
+
+def forget_row_offsets(csv_path: Path) -> None:
+    _row_offsets_cache.pop(csv_path, None)
@@ -0,0 +1,90 @@
+import fcntl
+import os
+import threading
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+
+from spotify_assistant.exceptions import StaleDatasetError
+
+# Per thread: lock file path -> (exclusive, fd) of the locks currently held
+_held = threading.local()
+
+
+def _held_locks() -> dict[Path, tuple[bool, int]]:
+    if not hasattr(_held, "locks"):
+        _held.locks = {}
+    locks: dict[Path, tuple[bool, int]] = _held.locks
+    return locks
+
+
+def lock_path(csv_path: Path) -> Path:
+    """Sidecar lock file; it survives the atomic replaces of the CSV itself."""
+    return csv_path.with_name(f"{csv_path.name}.lock")
+
+
+@contextmanager
+def dataset_lock(csv_path: Path, exclusive: bool = False) -> Iterator[None]:
+    """Advisory fcntl lock: shared for readers, exclusive for writers.
+
+    Works across processes and threads. Re-entrant within a thread: nested
+    calls under an exclusive lock are free, but a shared lock cannot be
+    upgraded (that would deadlock against another shared holder).
+    """
+    path = lock_path(csv_path)
+    held = _held_locks()
+    if path in held:
+        if exclusive and not held[path][0]:
+            raise RuntimeError(f"Cannot upgrade shared lock on {csv_path}")
+        yield
+        return
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        held[path] = (exclusive, fd)
+        try:
+            yield
+        finally:
+            del held[path]
+    finally:
+        os.close(fd)  # also releases the flock
+
+
+def _read_version(fd: int) -> int:
+    data = os.pread(fd, 32, 0).strip()
+    return int(data) if data else 0
+
+
+def get_dataset_version(csv_path: Path) -> int:
+    """Counter bumped whenever existing rows are modified.
+
+    Full rewrites and status patches bump it; appends do not, since they never
+    move or alter rows a reader already has.
+    """
+    with dataset_lock(csv_path):
+        return _read_version(_held_locks()[lock_path(csv_path)][1])
+
+
+def check_dataset_version(csv_path: Path, expected: int | None) -> None:
+    """Raise StaleDatasetError if rows changed since `expected` was read."""
+    if expected is None:
+        return
+    current = get_dataset_version(csv_path)
+    if current != expected:
+        raise StaleDatasetError(
+            f"{csv_path} was modified by another writer "
+            f"(version {expected} -> {current})"
+        )
+
+
+def bump_dataset_version(csv_path: Path) -> int:
+    """Record a modification of existing rows. Requires the exclusive lock."""
+    exclusive, fd = _held_locks().get(lock_path(csv_path), (False, -1))
+    if not exclusive:
+        raise RuntimeError(f"Exclusive lock on {csv_path} required")
+    version = _read_version(fd) + 1
+    os.ftruncate(fd, 0)
+    os.pwrite(fd, str(version).encode(), 0)
+    return version
@@ -0,0 +1,178 @@
+import threading
+from collections.abc import Iterable
+from datetime import UTC
+from datetime import datetime
+from pathlib import Path
+from typing import TypedDict
+
+import pandas as pd
+from loguru import logger
+
+from spotify_assistant.clients.search_cache import get_cached_track_id
+from spotify_assistant.clients.search_cache import preload_search_cache
+from spotify_assistant.clients.spotify import get_track_metadata
+from spotify_assistant.normalization import pair_track_keys
+from spotify_assistant.services.csv_manager import read_track_pairs
+from spotify_assistant.services.global_index import genre_of
+from spotify_assistant.settings import settings
+
+# Compact column types: the store holds one row per resolved track
+ENRICHMENT_DTYPES = {
+    "id": "string",
+    "isrc": "string",
+    "duration_ms": "Int32",
+    "popularity": "Int8",
+    "release_date": "string",
+    "album_image_url": "string",
+    "fetched_at": "string",
+}
+
+_lock = threading.Lock()
+
+
+class GenreStats(TypedDict):
+    genre: str
+    pairs: int
+    playlist_tracks: int  # resolved tracks of the pairs in the playlist
+    enriched_tracks: int  # playlist tracks with metadata in the store
+    duration_ms: int  # total of the enriched playlist tracks
+    mean_popularity: float | None
+    first_release: str | None  # earliest album release date
+    last_release: str | None
+
+
+def load_enrichment() -> pd.DataFrame:
+    """The enrichment store indexed by track ID, empty if never enriched."""
+    path = settings.enrichment_path
+    if path.exists():
+        df = pd.read_parquet(path)
+    else:
+        df = pd.DataFrame(columns=list(ENRICHMENT_DTYPES))
+    return df.astype(ENRICHMENT_DTYPES).set_index("id")
+
+
+def _save_enrichment(df: pd.DataFrame) -> None:
+    path = settings.enrichment_path
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".parquet.tmp")
+    df.reset_index().to_parquet(tmp_path, index=False, compression="zstd")
+    tmp_path.replace(path)
+
+
+def enrich_tracks(track_ids: Iterable[str], refresh: bool = False) -> int:
+    """Fetch metadata of the tracks not in the store yet (all with refresh).
+
+    Tracks are requested 50 per call. Returns the number of tracks stored.
+    """
+    with _lock:
+        store = load_enrichment()
+        wanted = list(dict.fromkeys(track_ids))
+        missing = wanted if refresh else [i for i in wanted if i not in store.index]
+        if not missing:
+            return 0
+
+        fetched_at = datetime.now(UTC).isoformat()
+        rows = []
+        for track_id, metadata in zip(
+            missing, get_track_metadata(missing), strict=True
+        ):
+            if metadata is None:
+                logger.warning(f"Track {track_id} no longer exists on Spotify")
+                continue
+            # Keyed by the requested ID, the one the search cache resolves to
+            rows.append({**metadata, "id": track_id, "fetched_at": fetched_at})
+        fetched = (
+            pd.DataFrame(rows, columns=list(ENRICHMENT_DTYPES))
+            .astype(ENRICHMENT_DTYPES)
+            .set_index("id")
+        )
+        store = pd.concat([store.drop(fetched.index, errors="ignore"), fetched])
+        _save_enrichment(store)
+    logger.info(f"Enriched {len(fetched)} tracks ({len(store)} in store)")
+    return len(fetched)
+
+
+def resolved_pairs(csv_path: Path) -> pd.DataFrame:
+    """Pairs of a CSV with the track IDs the search cache resolved them to.
+
+    Columns: in_playlist, brazilian_id, original_id (NA when unresolved).
+    No API calls.
+    """
+    pairs = read_track_pairs(csv_path)
+    preload_search_cache(key for pair in pairs for key in pair_track_keys(pair))
+    rows = []
+    for pair in pairs:
+        brazilian_key, original_key = pair_track_keys(pair)
+        rows.append(
+            (
+                pair["in_playlist"],
+                get_cached_track_id(brazilian_key),
+                get_cached_track_id(original_key),
+            )
+        )
+    return pd.DataFrame(
+        rows, columns=["in_playlist", "brazilian_id", "original_id"]
+    ).astype({"in_playlist": "bool", "brazilian_id": "string", "original_id": "string"})
+
+
+def _track_ids(pairs: pd.DataFrame) -> pd.Series:
+    return pd.concat([pairs["brazilian_id"], pairs["original_id"]]).dropna()
+
+
+def enrich_csv(csv_path: Path, refresh: bool = False) -> int:
+    """Enrich every resolved track of a CSV. Returns the number fetched."""
+    return enrich_tracks(_track_ids(resolved_pairs(csv_path)), refresh=refresh)
+
+
+def genre_stats(csv_path: Path, store: pd.DataFrame | None = None) -> GenreStats:
+    """Playlist figures of one genre, computed offline from the local stores."""
+    store = load_enrichment() if store is None else store
+    pairs = resolved_pairs(csv_path)
+    playlist_ids = _track_ids(pairs[pairs["in_playlist"]])
+    metadata = store.reindex(playlist_ids)
+    enriched = metadata[metadata["duration_ms"].notna()]
+    popularity = enriched["popularity"].mean()
+    release_dates = enriched["release_date"].dropna()
+    return GenreStats(
+        genre=genre_of(csv_path),
+        pairs=len(pairs),
+        playlist_tracks=len(playlist_ids),
+        enriched_tracks=len(enriched),
+        duration_ms=int(enriched["duration_ms"].sum()),
+        mean_popularity=None if pd.isna(popularity) else float(popularity),
+        first_release=release_dates.min() if len(release_dates) else None,
+        last_release=release_dates.max() if len(release_dates) else None,
+    )
+
+
+def all_genre_stats(data_dir: Path | None = None) -> list[GenreStats]:
+    """genre_stats of every CSV in data_dir (default DATA_DIR)."""
+    data_dir = data_dir or settings.DATA_DIR
+    store = load_enrichment()
+    return [genre_stats(path, store) for path in sorted(data_dir.glob("*.csv"))]
+
+
+def format_duration(duration_ms: int) -> str:
+    """Rounded duration as shown in the README: "~9 hours", "~45 min"."""
+    minutes = round(duration_ms / 60_000)
+    if minutes < 60:
+        return f"~{minutes} min"
+    hours = round(minutes / 60)
+    return f"~{hours} hour" if hours == 1 else f"~{hours} hours"
+
+
+def format_stats_table(stats: list[GenreStats]) -> str:
+    """Markdown table of genre stats, ready to paste in the README."""
+    lines = [
+        "| Genre | Track Pairs | Playlist Tracks | Duration | Avg Popularity |",
+        "|-------|-------------|-----------------|----------|----------------|",
+    ]
+    for genre in stats:
+        popularity = genre["mean_popularity"]
+        lines.append(
+            f"| {genre['genre']} | {genre['pairs']} pairs"
+            f" | {genre['playlist_tracks']} tracks"
+            f" | {format_duration(genre['duration_ms'])}"
+            f" | {'-' if popularity is None else round(popularity)} |"
+        )
+    return "\n".join(lines)
@@ -0,0 +1,281 @@
+import sqlite3
+import threading
+from pathlib import Path
+
+from loguru import logger
+
+from spotify_assistant.clients.search_cache import get_cached_track_id
+from spotify_assistant.clients.search_cache import preload_search_cache
+from spotify_assistant.exceptions import CSVFormatError
+from spotify_assistant.models.tracks import GlobalIndexEntry
+from spotify_assistant.models.tracks import TrackPair
+from spotify_assistant.normalization import canonical_key
+from spotify_assistant.normalization import normalize_text
+from spotify_assistant.normalization import pair_key
+from spotify_assistant.normalization import pair_track_keys
+from spotify_assistant.normalization import primary_artist
+from spotify_assistant.services.csv_rows import build_row_offsets
+from spotify_assistant.services.csv_rows import read_track_pairs_range
+from spotify_assistant.services.dataset_lock import dataset_lock
+from spotify_assistant.services.dataset_lock import get_dataset_version
+from spotify_assistant.settings import settings
+
+GENRE_SUFFIX = "_pairs"
+_ENTRY_COLUMNS = (
+    "csv_path, genre, row, pair_key, brazilian_key, original_key,"
+    " original_artist, brazilian_id, original_id"
+)
+
+_SCHEMA_VERSION = 1
+
+_connection: sqlite3.Connection | None = None
+_connection_path: Path | None = None
+_lock = threading.Lock()
+
+
+def _get_connection() -> sqlite3.Connection:
+    """Get or open the index database at settings.global_index_path."""
+    global _connection, _connection_path
+    path = settings.global_index_path
+    if _connection is None or _connection_path != path:
+        if _connection is not None:
+            _connection.close()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        _connection = sqlite3.connect(path, check_same_thread=False)
+        if _connection.execute("PRAGMA user_version").fetchone()[0] < _SCHEMA_VERSION:
+            # Derived data only: older layouts are dropped and rebuilt
+            _connection.executescript(
+                "DROP TABLE IF EXISTS files; DROP TABLE IF EXISTS entries;"
+                f"PRAGMA user_version = {_SCHEMA_VERSION};"
+            )
+        _connection.executescript(
+            "CREATE TABLE IF NOT EXISTS files ("
+            " csv_path TEXT PRIMARY KEY,"
+            " inode INTEGER NOT NULL,"
+            " version INTEGER NOT NULL,"  # dataset version (see dataset_lock)
+            " size INTEGER NOT NULL,"  # bytes indexed, always a row boundary
+            " rows INTEGER NOT NULL"
+            ");"
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " csv_path TEXT NOT NULL,"
+            " genre TEXT NOT NULL,"
+            " row INTEGER NOT NULL,"
+            " pair_key TEXT NOT NULL,"
+            " brazilian_key TEXT NOT NULL,"
+            " original_key TEXT NOT NULL,"
+            " original_artist TEXT NOT NULL,"
+            " brazilian_id TEXT,"
+            " original_id TEXT,"
+            " PRIMARY KEY (csv_path, row)"
+            ");"
+            "CREATE INDEX IF NOT EXISTS entries_pair ON entries (pair_key);"
+            "CREATE INDEX IF NOT EXISTS entries_original ON entries (original_key);"
+            "CREATE INDEX IF NOT EXISTS entries_artist ON entries (original_artist);"
+            "CREATE INDEX IF NOT EXISTS entries_bid ON entries (brazilian_id);"
+            "CREATE INDEX IF NOT EXISTS entries_oid ON entries (original_id);"
+        )
+        _connection_path = path
+    return _connection
+
+
+def close_global_index() -> None:
+    global _connection, _connection_path
+    with _lock:
+        if _connection is not None:
+            _connection.close()
+        _connection = None
+        _connection_path = None
+
+
+def genre_of(csv_path: Path) -> str:
+    """Genre name of a pairs CSV: data/forro_pairs.csv -> "forro"."""
+    return csv_path.stem.removesuffix(GENRE_SUFFIX)
+
+
+def _entry_values(
+    csv_path: Path, row: int, pair: TrackPair
+) -> tuple[str, str, int, str, str, str, str, None, None]:
+    brazilian_key, original_key = pair_track_keys(pair)
+    return (
+        str(csv_path),
+        genre_of(csv_path),
+        row,
+        pair_key(pair),
+        brazilian_key,
+        original_key,
+        normalize_text(primary_artist(pair["original_artist"])),
+        None,
+        None,
+    )
+
+
+def _index_file(connection: sqlite3.Connection, csv_path: Path) -> bool:
+    """Bring one file's entries up to date. Returns True if anything changed.
+
+    Rewrites and status patches bump the dataset version; a file that only
+    grew on the same inode and version was appended to and is read from the
+    indexed size on. Anything else is re-indexed (inode numbers alone can be
+    reused by a later rewrite).
+    """
+    with dataset_lock(csv_path):
+        stat = csv_path.stat()
+        version = get_dataset_version(csv_path)
+        indexed = connection.execute(
+            "SELECT inode, version, size, rows FROM files WHERE csv_path = ?",
+            (str(csv_path),),
+        ).fetchone()
+        start, first_row = None, 0
+        if indexed is not None and indexed[:2] == (stat.st_ino, version):
+            if indexed[2] == stat.st_size:
+                return False
+            if indexed[2] < stat.st_size:
+                start, first_row = indexed[2], indexed[3]
+
+        if start is None:
+            connection.execute(
+                "DELETE FROM entries WHERE csv_path = ?", (str(csv_path),)
+            )
+        offsets = build_row_offsets(csv_path, start)
+        pairs = read_track_pairs_range(csv_path, offsets[0], offsets[-1])
+    connection.executemany(
+        f"INSERT OR REPLACE INTO entries ({_ENTRY_COLUMNS})"
+        " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        (
+            _entry_values(csv_path, row, pair)
+            for row, pair in enumerate(pairs, start=first_row)
+        ),
+    )
+    connection.execute(
+        "INSERT OR REPLACE INTO files (csv_path, inode, version, size, rows)"
+        " VALUES (?, ?, ?, ?, ?)",
+        (str(csv_path), stat.st_ino, version, offsets[-1], first_row + len(pairs)),
+    )
+    return True
+
+
+def _resolve_spotify_ids(connection: sqlite3.Connection) -> int:
+    """Fill missing Spotify IDs from the search cache (no API calls)."""
+    unresolved = connection.execute(
+        "SELECT rowid, brazilian_key, original_key, brazilian_id, original_id"
+        " FROM entries WHERE brazilian_id IS NULL OR original_id IS NULL"
+    ).fetchall()
+    preload_search_cache(key for row in unresolved for key in row[1:3])
+    updates = []
+    for rowid, brazilian_key, original_key, brazilian_id, original_id in unresolved:
+        new_brazilian_id = brazilian_id or get_cached_track_id(brazilian_key)
+        new_original_id = original_id or get_cached_track_id(original_key)
+        if (new_brazilian_id, new_original_id) != (brazilian_id, original_id):
+            updates.append((new_brazilian_id, new_original_id, rowid))
+    connection.executemany(
+        "UPDATE entries SET brazilian_id = ?, original_id = ? WHERE rowid = ?",
+        updates,
+    )
+    return len(updates)
+
+
+def update_global_index(data_dir: Path | None = None, resolve_ids: bool = True) -> int:
+    """Index every CSV in data_dir (default DATA_DIR) incrementally.
+
+    Only appended rows are read for files that merely grew. With resolve_ids,
+    Spotify IDs already in the search cache are filled in. Returns the number
+    of files whose entries changed.
+    """
+    data_dir = data_dir or settings.DATA_DIR
+    changed = 0
+    with _lock:
+        connection = _get_connection()
+        with connection:
+            indexed_paths = [
+                Path(path)
+                for (path,) in connection.execute("SELECT csv_path FROM files")
+            ]
+            for gone in indexed_paths:
+                if gone.parent == data_dir and not gone.exists():
+                    connection.execute(
+                        "DELETE FROM entries WHERE csv_path = ?", (str(gone),)
+                    )
+                    connection.execute(
+                        "DELETE FROM files WHERE csv_path = ?", (str(gone),)
+                    )
+                    changed += 1
+            for csv_path in sorted(data_dir.glob("*.csv")):
+                try:
+                    changed += _index_file(connection, csv_path)
+                except CSVFormatError as error:
+                    logger.warning(f"Skipping {csv_path} in global index: {error}")
+            if resolve_ids:
+                _resolve_spotify_ids(connection)
+    return changed
+
+
+def _query(where: str, *params: str | int) -> list[GlobalIndexEntry]:
+    with _lock:
+        rows = (
+            _get_connection()
+            .execute(
+                f"SELECT {_ENTRY_COLUMNS} FROM entries WHERE {where}"
+                " ORDER BY genre, row",
+                params,
+            )
+            .fetchall()
+        )
+    return [
+        GlobalIndexEntry(
+            csv_path=row[0],
+            genre=row[1],
+            row=row[2],
+            pair_key=row[3],
+            brazilian_key=row[4],
+            original_key=row[5],
+            original_artist=row[6],
+            brazilian_id=row[7],
+            original_id=row[8],
+        )
+        for row in rows
+    ]
+
+
+def find_pair(pair: TrackPair) -> list[GlobalIndexEntry]:
+    """Rows of any genre holding the same pair (canonical pair key)."""
+    return _query("pair_key = ?", pair_key(pair))
+
+
+def find_covers_of(original_track: str, original_artist: str) -> list[GlobalIndexEntry]:
+    """Covers of an original song across genres."""
+    return _query("original_key = ?", canonical_key(original_track, original_artist))
+
+
+def find_by_original_artist(artist: str) -> list[GlobalIndexEntry]:
+    """Covers of any song of an artist (primary artist) across genres."""
+    return _query("original_artist = ?", normalize_text(primary_artist(artist)))
+
+
+def find_by_spotify_id(track_id: str) -> list[GlobalIndexEntry]:
+    """Rows whose cover or original resolved to this Spotify track ID."""
+    return _query("brazilian_id = ? OR original_id = ?", track_id, track_id)
+
+
+def originals_covered_across_genres(
+    min_genres: int = 2,
+) -> dict[str, list[GlobalIndexEntry]]:
+    """Originals covered in at least min_genres genres, by canonical key."""
+    entries = _query(
+        "original_key IN (SELECT original_key FROM entries"
+        " GROUP BY original_key HAVING COUNT(DISTINCT genre) >= ?)",
+        min_genres,
+    )
+    covered: dict[str, list[GlobalIndexEntry]] = {}
+    for entry in entries:
+        covered.setdefault(entry["original_key"], []).append(entry)
+    return covered
+
+
+def find_pair_in_other_genres(
+    csv_path: Path, pair: TrackPair
+) -> list[GlobalIndexEntry]:
+    """Same pair in the other CSVs next to csv_path, after an incremental update.
+
+    Spotify IDs are not resolved here, this runs on every append.
+    """
+    update_global_index(csv_path.parent, resolve_ids=False)
+    return [entry for entry in find_pair(pair) if entry["csv_path"] != str(csv_path)]
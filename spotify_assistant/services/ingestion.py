@@ -0,0 +1,179 @@
+import threading
+from collections.abc import Iterable
+from dataclasses import dataclass
+from dataclasses import field
+from datetime import UTC
+from datetime import datetime
+from pathlib import Path
+
+from loguru import logger
+
+from spotify_assistant.exceptions import DuplicateTrackPairError
+from spotify_assistant.exceptions import InvalidTrackPairError
+from spotify_assistant.models.ingestion import IngestionStats
+from spotify_assistant.models.ingestion import IngestResult
+from spotify_assistant.models.ingestion import TrackPairInput
+from spotify_assistant.models.tracks import TrackPair
+from spotify_assistant.normalization import pair_key
+from spotify_assistant.services.csv_manager import append_track_pairs
+from spotify_assistant.services.csv_manager import validate_track_pair
+from spotify_assistant.services.csv_rows import ensure_csv_exists
+from spotify_assistant.services.csv_rows import iter_track_pairs
+from spotify_assistant.services.resolver import BackgroundResolver
+from spotify_assistant.services.resolver import pending_resolutions
+from spotify_assistant.services.resolver import start_resolver
+from spotify_assistant.services.resolver import stop_resolver
+from spotify_assistant.services.resolver import submit_pair
+from spotify_assistant.settings import settings
+
+
+@dataclass
+class IngestionStore:
+    """In-memory owner of a track pairs CSV, see open_ingestion_store."""
+
+    csv_path: Path
+    keys: set[str]  # canonical pair keys on disk + pending
+    pending: list[TrackPair] = field(default_factory=list)
+    resolver: BackgroundResolver | None = None  # None when resolution is off
+    flushed_batches: int = 0
+    lock: threading.Lock = field(default_factory=threading.Lock)
+    write_lock: threading.Lock = field(default_factory=threading.Lock)
+    flush_requested: threading.Event = field(default_factory=threading.Event)
+    stop: threading.Event = field(default_factory=threading.Event)
+    threads: list[threading.Thread] = field(default_factory=list)
+
+
+def flush_ingestion_store(store: IngestionStore) -> int:
+    """Append the pending pairs to the CSV in one write. Returns how many."""
+    with store.write_lock:
+        with store.lock:
+            batch, store.pending = store.pending, []
+        if not batch:
+            return 0
+        try:
+            # Padded status cells let the build patch these rows in place
+            append_track_pairs(store.csv_path, batch, pad_status=True)
+        except OSError:
+            with store.lock:
+                store.pending[:0] = batch
+            raise
+        store.flushed_batches += 1
+    return len(batch)
+
+
+def _flush_loop(store: IngestionStore) -> None:
+    while not store.stop.is_set():
+        store.flush_requested.wait(settings.INGEST_FLUSH_INTERVAL)
+        store.flush_requested.clear()
+        try:
+            flush_ingestion_store(store)
+        except OSError as error:
+            logger.error(f"Cannot write to {store.csv_path}, will retry: {error}")
+
+
+def open_ingestion_store(csv_path: Path, resolve: bool | None = None) -> IngestionStore:
+    """Index the CSV once and start the write-behind (and resolver) threads.
+
+    The store must be the only writer of the file while it is open: the
+    duplicate index is not refreshed from disk.
+    """
+    ensure_csv_exists(csv_path)
+    store = IngestionStore(
+        csv_path=csv_path,
+        keys={pair_key(pair) for pair in iter_track_pairs(csv_path)},
+    )
+    store.threads.append(
+        threading.Thread(target=_flush_loop, args=(store,), daemon=True)
+    )
+    if settings.INGEST_RESOLVE_ON_ADD if resolve is None else resolve:
+        store.resolver = start_resolver()
+    for thread in store.threads:
+        thread.start()
+    logger.info(f"Ingestion store opened with {len(store.keys)} pairs")
+    return store
+
+
+def close_ingestion_store(store: IngestionStore) -> None:
+    """Stop the background threads and flush what is still pending.
+
+    Pairs still waiting for resolution are dropped, the build will search them.
+    """
+    store.stop.set()
+    store.flush_requested.set()
+    if store.resolver is not None:
+        stop_resolver(store.resolver)
+    for thread in store.threads:
+        thread.join()
+    flush_ingestion_store(store)
+
+
+def get_ingestion_stats(store: IngestionStore) -> IngestionStats:
+    with store.lock:
+        return IngestionStats(
+            rows=len(store.keys),
+            pending_writes=len(store.pending),
+            pending_resolutions=(
+                pending_resolutions(store.resolver) if store.resolver is not None else 0
+            ),
+            flushed_batches=store.flushed_batches,
+        )
+
+
+def ingest_track_pair(store: IngestionStore, pair: TrackPairInput) -> TrackPair:
+    """Validate and accept a pair; it is written by the next flush.
+
+    Raises InvalidTrackPairError or DuplicateTrackPairError (O(1) index lookup).
+    """
+    row = TrackPair(
+        brazilian_artist=pair["brazilian_artist"],
+        brazilian_track=pair["brazilian_track"],
+        original_artist=pair["original_artist"],
+        original_track=pair["original_track"],
+        added_at=datetime.now(UTC).isoformat(),
+        source=pair.get("source"),
+        brazilian_has_spotify=None,
+        original_has_spotify=None,
+        in_playlist=False,
+    )
+    errors = validate_track_pair(row)
+    if errors:
+        raise InvalidTrackPairError("; ".join(errors))
+
+    key = pair_key(row)
+    with store.lock:
+        if key in store.keys:
+            artist = row["brazilian_artist"]
+            track = row["brazilian_track"]
+            raise DuplicateTrackPairError(
+                f"Track pair already exists: {artist} - {track}"
+            )
+        store.keys.add(key)
+        store.pending.append(row)
+        pending_count = len(store.pending)
+
+    if pending_count >= settings.INGEST_FLUSH_BATCH_SIZE:
+        store.flush_requested.set()
+    if store.resolver is not None:
+        submit_pair(store.resolver, row)
+    return row
+
+
+def ingest_track_pairs(
+    store: IngestionStore, pairs: Iterable[TrackPairInput]
+) -> list[IngestResult]:
+    """Ingest several pairs, reporting the outcome of each instead of raising."""
+    results: list[IngestResult] = []
+    for pair in pairs:
+        try:
+            row = ingest_track_pair(store, pair)
+        except InvalidTrackPairError as error:
+            results.append(
+                IngestResult(status="invalid", errors=[str(error)], pair=None)
+            )
+        except DuplicateTrackPairError as error:
+            results.append(
+                IngestResult(status="duplicate", errors=[str(error)], pair=None)
+            )
+        else:
+            results.append(IngestResult(status="accepted", errors=[], pair=row))
+    return results
@@ -0,0 +1,100 @@
+import queue
+import threading
+from collections import deque
+from collections.abc import Callable
+from collections.abc import Generator
+from collections.abc import Iterable
+from collections.abc import Iterator
+from concurrent.futures import Future
+from concurrent.futures import ThreadPoolExecutor
+from typing import TypedDict
+from typing import cast
+
+from spotify_assistant.settings import settings
+
+
+class PipelineConfig(TypedDict):
+    """Per-stage concurrency and batching of the playlist build pipeline."""
+
+    read_queue_size: int  # rows read ahead of the search stage
+    search_workers: int  # concurrent search threads
+    search_queue_size: int  # pairs in flight in the search stage
+    write_batch_size: int  # pairs per playlist add call (max 50 = 100 URIs)
+
+
+def default_pipeline_config() -> PipelineConfig:
+    return PipelineConfig(
+        read_queue_size=settings.PIPELINE_READ_QUEUE_SIZE,
+        search_workers=settings.PIPELINE_SEARCH_WORKERS,
+        search_queue_size=settings.PIPELINE_SEARCH_QUEUE_SIZE,
+        write_batch_size=settings.PIPELINE_WRITE_BATCH_SIZE,
+    )
+
+
+_END = object()
+
+
+def _put_unless_stopped(
+    buffer: queue.Queue[object], item: object, stop: threading.Event
+) -> bool:
+    """Block until there is room, unless the consumer went away."""
+    while not stop.is_set():
+        try:
+            buffer.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _produce(
+    items: Iterable[object], buffer: queue.Queue[object], stop: threading.Event
+) -> None:
+    try:
+        for item in items:
+            if not _put_unless_stopped(buffer, item, stop):
+                return
+        _put_unless_stopped(buffer, _END, stop)
+    except BaseException as error:
+        _put_unless_stopped(buffer, error, stop)
+
+
+def prefetch[T](items: Iterable[T], queue_size: int) -> Generator[T]:
+    """Consume items in a background thread, at most queue_size ahead.
+
+    Lets a producer stage (e.g. CSV reading) overlap with slower consumers while
+    the bounded queue keeps memory flat. Producer exceptions are re-raised here.
+    """
+    buffer: queue.Queue[object] = queue.Queue(maxsize=queue_size)
+    stop = threading.Event()
+    thread = threading.Thread(target=_produce, args=(items, buffer, stop), daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = buffer.get()
+            if item is _END:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield cast(T, item)
+    finally:
+        stop.set()
+        thread.join(timeout=1)
+
+
+def ordered_map[T, R](
+    items: Iterable[T], fn: Callable[[T], R], workers: int, window: int
+) -> Iterator[R]:
+    """Apply fn concurrently, yielding results in input order.
+
+    At most `window` items are in flight, so a slow consumer stalls the
+    upstream stages instead of growing a backlog (backpressure).
+    """
+    in_flight: deque[Future[R]] = deque()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for item in items:
+            in_flight.append(executor.submit(fn, item))
+            if len(in_flight) >= window:
+                yield in_flight.popleft().result()
+        while in_flight:
+            yield in_flight.popleft().result()
@@ -0,0 +1,94 @@
+from math import ceil
+from pathlib import Path
+from typing import TypedDict
+
+from spotify_assistant.clients.search_cache import get_cached_search
+from spotify_assistant.clients.search_cache import preload_search_cache
+from spotify_assistant.clients.spotify import PLAYLIST_WRITE_BATCH_SIZE
+from spotify_assistant.normalization import QUERY_LADDER
+from spotify_assistant.normalization import pair_track_keys
+from spotify_assistant.services.retry_queue import is_deferred
+from spotify_assistant.services.status_index import get_status_counts
+from spotify_assistant.services.status_index import iter_pending_pairs
+from spotify_assistant.settings import settings
+
+ESTIMATED_CALL_LATENCY = 0.3  # seconds, typical Spotify Web API round trip
+
+
+class RunPlan(TypedDict):
+    total_rows: int
+    pending_rows: int
+    cache_hits: int  # lookups answered by the search cache
+    cache_misses: int  # distinct songs that need a search call
+    max_search_calls: int  # worst case: every miss walks the whole query ladder
+    known_not_found: int  # pending rows the cache already knows will fail
+    write_batches: int  # playlist add calls, see _write_calls
+    estimated_seconds: float  # wall time at one search call per miss
+
+
+def _write_calls(pairs_to_add: int) -> int:
+    """Playlist add calls of a build adding that many pairs.
+
+    The builder adds PIPELINE_WRITE_BATCH_SIZE found pairs per call, split
+    further past PLAYLIST_WRITE_BATCH_SIZE URIs. A sharded playlist may need
+    one more call per volume boundary a batch straddles (counted as an upper
+    bound).
+    """
+    batch_size = settings.PIPELINE_WRITE_BATCH_SIZE
+    full, rest = divmod(pairs_to_add, batch_size)
+    calls = full * ceil(2 * batch_size / PLAYLIST_WRITE_BATCH_SIZE) + ceil(
+        2 * rest / PLAYLIST_WRITE_BATCH_SIZE
+    )
+    if settings.PLAYLIST_SHARD_PAIRS is not None:
+        calls += ceil(pairs_to_add / settings.PLAYLIST_SHARD_PAIRS)
+    return calls
+
+
+def plan_playlist_build(csv_path: Path) -> RunPlan:
+    """Estimate the API cost of build_playlist_from_csv without any network call.
+
+    Pending rows are the ones the builder would process, located with the
+    status index so only they are read; pairs backing off in the retry queue
+    are left out like the builder does. Each song is looked up
+    in the search cache; uncached songs are counted once even when several rows
+    share them, since the first search fills the cache for the others. Uncached
+    pairs are assumed to be found, so write_batches is an upper bound.
+    """
+    counts = get_status_counts(csv_path)
+    pending = [
+        pair for _, pair in iter_pending_pairs(csv_path) if not is_deferred(pair)
+    ]
+    preload_search_cache(key for pair in pending for key in pair_track_keys(pair))
+
+    cache_hits = 0
+    known_not_found = 0
+    pairs_to_add = 0
+    missing_keys: set[str] = set()
+    for pair in pending:
+        found_both = True
+        for key in pair_track_keys(pair):
+            cached = get_cached_search(key)
+            if cached is None:
+                missing_keys.add(key)
+                continue
+            cache_hits += 1
+            if cached["track"] is None:
+                found_both = False
+        if found_both:
+            pairs_to_add += 1
+        else:
+            known_not_found += 1
+
+    cache_misses = len(missing_keys)
+    write_batches = _write_calls(pairs_to_add)
+    seconds_per_call = ESTIMATED_CALL_LATENCY + settings.SPOTIFY_REQUEST_DELAY
+    return {
+        "total_rows": counts["rows"],
+        "pending_rows": len(pending),
+        "cache_hits": cache_hits,
+        "cache_misses": cache_misses,
+        "max_search_calls": cache_misses * len(QUERY_LADDER),
+        "known_not_found": known_not_found,
+        "write_batches": write_batches,
+        "estimated_seconds": (cache_misses + write_batches) * seconds_per_call,
+    }
@@ -1,12 +1,61 @@
+from collections import Counter
+from collections.abc import Iterable
+from collections.abc import Iterator
+from itertools import batched
 from pathlib import Path
 from typing import TypedDict
 
+from loguru import logger
+
+from spotify_assistant.clients.quota import flush_quota_ledger
+from spotify_assistant.clients.search_cache import get_cached_search
+from spotify_assistant.clients.search_cache import get_isrcs
+from spotify_assistant.clients.search_cache import preload_search_cache
 from spotify_assistant.clients.spotify import add_tracks_to_playlist
+from spotify_assistant.clients.spotify import get_playlist_snapshot
+from spotify_assistant.clients.spotify import get_playlist_snapshot_id
+from spotify_assistant.clients.spotify import get_tracks
+from spotify_assistant.clients.spotify import remove_tracks_from_playlist
 from spotify_assistant.clients.spotify import search_track
+from spotify_assistant.clients.spotify import track_id_from_uri
+from spotify_assistant.exceptions import ApiCallLimitError
+from spotify_assistant.exceptions import SearchNeedsReviewError
+from spotify_assistant.models.spotify import PlaylistItemPositions
+from spotify_assistant.models.spotify import PlaylistSnapshot
 from spotify_assistant.models.spotify import SpotifyTrack
 from spotify_assistant.models.tracks import TrackPair
+from spotify_assistant.normalization import pair_key
+from spotify_assistant.normalization import pair_track_keys
+from spotify_assistant.services.budget import RunBudget
+from spotify_assistant.services.budget import can_start_pair
+from spotify_assistant.services.budget import can_write
+from spotify_assistant.services.budget import enforce_search_budget
+from spotify_assistant.services.budget import is_limited
+from spotify_assistant.services.budget import prioritize_rows
+from spotify_assistant.services.csv_manager import patch_track_pair_status
 from spotify_assistant.services.csv_manager import read_track_pairs
+from spotify_assistant.services.csv_manager import read_track_pairs_versioned
 from spotify_assistant.services.csv_manager import update_track_pair
+from spotify_assistant.services.csv_manager import update_track_pairs
+from spotify_assistant.services.dataset_lock import check_dataset_version
+from spotify_assistant.services.pipeline import PipelineConfig
+from spotify_assistant.services.pipeline import default_pipeline_config
+from spotify_assistant.services.pipeline import ordered_map
+from spotify_assistant.services.pipeline import prefetch
+from spotify_assistant.services.retry_queue import is_deferred
+from spotify_assistant.services.retry_queue import record_failure
+from spotify_assistant.services.retry_queue import record_success
+from spotify_assistant.services.shards import assign_volumes
+from spotify_assistant.services.shards import get_volumes
+from spotify_assistant.services.shards import is_sharded
+from spotify_assistant.services.shards import is_volume_in_sync
+from spotify_assistant.services.shards import pairs_digest
+from spotify_assistant.services.shards import record_volume_sync
+from spotify_assistant.services.shards import retain_pairs
+from spotify_assistant.services.shards import target_playlists
+from spotify_assistant.services.status_index import iter_pending_pairs
+
+SYNC_PRELOAD_SIZE = 1_000  # pairs whose cached searches a sync loads at a time
 
 
 class ValidationResult(TypedDict):
@@ -17,6 +66,14 @@ class ValidationResult(TypedDict):
     skipped: bool
 
 
+def _search_status(track_name: str, artist: str) -> bool | None:
+    """Whether a track is on Spotify, None when its search was sent to review."""
+    try:
+        return search_track(track_name, artist) is not None
+    except SearchNeedsReviewError:
+        return None
+
+
 def validate_track_availability(
     csv_path: Path, dry_run: bool = False
 ) -> list[ValidationResult]:
@@ -27,6 +84,8 @@ def validate_track_availability(
     2. Search for Brazilian track - if not found, mark as False and skip
     3. If Brazilian found, search for original - if not found, mark as False
     4. Update CSV with availability status
+
+    A search sent to review leaves its cell (and found flag) unset.
     """
     pairs = read_track_pairs(csv_path)
     results: list[ValidationResult] = []
@@ -47,38 +106,32 @@ def validate_track_availability(
             continue
 
         # Search Brazilian track
-        brazilian = search_track(pair["brazilian_track"], pair["brazilian_artist"])
-        if not brazilian:
-            result["brazilian_found"] = False
-            pair["brazilian_has_spotify"] = False
+        brazilian_found = _search_status(
+            pair["brazilian_track"], pair["brazilian_artist"]
+        )
+        if brazilian_found is None:
+            results.append(result)
+            continue
+        result["brazilian_found"] = brazilian_found
+        pair["brazilian_has_spotify"] = brazilian_found
+        if not brazilian_found:
             if not dry_run:
-                update_track_pair(csv_path, idx, pair)
+                update_track_pair(csv_path, idx, pair, in_place=True)
             results.append(result)
             continue
 
-        # Brazilian found
-        result["brazilian_found"] = True
-        pair["brazilian_has_spotify"] = True
-
         # Skip original search if already marked unavailable
         if pair["original_has_spotify"] is False:
-            if not dry_run:
-                update_track_pair(csv_path, idx, pair)
             result["skipped"] = True
-            results.append(result)
-            continue
-
-        # Search original track
-        original = search_track(pair["original_track"], pair["original_artist"])
-        if not original:
-            result["original_found"] = False
-            pair["original_has_spotify"] = False
         else:
-            result["original_found"] = True
-            pair["original_has_spotify"] = True
+            result["original_found"] = original_found = _search_status(
+                pair["original_track"], pair["original_artist"]
+            )
+            if original_found is not None:
+                pair["original_has_spotify"] = original_found
 
         if not dry_run:
-            update_track_pair(csv_path, idx, pair)
+            update_track_pair(csv_path, idx, pair, in_place=True)
         results.append(result)
 
     return results
@@ -90,6 +143,7 @@ class ProcessResult(TypedDict):
     brazilian_track: SpotifyTrack | None
     original_track: SpotifyTrack | None
     added_to_playlist: bool
+    error: str | None  # set when a Spotify call raised; the pair is queued for retry
 
 
 def process_track_pair(pair: TrackPair, index: int) -> ProcessResult:
@@ -102,43 +156,504 @@ def process_track_pair(pair: TrackPair, index: int) -> ProcessResult:
         "brazilian_track": brazilian,
         "original_track": original,
         "added_to_playlist": False,
+        "error": None,
     }
 
 
-def build_playlist_from_csv(csv_path: Path, playlist_id: str) -> list[ProcessResult]:
-    """Main orchestration: read CSV, search tracks, add to playlist, update CSV."""
-    pairs = read_track_pairs(csv_path)
-    results: list[ProcessResult] = []
-    for idx, pair in enumerate(pairs):
-        if pair["in_playlist"]:
+def is_pending(pair: TrackPair) -> bool:
+    """True if the pair still has to be searched and added to the playlist."""
+    return (
+        not pair["in_playlist"]
+        and pair["brazilian_has_spotify"] is not False
+        and pair["original_has_spotify"] is not False
+    )
+
+
+def _failed_result(pair: TrackPair, index: int, error: Exception) -> ProcessResult:
+    """Queue an errored pair for retry and describe it as a result."""
+    entry = record_failure(pair, error)
+    logger.warning(
+        f"Error on {pair['brazilian_artist']} - {pair['brazilian_track']} "
+        f"(attempt {entry['attempts']}): {error!r}"
+    )
+    return {
+        "pair": pair,
+        "index": index,
+        "brazilian_track": None,
+        "original_track": None,
+        "added_to_playlist": False,
+        "error": repr(error),
+    }
+
+
+def _pair_uris(outcome: ProcessResult | Exception) -> list[str]:
+    """URIs to add for a fully found pair, empty otherwise."""
+    if isinstance(outcome, Exception):
+        return []
+    brazilian, original = outcome["brazilian_track"], outcome["original_track"]
+    if brazilian is None or original is None:
+        return []
+    return [brazilian["uri"], original["uri"]]
+
+
+# (row index, pair, search result or the exception raised while processing it)
+type StageItem = tuple[int, TrackPair, ProcessResult | Exception]
+
+
+def _pending_rows(
+    rows: Iterable[tuple[int, TrackPair]],
+) -> Iterator[tuple[int, TrackPair]]:
+    return (
+        (idx, pair) for idx, pair in rows if is_pending(pair) and not is_deferred(pair)
+    )
+
+
+def _pending_stage(
+    rows: Iterable[tuple[int, TrackPair]],
+    warmup_size: int,
+    budget: RunBudget | None = None,
+) -> Iterator[tuple[int, TrackPair]]:
+    """Keep rows still to process; warm the search cache one chunk ahead.
+
+    Stops admitting rows once the budget is spent.
+    """
+    for chunk in batched(_pending_rows(rows), warmup_size, strict=False):
+        preload_search_cache(key for _, pair in chunk for key in pair_track_keys(pair))
+        for row in chunk:
+            if not can_start_pair(budget):
+                return
+            yield row
+
+
+def _search_stage(row: tuple[int, TrackPair]) -> StageItem:
+    idx, pair = row
+    try:
+        return idx, pair, process_track_pair(pair, idx)
+    except Exception as error:
+        return idx, pair, error
+
+
+def _flush_playlist_batch(
+    batch: list[StageItem], playlist_id: str, budget: RunBudget | None = None
+) -> list[StageItem]:
+    """Add every fully found pair of the batch with one call per playlist.
+
+    All pairs go to playlist_id unless it is sharded into volumes (see
+    shards.target_playlists). Past the write budget the pairs are left out
+    of the playlist (still pending), their search results are kept.
+    """
+    found = [item for item in batch if _pair_uris(item[2])]
+    if not found:
+        return batch
+    if budget is not None and not can_write(budget):
+        budget.exhausted = budget.exhausted or "write calls"
+        return batch
+    targets = target_playlists(playlist_id, [pair for _, pair, _ in found])
+    groups: dict[str, list[StageItem]] = {}
+    for item in found:
+        groups.setdefault(targets[pair_key(item[1])], []).append(item)
+
+    errors: dict[int, Exception] = {}
+    for target, items in groups.items():
+        if budget is not None and not can_write(budget):
+            budget.exhausted = budget.exhausted or "write calls"
+            break
+        try:
+            add_tracks_to_playlist(
+                target, [uri for _, _, outcome in items for uri in _pair_uris(outcome)]
+            )
+        except Exception as error:
+            errors.update((idx, error) for idx, _, _ in items)
             continue
-        if (
-            pair["brazilian_has_spotify"] is False
-            or pair["original_has_spotify"] is False
-        ):
+        for _, _, outcome in items:
+            if not isinstance(outcome, Exception):
+                outcome["added_to_playlist"] = True
+    return [(idx, pair, errors.get(idx, outcome)) for idx, pair, outcome in batch]
+
+
+def _playlist_write_stage(
+    searched: Iterable[StageItem],
+    playlist_id: str,
+    batch_size: int,
+    budget: RunBudget | None = None,
+) -> Iterator[StageItem]:
+    """Group found pairs into playlist add calls, keeping the input order."""
+    batch: list[StageItem] = []
+    found = 0
+    for item in searched:
+        batch.append(item)
+        found += bool(_pair_uris(item[2]))
+        if found >= batch_size:
+            yield from _flush_playlist_batch(batch, playlist_id, budget)
+            batch, found = [], 0
+    yield from _flush_playlist_batch(batch, playlist_id, budget)
+
+
+def _persist_stage(
+    written: Iterable[StageItem], csv_path: Path, budget: RunBudget | None = None
+) -> Iterator[ProcessResult]:
+    """Record outcomes in the CSV and the retry queue, before yielding them.
+
+    Status cells are patched in place. A row that cannot be (cells not padded
+    yet) is written with one rewrite, which pads every row so later outcomes
+    are patched again. Pairs whose search the budget refused or sent to
+    review are left pending.
+    """
+    for idx, pair, outcome in written:
+        if isinstance(outcome, ApiCallLimitError):
+            if budget is not None:
+                budget.exhausted = budget.exhausted or "search calls"
+            continue
+        if isinstance(outcome, SearchNeedsReviewError):
             continue
-        res = process_track_pair(pair, idx)
-        # Update CSV if not found
-        changed = False
-        if not res["brazilian_track"]:
+        if isinstance(outcome, Exception):
+            yield _failed_result(pair, idx, outcome)
+            continue
+        if not outcome["brazilian_track"]:
             pair["brazilian_has_spotify"] = False
-            changed = True
-        if not res["original_track"]:
+        if not outcome["original_track"]:
             pair["original_has_spotify"] = False
-            changed = True
-        if changed:
-            update_track_pair(csv_path, idx, pair)
-            res["added_to_playlist"] = False
-            results.append(res)
+        if outcome["added_to_playlist"]:
+            pair["in_playlist"] = True
+        if not patch_track_pair_status(csv_path, idx, pair):
+            update_track_pairs(csv_path, {idx: pair})
+        record_success(pair)
+        yield outcome
+
+
+def iter_build_playlist(
+    csv_path: Path,
+    playlist_id: str,
+    config: PipelineConfig | None = None,
+    rows: Iterable[tuple[int, TrackPair]] | None = None,
+    budget: RunBudget | None = None,
+) -> Iterator[ProcessResult]:
+    """Streaming build: read -> filter -> search -> playlist write -> persist.
+
+    Stages are generators connected by bounded buffers (see PipelineConfig):
+    reading runs ahead in a thread, searches run concurrently but complete in
+    CSV order, found pairs are added in batches. Results are yielded as soon
+    as they are persisted, so memory stays bounded by the buffer sizes.
+
+    Failures are isolated per pair: "not found" marks the CSV, while an
+    exception from a Spotify call queues the pair for retry with backoff and
+    the run continues. Pairs still backing off or dead-lettered are skipped.
+
+    `rows` restricts the run to (row index, pair) items, e.g. newly appended
+    rows; by default the pending rows are located with the status index and
+    only those are read.
+
+    With a limited `budget` the pending rows are collected and processed best
+    first (see prioritize_rows), and the run stops cleanly once a limit is
+    reached: in-flight pairs finish and every outcome is persisted. Searches
+    past max_search_calls are refused, so their pairs stay pending.
+    """
+    config = config or default_pipeline_config()
+    source = rows if rows is not None else iter_pending_pairs(csv_path)
+    if budget is not None and is_limited(budget):
+        source = prioritize_rows(_pending_rows(source))
+    read_ahead = prefetch(source, config["read_queue_size"])
+    try:
+        with enforce_search_budget(budget):
+            pending = _pending_stage(read_ahead, config["search_queue_size"], budget)
+            searched = ordered_map(
+                pending,
+                _search_stage,
+                workers=config["search_workers"],
+                window=config["search_queue_size"],
+            )
+            written = _playlist_write_stage(
+                searched, playlist_id, config["write_batch_size"], budget
+            )
+            yield from _persist_stage(written, csv_path, budget)
+    finally:
+        read_ahead.close()
+        flush_quota_ledger()
+
+
+def build_playlist_from_csv(
+    csv_path: Path,
+    playlist_id: str,
+    config: PipelineConfig | None = None,
+    budget: RunBudget | None = None,
+) -> list[ProcessResult]:
+    """Main orchestration: read CSV, search tracks, add to playlist, update CSV.
+
+    Collects iter_build_playlist; prefer the iterator for large datasets.
+    """
+    return list(iter_build_playlist(csv_path, playlist_id, config, budget=budget))
+
+
+class SyncResult(TypedDict):
+    expected_pairs: int
+    added_uris: list[str]
+    removed: list[PlaylistItemPositions]  # positions relative to their volume
+    updated_rows: int
+
+
+class _VolumeDiff(TypedDict):
+    playlist_id: str | None  # None for a volume a real sync would create
+    snapshot_id: str | None
+    digest: str
+    added_uris: list[str]
+    removed: list[PlaylistItemPositions]
+
+
+def _cached_pair_tracks(
+    pair: TrackPair,
+) -> tuple[SpotifyTrack | None, SpotifyTrack | None] | None:
+    """Both tracks of a pair from the search cache, None if one is not cached."""
+    tracks = []
+    for key in pair_track_keys(pair):
+        cached = get_cached_search(key)
+        if cached is None:
+            return None
+        tracks.append(cached["track"])
+    return tracks[0], tracks[1]
+
+
+def _expected_pair_uris(pairs: list[TrackPair]) -> dict[int, tuple[str, str]]:
+    """Resolve (brazilian_uri, original_uri) for every pair eligible for the playlist.
+
+    Pairs are resolved from the search cache, warmed SYNC_PRELOAD_SIZE pairs
+    at a time; only pairs it cannot resolve are searched. Pairs found missing
+    are marked unavailable in place; pairs sent to review are left as they are
+    and not expected.
+    """
+    eligible = [
+        (idx, pair)
+        for idx, pair in enumerate(pairs)
+        if pair["brazilian_has_spotify"] is not False
+        and pair["original_has_spotify"] is not False
+    ]
+    resolved: dict[int, tuple[SpotifyTrack | None, SpotifyTrack | None]] = {}
+    unresolved: list[tuple[int, TrackPair]] = []
+    for chunk in batched(eligible, SYNC_PRELOAD_SIZE, strict=False):
+        preload_search_cache(key for _, pair in chunk for key in pair_track_keys(pair))
+        for idx, pair in chunk:
+            tracks = _cached_pair_tracks(pair)
+            if tracks is None:
+                unresolved.append((idx, pair))
+            else:
+                resolved[idx] = tracks
+    if unresolved:
+        logger.info(f"Searching {len(unresolved)} pairs missing from the search cache")
+    for idx, pair in unresolved:
+        try:
+            res = process_track_pair(pair, idx)
+        except SearchNeedsReviewError:
             continue
-        # Add to playlist
-        if res["brazilian_track"] and res["original_track"]:
-            add_tracks_to_playlist(
-                playlist_id,
-                [res["brazilian_track"]["uri"], res["original_track"]["uri"]],
+        resolved[idx] = (res["brazilian_track"], res["original_track"])
+
+    expected: dict[int, tuple[str, str]] = {}
+    for idx, _ in eligible:
+        if idx not in resolved:
+            continue
+        brazilian, original = resolved[idx]
+        pairs[idx]["brazilian_has_spotify"] = brazilian is not None
+        pairs[idx]["original_has_spotify"] = original is not None
+        if brazilian and original:
+            expected[idx] = (brazilian["uri"], original["uri"])
+    return expected
+
+
+def _recording_identities(
+    expected_uris: Iterable[str], snapshot: PlaylistSnapshot, dry_run: bool
+) -> dict[str, str]:
+    """Map track URIs to their ISRC so equivalent releases compare equal.
+
+    ISRCs come from the snapshot, the ISRC index, then one tracks-by-ID call
+    per 50 expected URIs still unknown (not on dry runs, which only use the
+    index). Skipped when the snapshot carries no ISRCs, since there is nothing
+    to compare against.
+    """
+    snapshot_isrcs = snapshot.get("isrcs", [])
+    if not any(snapshot_isrcs):
+        return {}
+    identities = {
+        uri: isrc
+        for uri, isrc in zip(snapshot["uris"], snapshot_isrcs, strict=True)
+        if uri is not None and isrc is not None
+    }
+    ids = {
+        track_id_from_uri(uri): uri for uri in expected_uris if uri not in identities
+    }
+    known = get_isrcs(ids)
+    unknown = [track_id for track_id in ids if track_id not in known]
+    if unknown and not dry_run:
+        for track_id, track in zip(unknown, get_tracks(unknown), strict=True):
+            isrc = track.get("isrc") if track is not None else None
+            if isrc:
+                known[track_id] = isrc
+    identities.update({ids[track_id]: isrc for track_id, isrc in known.items()})
+    return identities
+
+
+def _playlist_diff(
+    expected: dict[int, tuple[str, str]], snapshot: PlaylistSnapshot, dry_run: bool
+) -> tuple[list[str], list[PlaylistItemPositions]]:
+    """URIs to add and occurrences to remove so the playlist holds exactly
+    the expected pairs, each pair as a unit.
+    """
+    identities = _recording_identities(
+        (uri for uris in expected.values() for uri in uris), snapshot, dry_run
+    )
+    available = Counter(
+        identities.get(uri, uri) for uri in snapshot["uris"] if uri is not None
+    )
+    kept: Counter[str] = Counter()
+    added_uris: list[str] = []
+    for uris in expected.values():
+        needed = Counter(identities.get(uri, uri) for uri in uris)
+        if all(available[key] >= count for key, count in needed.items()):
+            available.subtract(needed)
+            kept.update(needed)
+        else:
+            added_uris.extend(uris)
+
+    stale_positions: dict[str, list[int]] = {}
+    for position, uri in enumerate(snapshot["uris"]):
+        if uri is None:
+            continue
+        key = identities.get(uri, uri)
+        if kept[key] > 0:
+            kept[key] -= 1
+        else:
+            stale_positions.setdefault(uri, []).append(position)
+    removed = [
+        PlaylistItemPositions(uri=uri, positions=positions)
+        for uri, positions in stale_positions.items()
+    ]
+    return added_uris, removed
+
+
+def _volume_diff(
+    family: str,
+    playlist_id: str | None,
+    expected: dict[int, tuple[str, str]],
+    dry_run: bool,
+) -> _VolumeDiff:
+    """Diff of one volume; volumes unchanged since their last sync are not
+    paged through (see shards.is_volume_in_sync).
+    """
+    digest = pairs_digest(expected.values())
+    diff = _VolumeDiff(
+        playlist_id=playlist_id,
+        snapshot_id=None,
+        digest=digest,
+        added_uris=[uri for uris in expected.values() for uri in uris],
+        removed=[],
+    )
+    if playlist_id is None:
+        return diff
+    diff["snapshot_id"] = snapshot_id = get_playlist_snapshot_id(playlist_id)
+    if is_volume_in_sync(family, playlist_id, snapshot_id, digest):
+        diff["added_uris"] = []
+        return diff
+    snapshot = get_playlist_snapshot(playlist_id)
+    diff["snapshot_id"] = snapshot["snapshot_id"]
+    diff["added_uris"], diff["removed"] = _playlist_diff(expected, snapshot, dry_run)
+    return diff
+
+
+def _sharded_diffs(
+    family: str,
+    pairs: list[TrackPair],
+    expected: dict[int, tuple[str, str]],
+    dry_run: bool,
+) -> list[_VolumeDiff]:
+    volumes = assign_volumes(
+        family, (pairs[idx] for idx in expected), create=not dry_run
+    )
+    by_volume: dict[str | None, dict[int, tuple[str, str]]] = {
+        volume["playlist_id"]: {} for volume in get_volumes(family)
+    }
+    for idx, uris in expected.items():
+        by_volume.setdefault(volumes[pair_key(pairs[idx])], {})[idx] = uris
+    return [
+        _volume_diff(family, playlist_id, volume_expected, dry_run)
+        for playlist_id, volume_expected in by_volume.items()
+    ]
+
+
+def _apply_volume_diff(family: str, diff: _VolumeDiff) -> None:
+    playlist_id, snapshot_id = diff["playlist_id"], diff["snapshot_id"]
+    if playlist_id is None or snapshot_id is None:
+        return
+    for response in (
+        remove_tracks_from_playlist(playlist_id, diff["removed"], snapshot_id),
+        add_tracks_to_playlist(playlist_id, diff["added_uris"]),
+    ):
+        if response:
+            snapshot_id = response["snapshot_id"]
+    if is_sharded():
+        record_volume_sync(family, playlist_id, snapshot_id, diff["digest"])
+
+
+def sync_playlist_with_csv(
+    csv_path: Path, playlist_id: str, dry_run: bool = False
+) -> SyncResult:
+    """Two-way sync: make the playlist match the CSV and the CSV match the playlist.
+
+    A pair counts as present only when both of its tracks are still in the
+    playlist; otherwise it is re-added as a unit so the cover stays next to its
+    original. Occurrences not claimed by any expected pair (deleted or edited
+    pairs, orphaned halves, duplicates) are removed by position. Playlist writes
+    are proportional to the diff and the CSV is rewritten once. Pairs appended
+    meanwhile are kept; rows modified meanwhile raise StaleDatasetError.
+    Tracks are compared by recording (ISRC), so another release of an expected
+    track already in the playlist is kept instead of being swapped.
+
+    When sharded (PLAYLIST_SHARD_PAIRS), each volume is diffed against the
+    pairs mapped to it, volumes unchanged since their last sync are skipped,
+    and pairs no longer expected free their volume slot.
+    """
+    pairs, version = read_track_pairs_versioned(csv_path)
+    before = [
+        (p["brazilian_has_spotify"], p["original_has_spotify"], p["in_playlist"])
+        for p in pairs
+    ]
+    expected = _expected_pair_uris(pairs)
+    if is_sharded():
+        diffs = _sharded_diffs(playlist_id, pairs, expected, dry_run)
+    else:
+        snapshot = get_playlist_snapshot(playlist_id)
+        added_uris, removed = _playlist_diff(expected, snapshot, dry_run)
+        diffs = [
+            _VolumeDiff(
+                playlist_id=playlist_id,
+                snapshot_id=snapshot["snapshot_id"],
+                digest="",
+                added_uris=added_uris,
+                removed=removed,
             )
-            pair["in_playlist"] = True
-            update_track_pair(csv_path, idx, pair)
-            res["added_to_playlist"] = True
-        results.append(res)
-    return results
+        ]
+
+    for idx, pair in enumerate(pairs):
+        pair["in_playlist"] = idx in expected
+    updates = {
+        idx: pair
+        for idx, (pair, old) in enumerate(zip(pairs, before, strict=True))
+        if (
+            pair["brazilian_has_spotify"],
+            pair["original_has_spotify"],
+            pair["in_playlist"],
+        )
+        != old
+    }
+
+    if not dry_run:
+        # Fail before touching the playlist; the final write checks again
+        check_dataset_version(csv_path, version)
+        for diff in diffs:
+            _apply_volume_diff(playlist_id, diff)
+        update_track_pairs(csv_path, updates, expected_version=version)
+        if is_sharded():
+            retain_pairs(playlist_id, (pair_key(pairs[idx]) for idx in expected))
+
+    return {
+        "expected_pairs": len(expected),
+        "added_uris": [uri for diff in diffs for uri in diff["added_uris"]],
+        "removed": [item for diff in diffs for item in diff["removed"]],
+        "updated_rows": len(updates),
+    }
@@ -0,0 +1,134 @@
+import atexit
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from dataclasses import field
+
+from loguru import logger
+
+from spotify_assistant.clients.quota import get_daily_usage
+from spotify_assistant.clients.quota import get_session_usage
+from spotify_assistant.clients.spotify import search_track
+from spotify_assistant.exceptions import SearchNeedsReviewError
+from spotify_assistant.models.tracks import TrackPair
+from spotify_assistant.settings import settings
+
+
+@dataclass
+class BackgroundResolver:
+    """Thread searching new pairs so the next build finds them in the cache.
+
+    Resolution is best effort: a pair that fails or is skipped is simply
+    searched again by the build.
+    """
+
+    pairs: queue.Queue[TrackPair | None] = field(default_factory=queue.Queue)
+    thread: threading.Thread | None = None
+    resolved: int = 0
+    failed: int = 0
+    skipped: int = 0  # not searched, today's search quota was spent
+
+
+def _search_quota_left() -> bool:
+    """False once the daily search quota is spent: builds get what remains."""
+    quota = settings.DAILY_SEARCH_QUOTA
+    return quota is None or get_daily_usage()["search_calls"] < quota
+
+
+def _resolve_pair(pair: TrackPair) -> int:
+    """Search both tracks of a pair. Returns the Spotify calls it took.
+
+    A track sent to review is left to the build, which will search it again.
+    """
+    before = get_session_usage()["search_calls"]
+    for track_name, artist in (
+        (pair["brazilian_track"], pair["brazilian_artist"]),
+        (pair["original_track"], pair["original_artist"]),
+    ):
+        try:
+            search_track(track_name, artist)
+        except SearchNeedsReviewError:
+            pass
+    # Other threads may search meanwhile; this only paces the resolver
+    return get_session_usage()["search_calls"] - before
+
+
+def _resolve_loop(resolver: BackgroundResolver) -> None:
+    while (pair := resolver.pairs.get()) is not None:
+        if not _search_quota_left():
+            resolver.skipped += 1
+            continue
+        try:
+            calls = _resolve_pair(pair)
+        except Exception as error:
+            resolver.failed += 1
+            logger.warning(f"Background resolution failed: {error!r}")
+            calls = 1
+        else:
+            resolver.resolved += 1
+        # Cache hits cost nothing, only pace the calls actually made
+        time.sleep(settings.SPOTIFY_REQUEST_DELAY * calls)
+
+
+def start_resolver() -> BackgroundResolver:
+    resolver = BackgroundResolver()
+    resolver.thread = threading.Thread(
+        target=_resolve_loop, args=(resolver,), daemon=True
+    )
+    resolver.thread.start()
+    return resolver
+
+
+def submit_pair(resolver: BackgroundResolver, pair: TrackPair) -> None:
+    """Queue a pair for resolution; returns immediately."""
+    resolver.pairs.put(pair)
+
+
+def pending_resolutions(resolver: BackgroundResolver) -> int:
+    return resolver.pairs.qsize()
+
+
+def stop_resolver(resolver: BackgroundResolver) -> None:
+    """Stop the thread once the pair being searched is done.
+
+    Pairs still queued are dropped, the build will search them.
+    """
+    while True:
+        try:
+            resolver.pairs.get_nowait()
+        except queue.Empty:
+            break
+    resolver.pairs.put(None)
+    if resolver.thread is not None:
+        resolver.thread.join()
+
+
+# Resolver of resolve_in_background, started on first use
+_resolver: BackgroundResolver | None = None
+_lock = threading.Lock()
+
+
+def resolve_in_background(pair: TrackPair) -> None:
+    """Search a pair in the process-wide resolver thread.
+
+    The on_append callback of csv_manager.append_track_pair with
+    settings.RESOLVE_ON_APPEND, so rows added one at a time are resolved
+    before the next build. The thread is stopped at interpreter exit.
+    """
+    global _resolver
+    with _lock:
+        if _resolver is None:
+            _resolver = start_resolver()
+            # Lets the pair being searched finish instead of killing the thread
+            atexit.register(close_background_resolver)
+        submit_pair(_resolver, pair)
+
+
+def close_background_resolver() -> None:
+    global _resolver
+    with _lock:
+        resolver, _resolver = _resolver, None
+    atexit.unregister(close_background_resolver)
+    if resolver is not None:
+        stop_resolver(resolver)
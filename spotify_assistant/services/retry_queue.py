@@ -0,0 +1,104 @@
+import json
+from datetime import UTC
+from datetime import datetime
+from datetime import timedelta
+from pathlib import Path
+
+from spotify_assistant.models.tracks import RetryEntry
+from spotify_assistant.models.tracks import TrackPair
+from spotify_assistant.normalization import pair_key
+from spotify_assistant.settings import settings
+
+_queue: dict[str, RetryEntry] | None = None
+_dead_keys: set[str] = set()
+_loaded_from: Path | None = None
+
+
+def _load() -> dict[str, RetryEntry]:
+    """Get the retry queue, (re)loading it when STATE_DIR changed."""
+    global _queue, _dead_keys, _loaded_from
+    if _queue is None or _loaded_from != settings.retry_queue_path:
+        path = settings.retry_queue_path
+        _queue = json.loads(path.read_text("utf-8")) if path.exists() else {}
+        _dead_keys = set()
+        if settings.dead_letters_path.exists():
+            with settings.dead_letters_path.open("r", encoding="utf-8") as f:
+                _dead_keys = {
+                    json.loads(line)["pair_key"] for line in f if line.strip()
+                }
+        _loaded_from = path
+    return _queue
+
+
+def _save(queue: dict[str, RetryEntry]) -> None:
+    path = settings.retry_queue_path
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp")
+    tmp_path.write_text(json.dumps(queue, indent=2), "utf-8")
+    tmp_path.replace(path)
+
+
+def reset_retry_queue() -> None:
+    """Drop the in-memory state so it is reloaded from disk on next use."""
+    global _queue, _loaded_from
+    _queue = None
+    _loaded_from = None
+
+
+def get_retry_entries() -> list[RetryEntry]:
+    return list(_load().values())
+
+
+def is_queued(pair: TrackPair) -> bool:
+    """True if the pair awaits another attempt (dead letters are not queued)."""
+    return pair_key(pair) in _load()
+
+
+def is_deferred(pair: TrackPair, now: datetime | None = None) -> bool:
+    """True if the pair is dead-lettered or still backing off after an error."""
+    queue = _load()
+    key = pair_key(pair)
+    if key in _dead_keys:
+        return True
+    entry = queue.get(key)
+    if entry is None:
+        return False
+    now = now or datetime.now(UTC)
+    return datetime.fromisoformat(entry["next_attempt_at"]) > now
+
+
+def record_failure(pair: TrackPair, error: Exception) -> RetryEntry:
+    """Queue the pair for retry with exponential backoff.
+
+    After settings.RETRY_MAX_ATTEMPTS failures the entry is moved to the
+    dead-letter file and the pair is no longer attempted.
+    """
+    queue = _load()
+    key = pair_key(pair)
+    attempts = queue[key]["attempts"] + 1 if key in queue else 1
+    delay = settings.RETRY_BASE_DELAY * 2 ** (attempts - 1)
+    entry = RetryEntry(
+        pair_key=key,
+        pair=pair,
+        attempts=attempts,
+        next_attempt_at=(datetime.now(UTC) + timedelta(seconds=delay)).isoformat(),
+        last_error=repr(error),
+    )
+
+    if attempts >= settings.RETRY_MAX_ATTEMPTS:
+        queue.pop(key, None)
+        _dead_keys.add(key)
+        settings.dead_letters_path.parent.mkdir(parents=True, exist_ok=True)
+        with settings.dead_letters_path.open("a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+    else:
+        queue[key] = entry
+    _save(queue)
+    return entry
+
+
+def record_success(pair: TrackPair) -> None:
+    """Remove the pair from the retry queue after it was processed."""
+    queue = _load()
+    if queue.pop(pair_key(pair), None) is not None:
+        _save(queue)
@@ -0,0 +1,252 @@
+import hashlib
+import sqlite3
+import threading
+from collections.abc import Iterable
+from pathlib import Path
+
+from loguru import logger
+
+from spotify_assistant.clients.spotify import create_playlist
+from spotify_assistant.clients.spotify import get_playlist_details
+from spotify_assistant.models.spotify import PlaylistVolume
+from spotify_assistant.models.tracks import TrackPair
+from spotify_assistant.normalization import pair_key
+from spotify_assistant.settings import settings
+
+_QUERY_CHUNK_SIZE = 500  # pair keys per IN (...) lookup
+
+_connection: sqlite3.Connection | None = None
+_connection_path: Path | None = None
+_lock = threading.Lock()
+
+
+def _get_connection() -> sqlite3.Connection:
+    """Get or open the mapping database at settings.playlist_shards_path.
+
+    A family is named after its base playlist, which is its volume 1.
+    """
+    global _connection, _connection_path
+    path = settings.playlist_shards_path
+    if _connection is None or _connection_path != path:
+        if _connection is not None:
+            _connection.close()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        _connection = sqlite3.connect(path, check_same_thread=False)
+        _connection.executescript(
+            "CREATE TABLE IF NOT EXISTS volumes ("
+            " family TEXT NOT NULL,"
+            " volume INTEGER NOT NULL,"
+            " playlist_id TEXT NOT NULL,"
+            " synced_snapshot_id TEXT,"  # playlist state after the last sync
+            " synced_digest TEXT,"  # pairs expected in it at the last sync
+            " PRIMARY KEY (family, volume)"
+            ");"
+            "CREATE TABLE IF NOT EXISTS pairs ("
+            " family TEXT NOT NULL,"
+            " pair_key TEXT NOT NULL,"
+            " volume INTEGER NOT NULL,"
+            " PRIMARY KEY (family, pair_key)"
+            ");"
+            "CREATE INDEX IF NOT EXISTS pairs_volume ON pairs (family, volume);"
+        )
+        _connection_path = path
+    return _connection
+
+
+def close_playlist_shards() -> None:
+    global _connection, _connection_path
+    with _lock:
+        if _connection is not None:
+            _connection.close()
+        _connection = None
+        _connection_path = None
+
+
+def is_sharded() -> bool:
+    return settings.PLAYLIST_SHARD_PAIRS is not None
+
+
+def _volume_ids(connection: sqlite3.Connection, family: str) -> dict[int, str]:
+    connection.execute(
+        "INSERT OR IGNORE INTO volumes (family, volume, playlist_id) VALUES (?, 1, ?)",
+        (family, family),
+    )
+    rows = connection.execute(
+        "SELECT volume, playlist_id FROM volumes WHERE family = ?", (family,)
+    )
+    return dict(rows.fetchall())
+
+
+def get_volumes(family: str) -> list[PlaylistVolume]:
+    """Volumes of a playlist family in order, with their pair counts."""
+    with _lock:
+        connection = _get_connection()
+        ids = _volume_ids(connection, family)
+        counts = dict(
+            connection.execute(
+                "SELECT volume, COUNT(*) FROM pairs WHERE family = ? GROUP BY volume",
+                (family,),
+            ).fetchall()
+        )
+        connection.commit()
+    return [
+        PlaylistVolume(
+            volume=volume, playlist_id=ids[volume], pairs=counts.get(volume, 0)
+        )
+        for volume in sorted(ids)
+    ]
+
+
+def _mapped_volumes(
+    connection: sqlite3.Connection, family: str, keys: list[str]
+) -> dict[str, int]:
+    mapped: dict[str, int] = {}
+    for start in range(0, len(keys), _QUERY_CHUNK_SIZE):
+        chunk = keys[start : start + _QUERY_CHUNK_SIZE]
+        placeholders = ",".join("?" * len(chunk))
+        rows = connection.execute(
+            "SELECT pair_key, volume FROM pairs"
+            f" WHERE family = ? AND pair_key IN ({placeholders})",
+            (family, *chunk),
+        )
+        mapped.update(rows.fetchall())
+    return mapped
+
+
+def _create_volume(connection: sqlite3.Connection, family: str, volume: int) -> str:
+    """Create a volume with the base playlist's visibility (public, private or
+    collaborative), named after it."""
+    base = get_playlist_details(family)
+    name = settings.PLAYLIST_SHARD_NAME.format(name=base["name"], volume=volume)
+    playlist_id = create_playlist(
+        name,
+        public=base["public"] is not False,
+        collaborative=base["collaborative"],
+    )
+    connection.execute(
+        "INSERT INTO volumes (family, volume, playlist_id) VALUES (?, ?, ?)",
+        (family, volume, playlist_id),
+    )
+    connection.commit()  # never lose track of a created playlist
+    logger.info(f"Created playlist volume {volume}: {name} ({playlist_id})")
+    return playlist_id
+
+
+def assign_volumes(
+    family: str, pairs: Iterable[TrackPair], create: bool = True
+) -> dict[str, str | None]:
+    """Playlist of each pair's volume, by pair key; new pairs are assigned.
+
+    A pair keeps the volume it was first assigned to, so both of its tracks
+    always go to the same playlist. New pairs fill the last volume in the
+    given order; once it holds PLAYLIST_SHARD_PAIRS pairs the next volume is
+    created. With create=False no playlist is created and the pairs that
+    would need one map to None (and stay unassigned).
+    """
+    capacity = settings.PLAYLIST_SHARD_PAIRS or 0
+    keys = list(dict.fromkeys(pair_key(pair) for pair in pairs))
+    with _lock:
+        connection = _get_connection()
+        ids = _volume_ids(connection, family)
+        volumes = _mapped_volumes(connection, family, keys)
+        last = max(ids)
+        (count,) = connection.execute(
+            "SELECT COUNT(*) FROM pairs WHERE family = ? AND volume = ?",
+            (family, last),
+        ).fetchone()
+        targets: dict[str, str | None] = {}
+        for key in keys:
+            if key in volumes:
+                targets[key] = ids[volumes[key]]
+                continue
+            if count >= capacity:
+                if not create:
+                    targets[key] = None
+                    continue
+                last, count = last + 1, 0
+                ids[last] = _create_volume(connection, family, last)
+            connection.execute(
+                "INSERT INTO pairs (family, pair_key, volume) VALUES (?, ?, ?)",
+                (family, key, last),
+            )
+            count += 1
+            targets[key] = ids[last]
+        connection.commit()
+    return targets
+
+
+def target_playlists(family: str, pairs: Iterable[TrackPair]) -> dict[str, str]:
+    """Playlist to write each pair to, by pair key.
+
+    The family's playlist itself unless sharding is on (PLAYLIST_SHARD_PAIRS),
+    in which case volumes are assigned and created as needed.
+    """
+    if not is_sharded():
+        return {pair_key(pair): family for pair in pairs}
+    return {
+        key: playlist_id
+        for key, playlist_id in assign_volumes(family, pairs).items()
+        if playlist_id is not None
+    }
+
+
+def retain_pairs(family: str, keys: Iterable[str]) -> int:
+    """Forget the pairs of a family not in keys, freeing their volume slots.
+
+    Returns the number of mappings removed.
+    """
+    keep = set(keys)
+    with _lock:
+        connection = _get_connection()
+        mapped = [
+            key
+            for (key,) in connection.execute(
+                "SELECT pair_key FROM pairs WHERE family = ?", (family,)
+            )
+        ]
+        stale = [(family, key) for key in mapped if key not in keep]
+        connection.executemany(
+            "DELETE FROM pairs WHERE family = ? AND pair_key = ?", stale
+        )
+        connection.commit()
+    return len(stale)
+
+
+def pairs_digest(uris: Iterable[tuple[str, str]]) -> str:
+    """Fingerprint of the pairs expected in a volume."""
+    digest = hashlib.sha1()
+    for brazilian_uri, original_uri in uris:
+        digest.update(f"{brazilian_uri} {original_uri}\n".encode())
+    return digest.hexdigest()
+
+
+def is_volume_in_sync(
+    family: str, playlist_id: str, snapshot_id: str, digest: str
+) -> bool:
+    """True if the volume is unchanged and expects the same pairs since its
+    last sync, so the sync can skip paging through it.
+    """
+    with _lock:
+        row = (
+            _get_connection()
+            .execute(
+                "SELECT synced_snapshot_id, synced_digest FROM volumes"
+                " WHERE family = ? AND playlist_id = ?",
+                (family, playlist_id),
+            )
+            .fetchone()
+        )
+    return row is not None and row == (snapshot_id, digest)
+
+
+def record_volume_sync(
+    family: str, playlist_id: str, snapshot_id: str, digest: str
+) -> None:
+    with _lock:
+        connection = _get_connection()
+        connection.execute(
+            "UPDATE volumes SET synced_snapshot_id = ?, synced_digest = ?"
+            " WHERE family = ? AND playlist_id = ?",
+            (snapshot_id, digest, family, playlist_id),
+        )
+        connection.commit()
@@ -0,0 +1,204 @@
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+from typing import TYPE_CHECKING
+from typing import Any
+
+import pyarrow as pa
+import pyarrow.ipc as ipc
+
+from spotify_assistant.models.tracks import TrackPair
+from spotify_assistant.services.csv_rows import read_track_pairs_range
+from spotify_assistant.services.dataset_lock import get_dataset_version
+from spotify_assistant.settings import settings
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+_METADATA_KEY = b"spotify_assistant.snapshot"
+_VERSION = 1
+_SAMPLE_SIZE = 64 * 1024  # bytes hashed at each end of the CSV
+# Appended rows are parsed on every load until there are this many and they
+# reach this share of the snapshot, then the snapshot is rewritten with them
+REFRESH_TAIL_ROWS = 1000
+REFRESH_TAIL_FRACTION = 0.1
+
+_TEXT_COLUMNS = [
+    "brazilian_artist",
+    "brazilian_track",
+    "original_artist",
+    "original_track",
+]
+_OPTIONAL_COLUMNS = ["added_at", "source"]  # empty means None
+_STRING_COLUMNS = _TEXT_COLUMNS + _OPTIONAL_COLUMNS
+_BOOLEAN_COLUMNS = ["brazilian_has_spotify", "original_has_spotify", "in_playlist"]
+_TRUE_VALUES = ["true", "t", "1"]
+SCHEMA = pa.schema(
+    [pa.field(name, pa.string()) for name in _STRING_COLUMNS]
+    + [pa.field(name, pa.bool_()) for name in _BOOLEAN_COLUMNS]
+)
+
+
+def wants_snapshot(csv_path: Path) -> bool:
+    """True if the CSV is large enough to keep an Arrow snapshot of its rows.
+
+    Smaller files parse faster than the snapshot is checked and written.
+    """
+    minimum = settings.DATASET_SNAPSHOT_MIN_BYTES
+    return minimum is not None and csv_path.stat().st_size >= minimum
+
+
+def snapshot_path(csv_path: Path) -> Path:
+    """Arrow IPC sidecar next to the CSV, like its status index."""
+    return csv_path.with_name(f"{csv_path.name}.arrow")
+
+
+def _sample_hash(csv_path: Path, end: int) -> str:
+    """Hash of the first and last bytes of the CSV up to `end`.
+
+    Catches content changes that keep the size and modification time (e.g. a
+    copy preserving mtime) without reading the whole file.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    with csv_path.open("rb") as f:
+        digest.update(f.read(min(_SAMPLE_SIZE, end)))
+        tail_start = max(end - _SAMPLE_SIZE, _SAMPLE_SIZE)
+        if tail_start < end:
+            f.seek(tail_start)
+            digest.update(f.read(end - tail_start))
+    return digest.hexdigest()
+
+
+def _csv_key(csv_path: Path) -> dict[str, Any]:
+    """What a snapshot must match: the CSV file, its version and content."""
+    stat = csv_path.stat()
+    return {
+        "version": _VERSION,
+        "inode": stat.st_ino,
+        "mtime_ns": stat.st_mtime_ns,
+        "size": stat.st_size,
+        "dataset_version": get_dataset_version(csv_path),
+        "sample_hash": _sample_hash(csv_path, stat.st_size),
+    }
+
+
+def table_from_pairs(pairs: list[TrackPair]) -> pa.Table:
+    return pa.Table.from_pylist(pairs, schema=SCHEMA)
+
+
+def _csv_booleans(column: "pd.Series", default: bool | None) -> "pd.Series":
+    """Nullable booleans read like csv_rows' parser: blank (or padding) is
+    `default`, "true", "t" or "1" in any case is True, anything else False.
+    """
+    if column.dtype == "boolean" or column.dtype == bool:
+        values = column.astype("boolean")
+    else:
+        text = column.astype("string").str.strip().str.lower().fillna("")
+        values = text.isin(_TRUE_VALUES).astype("boolean").mask(text == "")
+    return values if default is None else values.fillna(default)
+
+
+def table_from_frame(df: "pd.DataFrame") -> pa.Table:
+    """Rows of a track pairs DataFrame as read_track_pairs returns them.
+
+    Columns may hold the raw CSV text or DTYPES values (see main); either way
+    the NA rules of csv_rows' parser apply, so a snapshot written from a
+    DataFrame reads back like a parse of the CSV written from it.
+    """
+    # Imported here, see frame_from_table
+    import pandas as pd
+
+    columns = {name: df[name].astype("string").fillna("") for name in _TEXT_COLUMNS}
+    for name in _OPTIONAL_COLUMNS:
+        text = df[name].astype("string")
+        columns[name] = text.mask(text == "")
+    for name in _BOOLEAN_COLUMNS:
+        columns[name] = _csv_booleans(
+            df[name], False if name == "in_playlist" else None
+        )
+    return pa.Table.from_pandas(
+        pd.DataFrame(columns), schema=SCHEMA, preserve_index=False
+    )
+
+
+def frame_from_table(table: pa.Table) -> "pd.DataFrame":
+    """DataFrame with the dtypes of main.DTYPES (NA for missing values)."""
+    # Imported here: read_track_pairs loads this module, and pandas is slow
+    # to import in the worker processes that only need track pairs
+    import pandas as pd
+
+    types = {pa.string(): pd.StringDtype(), pa.bool_(): pd.BooleanDtype()}
+    df: pd.DataFrame = table.to_pandas(types_mapper=types.get)
+    return df
+
+
+def write_snapshot(csv_path: Path, table: pa.Table) -> None:
+    """Store the parsed rows of the CSV in its current state.
+
+    Requires the dataset lock, held since the rows were read or written.
+    """
+    if not wants_snapshot(csv_path):
+        return
+    key = _csv_key(csv_path)
+    table = table.replace_schema_metadata({_METADATA_KEY: json.dumps(key)})
+    path = snapshot_path(csv_path)
+    # Readers holding the shared lock may write it concurrently, even threads
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        with (
+            pa.OSFile(str(tmp_path), "wb") as sink,
+            ipc.new_file(sink, table.schema) as writer,
+        ):
+            writer.write_table(table)
+        tmp_path.replace(path)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+
+
+def _read_sidecar(csv_path: Path) -> tuple[pa.Table, dict[str, Any]] | None:
+    try:
+        # Memory-mapped: columns are read straight from the page cache
+        table = ipc.open_file(pa.memory_map(str(snapshot_path(csv_path)))).read_all()
+    except (FileNotFoundError, pa.ArrowInvalid):
+        return None
+    metadata = table.schema.metadata or {}
+    if _METADATA_KEY not in metadata or not table.schema.equals(SCHEMA):
+        return None
+    return table, json.loads(metadata[_METADATA_KEY])
+
+
+def load_snapshot(csv_path: Path) -> pa.Table | None:
+    """Rows of the CSV from its snapshot, None if missing or stale.
+
+    The CSV stays the source of truth: the snapshot is used only if it was
+    taken from this very file (same inode, dataset version and sampled
+    content). If rows were appended since, only those are parsed from the
+    CSV. Requires the dataset lock.
+    """
+    if not wants_snapshot(csv_path):
+        return None
+    sidecar = _read_sidecar(csv_path)
+    if sidecar is None:
+        return None
+    table, saved = sidecar
+    current = _csv_key(csv_path)
+    if saved == current:
+        return table
+    # Appends keep the inode and dataset version and only add bytes
+    if (
+        saved["version"] != current["version"]
+        or saved["inode"] != current["inode"]
+        or saved["dataset_version"] != current["dataset_version"]
+        or saved["size"] >= current["size"]
+        or saved["sample_hash"] != _sample_hash(csv_path, saved["size"])
+    ):
+        return None
+    tail = read_track_pairs_range(csv_path, saved["size"], current["size"])
+    table = pa.concat_tables([table, table_from_pairs(tail)])
+    if len(tail) >= max(
+        REFRESH_TAIL_ROWS, REFRESH_TAIL_FRACTION * (table.num_rows - len(tail))
+    ):
+        write_snapshot(csv_path, table)
+    return table
@@ -0,0 +1,320 @@
+import os
+import struct
+from collections.abc import Iterator
+from dataclasses import dataclass
+from itertools import batched
+from pathlib import Path
+from typing import TYPE_CHECKING
+from typing import TypedDict
+
+import numpy as np
+import numpy.typing as npt
+
+from spotify_assistant.models.tracks import TrackPair
+from spotify_assistant.services.csv_rows import build_row_offsets
+from spotify_assistant.services.csv_rows import ensure_csv_exists
+from spotify_assistant.services.csv_rows import read_track_pairs_at
+from spotify_assistant.services.csv_rows import read_track_pairs_range
+from spotify_assistant.services.dataset_lock import dataset_lock
+from spotify_assistant.services.dataset_lock import get_dataset_version
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Sidecar layout: header, row offsets (rows + 1 x uint64), status codes (rows x uint8)
+_MAGIC = b"SAST"
+# magic, format version, CSV inode, mtime_ns, size, dataset version, rows
+_HEADER = struct.Struct("<4sHxxQqQQQ")
+_VERSION = 1
+
+# Status code bits: 2 per has_spotify flag (0 unknown, 1 found, 2 not found)
+# and 1 for in_playlist
+_FLAG_CODES = {None: 0, True: 1, False: 2}
+_ORIGINAL_SHIFT = 2
+_IN_PLAYLIST_BIT = 1 << 4
+
+type Identity = tuple[int, int, int]  # inode, mtime_ns, size of the CSV
+
+
+@dataclass
+class StatusIndex:
+    """Row offsets and packed statuses of a CSV, valid for one file identity."""
+
+    identity: Identity
+    dataset_version: int  # see dataset_lock.get_dataset_version
+    offsets: npt.NDArray[np.uint64]  # row start offsets + end of the last row
+    codes: npt.NDArray[np.uint8]  # one status code per row
+
+
+class StatusCounts(TypedDict):
+    rows: int
+    pending: int  # rows a build would process (see is_pending)
+    in_playlist: int
+    unchecked: int  # neither track searched yet
+    not_found: int  # either track not found
+    brazilian_found: int
+    brazilian_not_found: int
+    original_found: int
+    original_not_found: int
+
+
+# In-memory copy of the sidecars, by CSV path
+_indexes: dict[Path, StatusIndex] = {}
+
+
+def status_index_path(csv_path: Path) -> Path:
+    """Sidecar next to the CSV, like its lock file."""
+    return csv_path.with_name(f"{csv_path.name}.status")
+
+
+def status_code(pair: TrackPair) -> int:
+    return (
+        _FLAG_CODES[pair["brazilian_has_spotify"]]
+        | _FLAG_CODES[pair["original_has_spotify"]] << _ORIGINAL_SHIFT
+        | (_IN_PLAYLIST_BIT if pair["in_playlist"] else 0)
+    )
+
+
+def csv_identity(csv_path: Path) -> Identity:
+    stat = csv_path.stat()
+    return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+
+def _pack_header(index: StatusIndex) -> bytes:
+    return _HEADER.pack(
+        _MAGIC, _VERSION, *index.identity, index.dataset_version, len(index.codes)
+    )
+
+
+def _read_sidecar(csv_path: Path) -> StatusIndex | None:
+    path = status_index_path(csv_path)
+    try:
+        data = path.read_bytes()
+    except FileNotFoundError:
+        return None
+    if len(data) < _HEADER.size:
+        return None
+    magic, version, inode, mtime_ns, size, dataset_version, rows = _HEADER.unpack_from(
+        data
+    )
+    offsets_end = _HEADER.size + (rows + 1) * 8
+    if magic != _MAGIC or version != _VERSION or len(data) != offsets_end + rows:
+        return None
+    return StatusIndex(
+        identity=(inode, mtime_ns, size),
+        dataset_version=dataset_version,
+        offsets=np.frombuffer(data, np.uint64, rows + 1, _HEADER.size).copy(),
+        codes=np.frombuffer(data, np.uint8, rows, offsets_end).copy(),
+    )
+
+
+def _write_sidecar(csv_path: Path, index: StatusIndex) -> None:
+    path = status_index_path(csv_path)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with tmp_path.open("wb") as f:
+        f.write(_pack_header(index))
+        f.write(index.offsets.astype("<u8").tobytes())
+        f.write(index.codes.tobytes())
+    tmp_path.replace(path)
+
+
+def _codes_of(pairs: list[TrackPair]) -> npt.NDArray[np.uint8]:
+    return np.fromiter((status_code(pair) for pair in pairs), np.uint8, len(pairs))
+
+
+def _rebuild(csv_path: Path, previous: StatusIndex | None) -> StatusIndex:
+    """Index the CSV, parsing only appended rows when the file just grew.
+
+    Rewrites and status patches bump the dataset version, so a file that only
+    grew on the same inode and version was appended to. Requires the dataset
+    lock.
+    """
+    identity = csv_identity(csv_path)
+    dataset_version = get_dataset_version(csv_path)
+    if (
+        previous is not None
+        and previous.identity[0] == identity[0]
+        and previous.dataset_version == dataset_version
+        and int(previous.offsets[-1]) < identity[2]
+    ):
+        offsets = build_row_offsets(csv_path, int(previous.offsets[-1]))
+        pairs = read_track_pairs_range(csv_path, offsets[0], offsets[-1])
+        return StatusIndex(
+            identity=identity,
+            dataset_version=dataset_version,
+            offsets=np.concatenate(
+                [previous.offsets[:-1], np.array(offsets, np.uint64)]
+            ),
+            codes=np.concatenate([previous.codes, _codes_of(pairs)]),
+        )
+    offsets = build_row_offsets(csv_path)
+    pairs = read_track_pairs_range(csv_path, offsets[0], offsets[-1])
+    return StatusIndex(
+        identity=identity,
+        dataset_version=dataset_version,
+        offsets=np.array(offsets, np.uint64),
+        codes=_codes_of(pairs),
+    )
+
+
+def _is_current(
+    index: StatusIndex | None, identity: Identity, dataset_version: int
+) -> bool:
+    return (
+        index is not None
+        and index.identity == identity
+        and index.dataset_version == dataset_version
+    )
+
+
+def load_status_index(csv_path: Path) -> StatusIndex:
+    """Status index of the CSV, refreshed (and persisted) if the file changed.
+
+    The index must match both the file identity and the dataset version: a
+    status patch by another process can leave inode, mtime and size as they
+    were.
+    """
+    ensure_csv_exists(csv_path)
+    with dataset_lock(csv_path):
+        identity = csv_identity(csv_path)
+        dataset_version = get_dataset_version(csv_path)
+        index = _indexes.get(csv_path)
+        if not _is_current(index, identity, dataset_version):
+            index = _read_sidecar(csv_path)
+        if index is None or not _is_current(index, identity, dataset_version):
+            index = _rebuild(csv_path, index)
+            _write_sidecar(csv_path, index)
+        _indexes[csv_path] = index
+        return index
+
+
+def record_status_patch(
+    csv_path: Path, row: int, pair: TrackPair, before: Identity
+) -> None:
+    """Keep the index in sync after the status cells of one row were patched.
+
+    `before` is the CSV identity prior to the patch: an index of another state
+    of the file is dropped and rebuilt on next load. Call it under the
+    exclusive dataset lock, after the version bump.
+    """
+    index = _indexes.get(csv_path) or _read_sidecar(csv_path)
+    if index is None or index.identity != before:
+        # Stale already: make sure the next load does not extend it incrementally
+        _indexes.pop(csv_path, None)
+        status_index_path(csv_path).unlink(missing_ok=True)
+        return
+    code = status_code(pair)
+    index.codes[row] = code
+    index.identity = csv_identity(csv_path)
+    index.dataset_version = get_dataset_version(csv_path)
+    _indexes[csv_path] = index
+
+    path = status_index_path(csv_path)
+    fd = os.open(path, os.O_WRONLY)
+    try:
+        header = _pack_header(index)
+        os.pwrite(fd, header, 0)
+        os.pwrite(fd, bytes([code]), _HEADER.size + len(index.offsets) * 8 + row)
+    finally:
+        os.close(fd)
+
+
+def record_rewrite(csv_path: Path, pairs: list[TrackPair]) -> None:
+    """Index a CSV just rewritten from pairs, without parsing it back."""
+    record_rewrite_codes(csv_path, _codes_of(pairs))
+
+
+def record_rewrite_codes(csv_path: Path, codes: npt.NDArray[np.uint8]) -> None:
+    """Index a CSV just rewritten, given the status code of every row.
+
+    Only row boundaries are scanned. Call it under the exclusive dataset
+    lock, after the version bump.
+    """
+    index = StatusIndex(
+        identity=csv_identity(csv_path),
+        dataset_version=get_dataset_version(csv_path),
+        offsets=np.array(build_row_offsets(csv_path), np.uint64),
+        codes=codes.astype(np.uint8),
+    )
+    _write_sidecar(csv_path, index)
+    _indexes[csv_path] = index
+
+
+def status_codes_of_frame(df: "pd.DataFrame") -> npt.NDArray[np.uint8]:
+    """status_code of every row of a track pairs DataFrame, vectorized.
+
+    Status columns are nullable booleans, NA meaning unknown.
+    """
+
+    def flag_codes(column: str) -> npt.NDArray[np.uint8]:
+        known = df[column].notna().to_numpy()
+        found = df[column].fillna(False).to_numpy(bool)
+        codes = np.where(found, _FLAG_CODES[True], _FLAG_CODES[False])
+        return np.where(known, codes, _FLAG_CODES[None]).astype(np.uint8)
+
+    in_playlist = df["in_playlist"].fillna(False).to_numpy(bool)
+    codes = (
+        flag_codes("brazilian_has_spotify")
+        | flag_codes("original_has_spotify") << _ORIGINAL_SHIFT
+        | np.where(in_playlist, _IN_PLAYLIST_BIT, 0)
+    )
+    return codes.astype(np.uint8)
+
+
+def _pending_mask(codes: npt.NDArray[np.uint8]) -> npt.NDArray[np.bool_]:
+    brazilian = codes & 3
+    original = (codes >> _ORIGINAL_SHIFT) & 3
+    return (
+        ((codes & _IN_PLAYLIST_BIT) == 0)
+        & (brazilian != _FLAG_CODES[False])
+        & (original != _FLAG_CODES[False])
+    )
+
+
+def pending_rows(csv_path: Path) -> list[int]:
+    """Indices of the rows still to search or add, without parsing the CSV."""
+    return np.flatnonzero(_pending_mask(load_status_index(csv_path).codes)).tolist()
+
+
+def iter_pending_pairs(
+    csv_path: Path, chunk_size: int = 1024
+) -> Iterator[tuple[int, TrackPair]]:
+    """(row index, pair) of the pending rows; only those rows are read.
+
+    Rows come from the file the index describes, kept open: a rewrite meanwhile
+    replaces the CSV without moving them, and status patches and appends keep
+    their offsets. Rows are read a chunk at a time under the shared lock, so
+    writers (e.g. status patches of the rows already yielded) can run in
+    between.
+    """
+    with dataset_lock(csv_path):
+        index = load_status_index(csv_path)
+        f = csv_path.open("rb")
+    with f:
+        rows = np.flatnonzero(_pending_mask(index.codes)).tolist()
+        for chunk in batched(rows, chunk_size, strict=False):
+            with dataset_lock(csv_path):
+                pairs = read_track_pairs_at(f, chunk, index.offsets)
+            yield from zip(chunk, pairs, strict=True)
+
+
+def get_status_counts(csv_path: Path) -> StatusCounts:
+    """Row counts per status, from the index only."""
+    codes = load_status_index(csv_path).codes
+    brazilian = codes & 3
+    original = (codes >> _ORIGINAL_SHIFT) & 3
+    return StatusCounts(
+        rows=len(codes),
+        pending=int(np.count_nonzero(_pending_mask(codes))),
+        in_playlist=int(np.count_nonzero(codes & _IN_PLAYLIST_BIT)),
+        unchecked=int(np.count_nonzero((brazilian == 0) & (original == 0))),
+        not_found=int(
+            np.count_nonzero(
+                (brazilian == _FLAG_CODES[False]) | (original == _FLAG_CODES[False])
+            )
+        ),
+        brazilian_found=int(np.count_nonzero(brazilian == _FLAG_CODES[True])),
+        brazilian_not_found=int(np.count_nonzero(brazilian == _FLAG_CODES[False])),
+        original_found=int(np.count_nonzero(original == _FLAG_CODES[True])),
+        original_not_found=int(np.count_nonzero(original == _FLAG_CODES[False])),
+    )
@@ -0,0 +1,161 @@
+import hashlib
+import json
+import threading
+from pathlib import Path
+
+from loguru import logger
+
+from spotify_assistant.exceptions import CSVError
+from spotify_assistant.models.tracks import TrackPair
+from spotify_assistant.models.tracks import WatchCursor
+from spotify_assistant.services.csv_rows import build_row_offsets
+from spotify_assistant.services.csv_rows import ensure_csv_exists
+from spotify_assistant.services.csv_rows import read_track_pairs_at
+from spotify_assistant.services.csv_rows import read_track_pairs_range
+from spotify_assistant.services.dataset_lock import dataset_lock
+from spotify_assistant.services.pipeline import PipelineConfig
+from spotify_assistant.services.playlist_builder import ProcessResult
+from spotify_assistant.services.playlist_builder import iter_build_playlist
+from spotify_assistant.services.retry_queue import is_queued
+from spotify_assistant.services.status_index import load_status_index
+from spotify_assistant.settings import settings
+
+FINGERPRINT_BYTES = 256
+
+
+def _fingerprint(csv_path: Path, offset: int) -> str:
+    """Hash of the bytes right before offset (the end of the last processed row)."""
+    start = max(0, offset - FINGERPRINT_BYTES)
+    with csv_path.open("rb") as f:
+        f.seek(start)
+        return hashlib.sha1(f.read(offset - start)).hexdigest()
+
+
+def load_watch_cursors() -> dict[str, WatchCursor]:
+    path = settings.watch_cursors_path
+    if not path.exists():
+        return {}
+    cursors: dict[str, WatchCursor] = json.loads(path.read_text("utf-8"))
+    return cursors
+
+
+def _save_watch_cursor(csv_path: Path, cursor: WatchCursor) -> None:
+    cursors = load_watch_cursors()
+    cursors[str(csv_path)] = cursor
+    path = settings.watch_cursors_path
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp")
+    tmp_path.write_text(json.dumps(cursors, indent=2), "utf-8")
+    tmp_path.replace(path)
+
+
+def _resume_position(csv_path: Path, cursor: WatchCursor | None) -> tuple[int, int]:
+    """(row index, byte offset) of the first unprocessed row.
+
+    Appends leave the bytes before the cursor untouched, so the committed
+    offset is reused. If the file was rewritten (fingerprint mismatch) the row
+    is located again by index with a full boundary scan.
+    """
+    if cursor is None:
+        return 0, build_row_offsets(csv_path)[0]
+    size = csv_path.stat().st_size
+    if cursor["offset"] <= size and cursor["fingerprint"] == _fingerprint(
+        csv_path, cursor["offset"]
+    ):
+        return cursor["row_index"], cursor["offset"]
+    offsets = build_row_offsets(csv_path)
+    row_index = min(cursor["row_index"], len(offsets) - 1)
+    return row_index, offsets[row_index]
+
+
+def _read_retry_rows(csv_path: Path, rows: list[int]) -> list[tuple[int, TrackPair]]:
+    """(row index, pair) of rows before the cursor still in the retry queue."""
+    if not rows:
+        return []
+    with dataset_lock(csv_path):
+        index = load_status_index(csv_path)
+        rows = [row for row in rows if row < len(index.codes)]
+        with csv_path.open("rb") as f:
+            pairs = read_track_pairs_at(f, rows, index.offsets)
+    return [
+        (row, pair) for row, pair in zip(rows, pairs, strict=True) if is_queued(pair)
+    ]
+
+
+def process_new_rows(
+    csv_path: Path, playlist_id: str, config: PipelineConfig | None = None
+) -> list[ProcessResult]:
+    """Run the build pipeline on the rows added since the committed cursor.
+
+    Only the tail is read and parsed; the cursor is committed afterwards. On the
+    first call for a file every row is considered new. A last row without its
+    newline yet is left for the next call. Rows whose processing raised stay
+    in the cursor and are retried once their backoff is over (see
+    retry_queue.is_deferred).
+    """
+    ensure_csv_exists(csv_path)
+    cursor = load_watch_cursors().get(str(csv_path))
+    retry_rows = cursor.get("retry_rows", []) if cursor is not None else []
+    stat = csv_path.stat()
+    if (
+        cursor is not None
+        and not retry_rows
+        and cursor["offset"] == stat.st_size
+        and cursor["mtime_ns"] == stat.st_mtime_ns
+    ):
+        return []
+
+    retries = _read_retry_rows(csv_path, retry_rows)
+    row_index, start = _resume_position(csv_path, cursor)
+    tail_offsets = build_row_offsets(csv_path, start)
+    pairs = read_track_pairs_range(csv_path, start, tail_offsets[-1])
+    rows = [*retries, *enumerate(pairs, start=row_index)]
+    results = list(iter_build_playlist(csv_path, playlist_id, config, rows=rows))
+
+    # In-place status patches keep row boundaries; anything else (a fallback
+    # rewrite, a concurrent writer) means the offset has to be found again.
+    next_index = row_index + len(pairs)
+    end = tail_offsets[-1]
+    if csv_path.stat().st_size != stat.st_size:
+        end = build_row_offsets(csv_path)[next_index]
+    _save_watch_cursor(
+        csv_path,
+        WatchCursor(
+            row_index=next_index,
+            offset=end,
+            fingerprint=_fingerprint(csv_path, end),
+            mtime_ns=csv_path.stat().st_mtime_ns,
+            retry_rows=[idx for idx, pair in rows if is_queued(pair)],
+        ),
+    )
+    return results
+
+
+def watch_csvs(
+    targets: dict[Path, str],
+    poll_interval: float | None = None,
+    stop: threading.Event | None = None,
+) -> None:
+    """Daemon loop: poll each CSV (path -> playlist id) and process new rows.
+
+    The Spotify client, OAuth token and search caches are module-level, so they
+    stay warm between polls. Runs until `stop` is set (or KeyboardInterrupt).
+    """
+    stop = stop or threading.Event()
+    interval = settings.WATCH_POLL_INTERVAL if poll_interval is None else poll_interval
+    logger.info(f"Watching {len(targets)} CSV(s) every {interval}s")
+    while not stop.is_set():
+        for csv_path, playlist_id in targets.items():
+            try:
+                results = process_new_rows(csv_path, playlist_id)
+            except (CSVError, OSError) as error:
+                logger.error(f"Cannot process {csv_path}: {error}")
+                continue
+            if results:
+                added = sum(res["added_to_playlist"] for res in results)
+                errors = sum(res["error"] is not None for res in results)
+                logger.info(
+                    f"{csv_path.name}: {len(results)} new pairs, "
+                    f"{added} added, {errors} queued for retry"
+                )
+        stop.wait(interval)
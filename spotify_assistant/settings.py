@@ -1,5 +1,8 @@
 from pathlib import Path
+from typing import Annotated
+from typing import Literal
 
+from pydantic import Field
 from pydantic_settings import BaseSettings
 from pydantic_settings import SettingsConfigDict
 
@@ -13,6 +16,54 @@ class Settings(BaseSettings):
     TRACK_PAIRS_FILENAME: str  # "forro_pairs.csv"
     TARGET_PLAYLIST_ID: str
 
+    SPOTIFY_REQUEST_DELAY: float = 0.1  # seconds between API calls
+    # Record Web API responses to a cassette, or replay them with no network
+    SPOTIFY_CASSETTE_MODE: Literal["off", "record", "replay"] = "off"
+    SPOTIFY_CASSETTE_PATH: Path = Path("cassettes/spotify.json.gz")
+    SPOTIFY_CASSETTE_LATENCY: float = 0.0  # seconds added to each replayed call
+
+    RETRY_MAX_ATTEMPTS: int = 5  # failed attempts before a pair is dead-lettered
+    RETRY_BASE_DELAY: float = 60.0  # seconds, doubled after every failed attempt
+
+    PIPELINE_READ_QUEUE_SIZE: int = 256  # rows read ahead of the search stage
+    PIPELINE_SEARCH_WORKERS: int = 4
+    PIPELINE_SEARCH_QUEUE_SIZE: int = 16  # pairs in flight in the search stage
+    PIPELINE_WRITE_BATCH_SIZE: int = 50  # pairs per playlist add call (100 URIs)
+
+    # Spotify calls allowed per UTC day across runs, None for no limit
+    DAILY_SEARCH_QUOTA: int | None = None
+    DAILY_WRITE_QUOTA: int | None = None
+
+    # Pairs per playlist volume, None for a single playlist. Spotify caps a
+    # playlist at 10,000 items (5,000 pairs); volumes 2..N are created on demand
+    PLAYLIST_SHARD_PAIRS: Annotated[int, Field(ge=1, le=5000)] | None = None
+    PLAYLIST_SHARD_NAME: str = "{name} Vol. {volume}"  # name of volumes 2..N
+
+    WATCH_POLL_INTERVAL: float = 0.25  # seconds between CSV change checks
+
+    INGEST_FLUSH_INTERVAL: float = 0.5  # seconds between write-behind flushes
+    INGEST_FLUSH_BATCH_SIZE: int = 500  # accepted pairs that trigger an early flush
+    INGEST_RESOLVE_ON_ADD: bool = False  # search new pairs on Spotify right away
+    # Same for pairs added with csv_manager.append_track_pair
+    RESOLVE_ON_APPEND: bool = False
+    LOG_LEVEL: str = "INFO"  # DEBUG adds one line per searched track
+    LOG_PROGRESS_EVERY: int = 100  # rows between progress lines of a run
+
+    API_HOST: str = "127.0.0.1"
+    API_PORT: int = 8000
+
+    STATE_DIR: Path = Path("state")  # local caches and indexes, not versioned
+    SEARCH_CACHE_FILENAME: str = "search_cache.sqlite3"
+    # CSVs this large keep an Arrow copy of their rows for fast loads (None: off)
+    DATASET_SNAPSHOT_MIN_BYTES: int | None = 1024 * 1024
+    SEARCH_CACHE_MEMORY_SIZE: int = 50_000  # entries kept in the in-memory LRU tier
+    SEARCH_CANDIDATES: int = 5  # results per search call, scored locally (max 50)
+    SEARCH_MIN_CONFIDENCE: float = 0.6  # below, the best candidate goes to review
+    # Cached "not found" searches are retried after this (None: never)
+    SEARCH_CACHE_MISS_TTL_DAYS: float | None = 30.0
+    # Exported searches older than this are left out (None keeps them all)
+    SEARCH_CACHE_EXPORT_TTL_DAYS: float | None = 90.0
+
     model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8")
 
     @property
@@ -20,5 +71,55 @@ class Settings(BaseSettings):
         """Get the full path to the track pairs CSV file."""
         return self.DATA_DIR / self.TRACK_PAIRS_FILENAME
 
+    @property
+    def search_cache_path(self) -> Path:
+        """Get the full path to the search cache database."""
+        return self.STATE_DIR / self.SEARCH_CACHE_FILENAME
+
+    @property
+    def retry_queue_path(self) -> Path:
+        """Get the full path to the retry queue of errored track pairs."""
+        return self.STATE_DIR / "retry_queue.json"
+
+    @property
+    def global_index_path(self) -> Path:
+        """Get the full path to the cross-genre index of all CSVs in DATA_DIR."""
+        return self.STATE_DIR / "global_index.sqlite3"
+
+    @property
+    def watch_cursors_path(self) -> Path:
+        """Get the full path to the committed offsets of watched CSVs."""
+        return self.STATE_DIR / "watch_cursors.json"
+
+    @property
+    def dead_letters_path(self) -> Path:
+        """Get the full path to the track pairs that exhausted their retries."""
+        return self.STATE_DIR / "dead_letters.jsonl"
+
+    @property
+    def unsaved_rows_path(self) -> Path:
+        """Get the full path to run results that could not be saved to the CSV."""
+        return self.STATE_DIR / "unsaved_rows.csv"
+
+    @property
+    def search_review_path(self) -> Path:
+        """Get the full path to the low-confidence search matches to review."""
+        return self.STATE_DIR / "search_review.jsonl"
+
+    @property
+    def enrichment_path(self) -> Path:
+        """Get the full path to the columnar store of track metadata."""
+        return self.STATE_DIR / "enrichment.parquet"
+
+    @property
+    def playlist_shards_path(self) -> Path:
+        """Get the full path to the pair to playlist volume mapping."""
+        return self.STATE_DIR / "playlist_shards.sqlite3"
+
+    @property
+    def quota_ledger_path(self) -> Path:
+        """Get the full path to the daily Spotify API call counts."""
+        return self.STATE_DIR / "quota_ledger.json"
+
 
 settings = Settings()  # type: ignore
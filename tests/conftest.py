@@ -0,0 +1,75 @@
+from collections.abc import Callable
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from spotify_assistant.clients.quota import reset_quota_ledger
+from spotify_assistant.clients.search_cache import close_search_cache
+from spotify_assistant.models.spotify import SpotifyTrack
+from spotify_assistant.models.tracks import TrackPair
+from spotify_assistant.normalization import reset_variant_stats
+from spotify_assistant.services.global_index import close_global_index
+from spotify_assistant.services.resolver import close_background_resolver
+from spotify_assistant.services.retry_queue import reset_retry_queue
+from spotify_assistant.services.shards import close_playlist_shards
+from spotify_assistant.settings import settings
+
+
+@pytest.fixture(autouse=True)
+def isolated_state_dir(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> Iterator[Path]:
+    """Point local caches and indexes at a temporary directory."""
+    state_dir = tmp_path / "state"
+    monkeypatch.setattr(settings, "STATE_DIR", state_dir)
+    reset_variant_stats()
+    reset_retry_queue()
+    reset_quota_ledger()
+    yield state_dir
+    close_background_resolver()
+    close_search_cache()
+    close_global_index()
+    close_playlist_shards()
+
+
+@pytest.fixture
+def make_pair() -> Callable[..., TrackPair]:
+    """Factory of pending pairs named BA/BT/OA/OT <name>; keywords override fields."""
+
+    def factory(name: str = "", **fields: Any) -> TrackPair:
+        pair = TrackPair(
+            brazilian_artist=f"BA {name}",
+            brazilian_track=f"BT {name}",
+            original_artist=f"OA {name}",
+            original_track=f"OT {name}",
+            added_at=None,
+            source=None,
+            brazilian_has_spotify=None,
+            original_has_spotify=None,
+            in_playlist=False,
+        )
+        pair.update(fields)  # type: ignore[typeddict-item]
+        return pair
+
+    return factory
+
+
+@pytest.fixture
+def fake_search() -> Callable[[str, str], SpotifyTrack | None]:
+    """search_track stand-in: finds every track (ID = its name) unless the name
+    contains "notfound"."""
+
+    def search(track_name: str, artist: str) -> SpotifyTrack | None:
+        if "notfound" in track_name.lower():
+            return None
+        return SpotifyTrack(
+            id=track_name,
+            name=track_name,
+            artist=artist,
+            uri=f"spotify:track:{track_name}",
+            url=f"https://open.spotify.com/track/{track_name}",
+        )
+
+    return search
@@ -0,0 +1,73 @@
+import pytest
+
+pytest.importorskip("fastapi")
+
+from fastapi.testclient import TestClient
+
+from spotify_assistant.api import create_app
+from spotify_assistant.services.csv_manager import read_track_pairs
+
+PAIR = {
+    "brazilian_artist": "Falamansa",
+    "brazilian_track": "Xote dos Milagres",
+    "original_artist": "Someone",
+    "original_track": "Miracles",
+    "source": "https://example.com",
+}
+
+
+@pytest.fixture
+def csv_path(tmp_path):
+    return tmp_path / "track_pairs.csv"
+
+
+@pytest.fixture
+def client(csv_path):
+    with TestClient(create_app(csv_path, resolve=False)) as client:
+        yield client
+
+
+def test_post_track_pair_when_valid_payload(client, csv_path):
+    response = client.post("/track-pairs", json=PAIR)
+
+    assert response.status_code == 202
+    assert response.json()["brazilian_track"] == "Xote dos Milagres"
+    assert response.json()["in_playlist"] is False
+
+
+def test_post_track_pair_when_duplicate(client):
+    client.post("/track-pairs", json=PAIR)
+    response = client.post("/track-pairs", json=PAIR)
+
+    assert response.status_code == 409
+
+
+def test_post_track_pair_when_empty_field(client):
+    response = client.post("/track-pairs", json={**PAIR, "brazilian_artist": ""})
+
+    assert response.status_code == 422
+    assert "Brazilian artist" in response.json()["detail"]
+
+
+def test_post_track_pairs_batch_reports_each_pair(client):
+    response = client.post("/track-pairs/batch", json=[PAIR, PAIR])
+
+    assert response.status_code == 200
+    assert [res["status"] for res in response.json()] == ["accepted", "duplicate"]
+
+
+def test_get_stats(client):
+    client.post("/track-pairs", json=PAIR)
+    response = client.get("/stats")
+
+    assert response.status_code == 200
+    assert response.json()["rows"] == 1
+
+
+def test_create_app_flushes_pending_pairs_on_shutdown(csv_path):
+    with TestClient(create_app(csv_path, resolve=False)) as client:
+        client.post("/track-pairs", json=PAIR)
+
+    assert [pair["original_track"] for pair in read_track_pairs(csv_path)] == [
+        "Miracles"
+    ]
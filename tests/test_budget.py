@@ -0,0 +1,149 @@
+import json
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+from spotify_assistant.clients.quota import flush_quota_ledger
+from spotify_assistant.clients.quota import get_daily_usage
+from spotify_assistant.clients.quota import record_api_call
+from spotify_assistant.clients.quota import reset_quota_ledger
+from spotify_assistant.clients.search_cache import set_cached_search
+from spotify_assistant.normalization import canonical_key
+from spotify_assistant.services.budget import create_run_budget
+from spotify_assistant.services.budget import prioritize_rows
+from spotify_assistant.services.csv_manager import read_track_pairs
+from spotify_assistant.services.csv_manager import write_track_pairs
+from spotify_assistant.services.pipeline import PipelineConfig
+from spotify_assistant.services.playlist_builder import build_playlist_from_csv
+from spotify_assistant.services.retry_queue import get_retry_entries
+from spotify_assistant.settings import settings
+
+SERIAL = PipelineConfig(
+    read_queue_size=4, search_workers=1, search_queue_size=1, write_batch_size=1
+)
+ARTISTS = {"brazilian_artist": "A", "original_artist": "C"}
+
+
+def fake_client() -> MagicMock:
+    def search(q, type, limit):
+        track_id = q.replace(" ", "_")
+        name, _, artist = q.removeprefix("track:").partition(" artist:")
+        return {
+            "tracks": {
+                "items": [
+                    {
+                        "id": track_id,
+                        "name": name,
+                        "artists": [{"name": artist}],
+                        "uri": f"spotify:track:{track_id}",
+                        "external_urls": {"spotify": f"https://x/{track_id}"},
+                    }
+                ]
+            }
+        }
+
+    client = MagicMock()
+    client.search.side_effect = search
+    return client
+
+
+def test_prioritize_rows_puts_never_checked_first_then_oldest(make_pair) -> None:
+    """Test that unsearched pairs come first, then pairs checked longest ago."""
+    rows = list(
+        enumerate(
+            [
+                make_pair(brazilian_track="Recent", original_track="Song", **ARTISTS),
+                make_pair(brazilian_track="Never", original_track="Checked", **ARTISTS),
+                make_pair(brazilian_track="Old", original_track="Song", **ARTISTS),
+            ]
+        )
+    )
+    set_cached_search(canonical_key("Old", "A"), None)
+    set_cached_search(canonical_key("Song", "C"), None)
+    set_cached_search(canonical_key("Recent", "A"), None)
+
+    assert [idx for idx, _ in prioritize_rows(rows)] == [1, 2, 0]
+
+
+def test_build_playlist_from_csv_when_search_budget_spent_stops_cleanly(
+    tmp_path, make_pair
+):
+    """Test that the run stops at the search budget with finished rows saved."""
+    csv_path = tmp_path / "pairs.csv"
+    write_track_pairs(csv_path, [make_pair(str(i)) for i in range(5)])
+    budget = create_run_budget(max_search_calls=4)
+
+    with patch(
+        "spotify_assistant.clients.spotify.get_spotify_client",
+        return_value=fake_client(),
+    ):
+        results = build_playlist_from_csv(csv_path, "playlist", SERIAL, budget)
+
+    assert budget.exhausted == "search calls"
+    assert len(results) == 2
+    in_playlist = [pair["in_playlist"] for pair in read_track_pairs(csv_path)]
+    assert in_playlist == [True, True, False, False, False]
+    ledger = json.loads(settings.quota_ledger_path.read_text("utf-8"))
+    assert list(ledger.values()) == [{"search_calls": 4, "write_calls": 2}]
+
+
+def test_build_playlist_from_csv_when_pairs_in_flight_never_overshoots_searches(
+    tmp_path,
+    make_pair,
+):
+    """Test that searches past the budget are refused, leaving their pairs pending."""
+    csv_path = tmp_path / "pairs.csv"
+    write_track_pairs(csv_path, [make_pair(str(i)) for i in range(8)])
+    budget = create_run_budget(max_search_calls=3)
+    wide = PipelineConfig(
+        read_queue_size=8, search_workers=4, search_queue_size=8, write_batch_size=8
+    )
+    client = fake_client()
+
+    with patch(
+        "spotify_assistant.clients.spotify.get_spotify_client", return_value=client
+    ):
+        results = build_playlist_from_csv(csv_path, "playlist", wide, budget)
+
+    assert budget.exhausted == "search calls"
+    assert client.search.call_count == 3
+    pairs = read_track_pairs(csv_path)
+    # Concurrent workers may spend the 3 calls on different pairs
+    assert sum(pair["in_playlist"] for pair in pairs) == len(results) <= 1
+    assert all(pair["original_has_spotify"] is not False for pair in pairs)
+    assert get_retry_entries() == []
+
+
+def test_build_playlist_from_csv_when_write_budget_spent_keeps_pairs_pending(
+    tmp_path,
+    make_pair,
+):
+    """Test that no pair is started or added once the writes are spent."""
+    csv_path = tmp_path / "pairs.csv"
+    write_track_pairs(csv_path, [make_pair(str(i)) for i in range(3)])
+    budget = create_run_budget(max_write_calls=1)
+    client = fake_client()
+
+    with patch(
+        "spotify_assistant.clients.spotify.get_spotify_client", return_value=client
+    ):
+        build_playlist_from_csv(csv_path, "playlist", SERIAL, budget)
+
+    assert budget.exhausted == "write calls"
+    assert client.playlist_add_items.call_count == 1
+    pairs = read_track_pairs(csv_path)
+    assert [pair["in_playlist"] for pair in pairs] == [True, False, False]
+    assert pairs[1]["brazilian_has_spotify"] is None  # not started
+
+
+def test_create_run_budget_when_daily_quota_applies(monkeypatch):
+    """Test that runs share the daily quota through the persisted ledger."""
+    monkeypatch.setattr(settings, "DAILY_SEARCH_QUOTA", 10)
+    for _ in range(7):
+        record_api_call("search_calls")
+    flush_quota_ledger()
+    reset_quota_ledger()  # as in a new process
+    record_api_call("search_calls")
+
+    assert get_daily_usage()["search_calls"] == 8
+    assert create_run_budget(max_search_calls=5).max_search_calls == 2
+    assert create_run_budget().max_write_calls is None
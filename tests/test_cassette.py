@@ -0,0 +1,107 @@
+import json
+import time
+
+import pytest
+import requests
+from requests.adapters import BaseAdapter
+
+from spotify_assistant.clients import spotify
+from spotify_assistant.clients.cassette import CassetteSession
+from spotify_assistant.clients.cassette import request_key
+from spotify_assistant.clients.spotify import search_track
+from spotify_assistant.exceptions import CassetteMissError
+from spotify_assistant.normalization import query_variants
+from spotify_assistant.settings import settings
+
+SEARCH_URL = "https://api.spotify.com/v1/search"
+
+
+class FakeSpotifyAdapter(BaseAdapter):
+    """Answers every search with Dust in the Wind, counting the requests."""
+
+    def __init__(self):
+        super().__init__()
+        self.sent = 0
+
+    def send(self, request, **kwargs):
+        self.sent += 1
+        item = {
+            "id": "id1",
+            "name": "Dust in the Wind",
+            "artists": [{"name": "Kansas"}],
+            "uri": "spotify:track:id1",
+            "external_urls": {"spotify": "https://open.spotify.com/track/id1"},
+            "external_ids": {"isrc": "USSM17700373"},
+            "album": {"name": "Point of Know Return"},
+            "duration_ms": 203_000,
+        }
+        response = requests.Response()
+        response.status_code = 200
+        response._content = json.dumps({"tracks": {"items": [item]}}).encode()
+        response.url = request.url
+        return response
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def cassette_path(tmp_path, monkeypatch):
+    path = tmp_path / "cassettes" / "spotify.json.gz"
+    monkeypatch.setattr(settings, "SPOTIFY_CASSETTE_PATH", path)
+    monkeypatch.setattr(spotify, "_client", None)
+    return path
+
+
+def record(cassette_path, *queries) -> FakeSpotifyAdapter:
+    session = CassetteSession(cassette_path, "record")
+    adapter = FakeSpotifyAdapter()
+    session.mount("https://", adapter)
+    for query in queries:
+        session.request(
+            "GET",
+            SEARCH_URL,
+            params={
+                "q": query,
+                "limit": settings.SEARCH_CANDIDATES,
+                "offset": 0,
+                "type": "track",
+            },
+        )
+    session.save()
+    return adapter
+
+
+def test_request_key_ignores_query_order():
+    """Test that the same request maps to one key whatever the param order."""
+    assert request_key("get", SEARCH_URL, {"q": "a b", "type": "track"}) == (
+        request_key("GET", f"{SEARCH_URL}?type=track&q=a+b")
+    )
+
+
+def test_search_track_when_replaying_maps_recorded_response(cassette_path, monkeypatch):
+    """Test that the full search path runs offline from a recorded cassette."""
+    _, query = query_variants("Dust in the Wind", "Kansas")[0]
+    adapter = record(cassette_path, query)
+    assert adapter.sent == 1
+    monkeypatch.setattr(settings, "SPOTIFY_CASSETTE_MODE", "replay")
+    monkeypatch.setattr(settings, "SPOTIFY_CASSETTE_LATENCY", 0.05)
+
+    started = time.perf_counter()
+    track = search_track("Dust in the Wind", "Kansas")
+
+    assert time.perf_counter() - started >= 0.05
+    assert track is not None
+    assert track["name"] == "Dust in the Wind"
+    assert track["isrc"] == "USSM17700373"
+    assert track["duration_ms"] == 203_000
+    assert adapter.sent == 1
+
+
+def test_cassette_session_when_replaying_unknown_request_raises(cassette_path):
+    """Test that a request missing from the cassette never reaches the network."""
+    record(cassette_path, "known")
+    session = CassetteSession(cassette_path, "replay")
+
+    with pytest.raises(CassetteMissError):
+        session.request("GET", SEARCH_URL, params={"q": "unknown"})
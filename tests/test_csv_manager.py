@@ -6,14 +6,18 @@ import pytest
 from spotify_assistant.exceptions import CSVFormatError
 from spotify_assistant.exceptions import DuplicateTrackPairError
 from spotify_assistant.models.tracks import TrackPair
-from spotify_assistant.services.csv_manager import TRACK_PAIRS_HEADERS
+from spotify_assistant.services import csv_rows
 from spotify_assistant.services.csv_manager import append_track_pair
-from spotify_assistant.services.csv_manager import ensure_csv_exists
 from spotify_assistant.services.csv_manager import find_duplicate
+from spotify_assistant.services.csv_manager import patch_track_pair_status
 from spotify_assistant.services.csv_manager import read_track_pairs
 from spotify_assistant.services.csv_manager import update_track_pair
 from spotify_assistant.services.csv_manager import validate_track_pair
 from spotify_assistant.services.csv_manager import write_track_pairs
+from spotify_assistant.services.csv_rows import TRACK_PAIRS_HEADERS
+from spotify_assistant.services.csv_rows import build_row_offsets
+from spotify_assistant.services.csv_rows import ensure_csv_exists
+from spotify_assistant.services.csv_rows import read_track_pairs_parallel
 
 
 @pytest.fixture
@@ -312,3 +316,149 @@ def test_update_track_pair_raises_for_invalid_index(
 
     with pytest.raises(IndexError, match="Track pair index -1 out of range"):
         update_track_pair(csv_path, -1, sample_pair)
+
+
+def test_build_row_offsets_handles_quoted_newlines(csv_path: Path) -> None:
+    """Test that newlines and commas inside quoted fields do not split rows."""
+    pairs: list[TrackPair] = [
+        TrackPair(
+            brazilian_artist="Banda Calypso",
+            brazilian_track="Que Tontos, Que Loucos",
+            original_artist="Multi\nLine",
+            original_track="Track",
+            added_at=None,
+            source=None,
+            brazilian_has_spotify=None,
+            original_has_spotify=None,
+            in_playlist=False,
+        ),
+        TrackPair(
+            brazilian_artist="A",
+            brazilian_track="B",
+            original_artist="C",
+            original_track="D",
+            added_at=None,
+            source=None,
+            brazilian_has_spotify=None,
+            original_has_spotify=None,
+            in_playlist=False,
+        ),
+    ]
+    write_track_pairs(csv_path, pairs)
+
+    offsets = build_row_offsets(csv_path)
+
+    data = csv_path.read_bytes()
+    assert len(offsets) == 3
+    assert offsets[-1] == len(data)
+    assert data[offsets[1] : offsets[2]].startswith(b"A,B,C,D")
+
+
+def test_read_track_pairs_parallel_matches_serial_read(csv_path: Path) -> None:
+    """Test that chunked parsing keeps row order and quoted commas/newlines."""
+    pairs = [
+        TrackPair(
+            brazilian_artist="Banda Calypso",
+            brazilian_track=f"Que Tontos, Que Loucos {i}",
+            original_artist='Multi\nLine "Live"' if i % 3 == 0 else f"Artist {i}",
+            original_track="Track",
+            added_at=None,
+            source=None,
+            brazilian_has_spotify=i % 2 == 0,
+            original_has_spotify=None,
+            in_playlist=i % 5 == 0,
+        )
+        for i in range(50)
+    ]
+    write_track_pairs(csv_path, pairs, pad_status=True)
+
+    assert read_track_pairs_parallel(csv_path, workers=2) == pairs
+    assert read_track_pairs_parallel(csv_path, workers=2) == read_track_pairs(csv_path)
+
+
+def test_read_track_pairs_parallel_when_quoted_field_fakes_record_end(
+    csv_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Test that chunks are cut without scanning the file, and a quoted field
+    that looks like the end of a record does not split rows."""
+    pairs = [
+        TrackPair(
+            brazilian_artist="Mastruz com Leite",
+            brazilian_track=f"Meu Vaqueiro {i}",
+            original_artist="Fake end,True,False,\nArtist" if i % 4 == 0 else "A",
+            original_track="Track",
+            added_at=None,
+            source=None,
+            brazilian_has_spotify=None,
+            original_has_spotify=True,
+            in_playlist=False,
+        )
+        for i in range(40)
+    ]
+    write_track_pairs(csv_path, pairs)
+
+    def fail(*args):
+        raise AssertionError("whole file scanned")
+
+    monkeypatch.setattr(csv_rows, "build_row_offsets", fail)
+    assert read_track_pairs_parallel(csv_path, workers=2) == pairs
+
+
+def test_read_track_pairs_parallel_raises_for_invalid_headers(csv_path: Path) -> None:
+    """Test that the parallel loader validates headers like read_track_pairs."""
+    csv_path.write_text("wrong,headers\na,b\n", encoding="utf-8")
+
+    with pytest.raises(CSVFormatError, match="Invalid CSV headers"):
+        read_track_pairs_parallel(csv_path, workers=2)
+
+
+def test_update_track_pair_in_place_patches_padded_status(
+    csv_path: Path, sample_pair: TrackPair
+) -> None:
+    """Test that in-place updates keep the file size and only touch status cells."""
+    write_track_pairs(csv_path, [sample_pair, sample_pair], pad_status=True)
+    size_before = csv_path.stat().st_size
+    updated = sample_pair.copy()
+    updated["brazilian_has_spotify"] = True
+    updated["in_playlist"] = True
+
+    assert patch_track_pair_status(csv_path, 1, updated) is True
+
+    assert csv_path.stat().st_size == size_before
+    result = read_track_pairs(csv_path)
+    assert result[0]["brazilian_has_spotify"] is None
+    assert result[0]["in_playlist"] is False
+    assert result[1]["brazilian_has_spotify"] is True
+    assert result[1]["original_has_spotify"] is None
+    assert result[1]["in_playlist"] is True
+
+
+def test_update_track_pair_in_place_falls_back_to_rewrite(
+    csv_path: Path, sample_pair: TrackPair
+) -> None:
+    """Test that unpadded cells or edited fields fall back to a padded rewrite."""
+    write_track_pairs(csv_path, [sample_pair])
+    updated = sample_pair.copy()
+    updated["brazilian_has_spotify"] = True
+
+    assert patch_track_pair_status(csv_path, 0, updated) is False
+    update_track_pair(csv_path, 0, updated, in_place=True)
+
+    assert read_track_pairs(csv_path)[0]["brazilian_has_spotify"] is True
+    renamed = updated.copy()
+    renamed["brazilian_track"] = "Renamed"
+    assert patch_track_pair_status(csv_path, 0, renamed) is False
+    update_track_pair(csv_path, 0, renamed, in_place=True)
+    assert read_track_pairs(csv_path)[0]["brazilian_track"] == "Renamed"
+    assert patch_track_pair_status(csv_path, 0, renamed) is True
+
+
+def test_find_duplicate_ignores_accents_and_punctuation(
+    sample_pair: TrackPair,
+) -> None:
+    """Test that find_duplicate matches spelling variants of the same pair."""
+    variant = sample_pair.copy()
+    variant["brazilian_track"] = "Xote dos Milagres!"
+    variant["original_artist"] = "Dominguínhos"
+
+    assert find_duplicate([variant], sample_pair) is variant
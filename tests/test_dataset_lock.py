@@ -0,0 +1,194 @@
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import pytest
+
+from spotify_assistant import main
+from spotify_assistant.exceptions import StaleDatasetError
+from spotify_assistant.main import load_dataset
+from spotify_assistant.main import save_run
+from spotify_assistant.models.tracks import TrackPair
+from spotify_assistant.services.csv_manager import append_track_pair
+from spotify_assistant.services.csv_manager import read_track_pairs
+from spotify_assistant.services.csv_manager import read_track_pairs_versioned
+from spotify_assistant.services.csv_manager import update_track_pair
+from spotify_assistant.services.csv_manager import update_track_pairs
+from spotify_assistant.services.csv_manager import write_track_pairs
+from spotify_assistant.services.dataset_lock import dataset_lock
+from spotify_assistant.services.dataset_lock import get_dataset_version
+from spotify_assistant.settings import settings
+
+
+@pytest.fixture
+def csv_path(tmp_path: Path) -> Path:
+    return tmp_path / "track_pairs.csv"
+
+
+def test_dataset_lock_when_exclusive_blocks_other_threads(csv_path):
+    acquired = threading.Event()
+
+    def reader():
+        with dataset_lock(csv_path):
+            acquired.set()
+
+    with dataset_lock(csv_path, exclusive=True):
+        thread = threading.Thread(target=reader)
+        thread.start()
+        assert not acquired.wait(0.1)
+    thread.join(timeout=1)
+    assert acquired.is_set()
+
+
+def test_dataset_lock_when_nested_in_same_thread(csv_path):
+    with dataset_lock(csv_path, exclusive=True), dataset_lock(csv_path):
+        pass
+    with (
+        dataset_lock(csv_path),
+        pytest.raises(RuntimeError, match="upgrade"),
+        dataset_lock(csv_path, exclusive=True),
+    ):
+        pass
+
+
+def test_write_track_pairs_replaces_file_atomically(csv_path, make_pair):
+    write_track_pairs(csv_path, [make_pair("1")])
+    inode = csv_path.stat().st_ino
+    with csv_path.open("rb") as old_handle:
+        write_track_pairs(csv_path, [make_pair("2")])
+        assert b"BA 1" in old_handle.read()
+
+    assert csv_path.stat().st_ino != inode
+    assert sorted(p.name for p in csv_path.parent.iterdir()) == [
+        "track_pairs.csv",
+        "track_pairs.csv.lock",
+        "track_pairs.csv.status",
+    ]
+
+
+def test_dataset_version_when_rows_modified_or_appended(csv_path, make_pair):
+    write_track_pairs(csv_path, [make_pair("1")], pad_status=True)
+    version = get_dataset_version(csv_path)
+
+    append_track_pair(csv_path, make_pair("2"))
+    assert get_dataset_version(csv_path) == version
+
+    updated = read_track_pairs(csv_path)[0]
+    updated["in_playlist"] = True
+    update_track_pair(csv_path, 0, updated, in_place=True)
+    assert get_dataset_version(csv_path) == version + 1
+
+
+def test_update_track_pairs_when_stale_version(csv_path, make_pair):
+    write_track_pairs(csv_path, [make_pair("1"), make_pair("2")])
+    pairs, version = read_track_pairs_versioned(csv_path)
+    other_writer = pairs[1].copy()
+    other_writer["original_has_spotify"] = False
+    update_track_pair(csv_path, 1, other_writer)
+
+    pairs[0]["in_playlist"] = True
+    with pytest.raises(StaleDatasetError):
+        update_track_pairs(csv_path, {0: pairs[0]}, expected_version=version)
+    assert read_track_pairs(csv_path)[0]["in_playlist"] is False
+
+
+def test_update_track_pairs_keeps_rows_appended_meanwhile(csv_path, make_pair):
+    write_track_pairs(csv_path, [make_pair("1")])
+    pairs, version = read_track_pairs_versioned(csv_path)
+    append_track_pair(csv_path, make_pair("2"))
+
+    pairs[0]["in_playlist"] = True
+    update_track_pairs(csv_path, {0: pairs[0]}, expected_version=version)
+
+    after = read_track_pairs(csv_path)
+    assert [pair["in_playlist"] for pair in after] == [True, False]
+
+
+def _append_pairs(csv_path: Path, pairs: list[TrackPair]) -> None:
+    for pair in pairs:
+        append_track_pair(csv_path, pair)
+
+
+def _mark_in_playlist(csv_path: Path, rounds: int) -> None:
+    for _ in range(rounds):
+        pairs = read_track_pairs(csv_path)
+        for pair in pairs:
+            pair["in_playlist"] = True
+        update_track_pairs(csv_path, dict(enumerate(pairs)))
+
+
+def test_concurrent_writer_processes_do_not_lose_rows(
+    csv_path, isolated_state_dir, monkeypatch, make_pair
+):
+    """Stress test: appending processes race a process rewriting the file."""
+    monkeypatch.setenv("STATE_DIR", str(isolated_state_dir))
+    writers, pairs_per_writer = 4, 25
+    write_track_pairs(csv_path, [make_pair("seed")], pad_status=True)
+
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=writers + 1, mp_context=context) as pool:
+        futures = [
+            pool.submit(
+                _append_pairs,
+                csv_path,
+                [make_pair(f"{worker}-{i}") for i in range(pairs_per_writer)],
+            )
+            for worker in range(writers)
+        ]
+        futures.append(pool.submit(_mark_in_playlist, csv_path, 20))
+        for future in futures:
+            future.result()
+
+    pairs = read_track_pairs(csv_path)
+    names = {pair["brazilian_artist"] for pair in pairs}
+    assert len(pairs) == len(names) == writers * pairs_per_writer + 1
+    assert pairs[0]["in_playlist"] is True
+
+
+@pytest.fixture
+def dataset_path(tmp_path, monkeypatch, make_pair):
+    monkeypatch.setattr(settings, "DATA_DIR", tmp_path / "data")
+    monkeypatch.setattr(settings, "TRACK_PAIRS_FILENAME", "track_pairs.csv")
+    path = settings.track_pairs_path
+    write_track_pairs(path, [make_pair("1"), make_pair("2")])
+    return path
+
+
+def test_save_run_when_rows_modified_meanwhile_merges_run_statuses(dataset_path):
+    """Test that a run's results survive another writer reordering and
+    editing rows during the run, and the other writer's edit is kept."""
+    df = load_dataset()
+    first, second = read_track_pairs(dataset_path)
+    second["original_has_spotify"] = False
+    write_track_pairs(dataset_path, [second, first])
+    df.loc[0, ["brazilian_has_spotify", "original_has_spotify", "in_playlist"]] = True
+
+    save_run(df, [0])
+
+    second_after, first_after = read_track_pairs(dataset_path)
+    assert first_after == {
+        **first,
+        "brazilian_has_spotify": True,
+        "original_has_spotify": True,
+        "in_playlist": True,
+    }
+    assert second_after == second
+
+
+def test_save_run_when_merge_conflicts_too_keeps_rows_aside(dataset_path, monkeypatch):
+    """Test that run results that cannot be saved are written to the state
+    directory before the conflict is raised."""
+    df = load_dataset()
+    df.loc[1, "in_playlist"] = True
+
+    def stale(df):
+        raise StaleDatasetError("modified")
+
+    monkeypatch.setattr(main, "save_dataset", stale)
+    with pytest.raises(StaleDatasetError):
+        save_run(df, [1])
+
+    assert settings.unsaved_rows_path.read_text("utf-8").splitlines()[1:] == [
+        "BA 2,BT 2,OA 2,OT 2,,,,,True"
+    ]
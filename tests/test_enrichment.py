@@ -0,0 +1,143 @@
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+from spotify_assistant.clients.search_cache import set_cached_search
+from spotify_assistant.models.spotify import SpotifyTrack
+from spotify_assistant.normalization import canonical_key
+from spotify_assistant.services.csv_manager import write_track_pairs
+from spotify_assistant.services.enrichment import enrich_csv
+from spotify_assistant.services.enrichment import enrich_tracks
+from spotify_assistant.services.enrichment import format_duration
+from spotify_assistant.services.enrichment import format_stats_table
+from spotify_assistant.services.enrichment import genre_stats
+from spotify_assistant.services.enrichment import load_enrichment
+
+ARTISTS = {"brazilian_artist": "A", "original_artist": "C"}
+
+
+def make_full_item(track_id: str) -> dict:
+    number = int(track_id[1:])
+    return {
+        "id": track_id,
+        "duration_ms": 200_000 + number,
+        "popularity": 40 + number,
+        "external_ids": {"isrc": f"ISRC{track_id}"},
+        "album": {
+            "release_date": f"{2000 + number}-01-01",
+            "images": [
+                {"url": f"https://i.scdn.co/image/{track_id}-640"},
+                {"url": f"https://i.scdn.co/image/{track_id}-64"},
+            ],
+        },
+    }
+
+
+def cache_track(name: str, artist: str, track_id: str) -> None:
+    set_cached_search(
+        canonical_key(name, artist),
+        SpotifyTrack(
+            id=track_id,
+            name=name,
+            artist=artist,
+            uri=f"spotify:track:{track_id}",
+            url=f"https://open.spotify.com/track/{track_id}",
+        ),
+    )
+
+
+def fake_client() -> MagicMock:
+    client = MagicMock()
+    client.tracks.side_effect = lambda batch: {
+        "tracks": [None if i == "t999" else make_full_item(i) for i in batch]
+    }
+    return client
+
+
+def test_enrich_tracks_fetches_only_missing_ids_in_batches() -> None:
+    """Test that known tracks are not fetched again and calls hold 50 IDs."""
+    client = fake_client()
+    with patch(
+        "spotify_assistant.clients.spotify.get_spotify_client", return_value=client
+    ):
+        assert enrich_tracks([f"t{i}" for i in range(60)]) == 60
+        assert enrich_tracks([f"t{i}" for i in range(70)] + ["t999"]) == 10
+
+    assert [len(c.args[0]) for c in client.tracks.call_args_list] == [50, 10, 11]
+    store = load_enrichment()
+    assert len(store) == 70
+    assert store.loc["t3", "duration_ms"] == 200_003
+    assert store.loc["t3", "popularity"] == 43
+    assert store.loc["t3", "release_date"] == "2003-01-01"
+    assert store.loc["t3", "album_image_url"] == "https://i.scdn.co/image/t3-640"
+    assert str(store["popularity"].dtype) == "Int8"
+
+
+def test_enrich_tracks_when_refresh_refetches_known_ids() -> None:
+    """Test that refresh replaces stored rows instead of duplicating them."""
+    client = fake_client()
+    with patch(
+        "spotify_assistant.clients.spotify.get_spotify_client", return_value=client
+    ):
+        enrich_tracks(["t1", "t2"])
+        assert enrich_tracks(["t1"], refresh=True) == 1
+
+    assert sorted(load_enrichment().index) == ["t1", "t2"]
+
+
+def test_genre_stats_when_offline_sums_playlist_tracks(tmp_path, make_pair) -> None:
+    """Test that stats come from the local stores, counting playlist pairs only."""
+    csv_path = tmp_path / "forro_pairs.csv"
+    write_track_pairs(
+        csv_path,
+        [
+            make_pair(
+                brazilian_track="Dona do Prazer",
+                original_track="Toxic",
+                in_playlist=True,
+                **ARTISTS,
+            ),
+            make_pair(
+                brazilian_track="Anjo",
+                original_track="Halo",
+                in_playlist=True,
+                **ARTISTS,
+            ),
+            make_pair(
+                brazilian_track="Veneno",
+                original_track="Poison",
+                in_playlist=False,
+                **ARTISTS,
+            ),
+        ],
+    )
+    for index, name in enumerate(["Dona do Prazer", "Toxic", "Anjo", "Veneno"]):
+        cache_track(name, "C" if name == "Toxic" else "A", f"t{index + 1}")
+
+    client = fake_client()
+    with patch(
+        "spotify_assistant.clients.spotify.get_spotify_client", return_value=client
+    ):
+        assert enrich_csv(csv_path) == 4
+    client.reset_mock()
+
+    stats = genre_stats(csv_path)
+
+    client.tracks.assert_not_called()
+    assert stats["genre"] == "forro"
+    assert stats["pairs"] == 3
+    assert stats["playlist_tracks"] == 3  # "Halo" was never resolved
+    assert stats["enriched_tracks"] == 3
+    assert stats["duration_ms"] == 600_006
+    assert stats["mean_popularity"] == 42
+    assert stats["first_release"] == "2001-01-01"
+    assert stats["last_release"] == "2003-01-01"
+    assert "| forro | 3 pairs | 3 tracks | ~10 min | 42 |" in format_stats_table(
+        [stats]
+    )
+
+
+def test_format_duration() -> None:
+    """Test README style rounding of durations."""
+    assert format_duration(45 * 60_000) == "~45 min"
+    assert format_duration(65 * 60_000) == "~1 hour"
+    assert format_duration(9 * 3_600_000 + 10 * 60_000) == "~9 hours"
@@ -0,0 +1,112 @@
+from pathlib import Path
+
+import pytest
+
+from spotify_assistant.clients.search_cache import set_cached_search
+from spotify_assistant.models.spotify import SpotifyTrack
+from spotify_assistant.normalization import canonical_key
+from spotify_assistant.services import global_index
+from spotify_assistant.services.csv_manager import append_track_pair
+from spotify_assistant.services.csv_manager import write_track_pairs
+from spotify_assistant.services.global_index import find_by_original_artist
+from spotify_assistant.services.global_index import find_by_spotify_id
+from spotify_assistant.services.global_index import find_covers_of
+from spotify_assistant.services.global_index import find_pair
+from spotify_assistant.services.global_index import originals_covered_across_genres
+from spotify_assistant.services.global_index import update_global_index
+
+
+def songs(brazilian_artist, brazilian_track, original_artist, original_track):
+    return {
+        "brazilian_artist": brazilian_artist,
+        "brazilian_track": brazilian_track,
+        "original_artist": original_artist,
+        "original_track": original_track,
+    }
+
+
+TOXIC_FORRO = songs("Aline Mel", "Dona do Prazer", "Britney Spears", "Toxic")
+TOXIC_BREGA = songs("Banda X", "Veneno", "Britney Spears feat. Y", "Toxic")
+HALO = songs("Banda X", "Anjo", "Beyoncé", "Halo")
+
+
+@pytest.fixture
+def data_dir(tmp_path: Path, make_pair) -> Path:
+    data_dir = tmp_path / "data"
+    write_track_pairs(data_dir / "forro_pairs.csv", [make_pair(**TOXIC_FORRO)])
+    write_track_pairs(
+        data_dir / "brega_pairs.csv", [make_pair(**TOXIC_BREGA), make_pair(**HALO)]
+    )
+    return data_dir
+
+
+def test_update_global_index_when_originals_covered_in_two_genres(data_dir):
+    assert update_global_index(data_dir) == 2
+
+    covered = originals_covered_across_genres()
+    assert list(covered) == [canonical_key("Toxic", "Britney Spears")]
+    assert [
+        entry["genre"] for entry in covered[canonical_key("Toxic", "Britney Spears")]
+    ] == [
+        "brega",
+        "forro",
+    ]
+    assert [e["row"] for e in find_covers_of("toxic", "BRITNEY SPEARS")] == [0, 0]
+    assert [e["original_key"] for e in find_by_original_artist("Beyonce")] == [
+        canonical_key("Halo", "Beyoncé")
+    ]
+
+
+def test_update_global_index_reads_only_appended_rows(data_dir, monkeypatch):
+    update_global_index(data_dir)
+    assert update_global_index(data_dir) == 0
+
+    with (data_dir / "forro_pairs.csv").open("a", encoding="utf-8") as f:
+        f.write("A,B,Beyonce,Halo,,,,,\n")
+    read_ranges = []
+    original_read = global_index.read_track_pairs_range
+
+    def spy(csv_path, start, end):
+        read_ranges.append((csv_path.name, start))
+        return original_read(csv_path, start, end)
+
+    monkeypatch.setattr(global_index, "read_track_pairs_range", spy)
+
+    assert update_global_index(data_dir) == 1
+    assert read_ranges[0][0] == "forro_pairs.csv"
+    assert read_ranges[0][1] > len("brazilian_artist")
+    assert [e["row"] for e in find_covers_of("Halo", "Beyoncé")] == [1, 1]
+
+
+def test_update_global_index_when_file_rewritten_or_removed(data_dir, make_pair):
+    update_global_index(data_dir)
+    write_track_pairs(data_dir / "brega_pairs.csv", [make_pair(**HALO)])
+    update_global_index(data_dir)
+    assert [e["genre"] for e in find_covers_of("Toxic", "Britney Spears")] == ["forro"]
+
+    (data_dir / "brega_pairs.csv").unlink()
+    update_global_index(data_dir)
+    assert find_pair(make_pair(**HALO)) == []
+
+
+def test_update_global_index_resolves_spotify_ids_from_cache(data_dir):
+    track = SpotifyTrack(id="toxic-id", name="Toxic", artist="", uri="", url="")
+    set_cached_search(canonical_key("Toxic", "Britney Spears"), track)
+
+    update_global_index(data_dir)
+
+    assert [e["genre"] for e in find_by_spotify_id("toxic-id")] == ["brega", "forro"]
+
+
+def test_append_track_pair_warns_about_pair_in_other_genre(
+    data_dir, monkeypatch, make_pair
+):
+    warnings = []
+    monkeypatch.setattr(
+        "spotify_assistant.services.csv_manager.logger.warning", warnings.append
+    )
+
+    append_track_pair(data_dir / "forro_pairs.csv", make_pair(**HALO))
+
+    assert len(warnings) == 1
+    assert "brega" in warnings[0]
@@ -0,0 +1,144 @@
+import threading
+import time
+
+import pytest
+
+from spotify_assistant.exceptions import DuplicateTrackPairError
+from spotify_assistant.exceptions import InvalidTrackPairError
+from spotify_assistant.models.ingestion import TrackPairInput
+from spotify_assistant.services.csv_manager import read_track_pairs
+from spotify_assistant.services.csv_manager import write_track_pairs
+from spotify_assistant.services.ingestion import close_ingestion_store
+from spotify_assistant.services.ingestion import flush_ingestion_store
+from spotify_assistant.services.ingestion import get_ingestion_stats
+from spotify_assistant.services.ingestion import ingest_track_pair
+from spotify_assistant.services.ingestion import ingest_track_pairs
+from spotify_assistant.services.ingestion import open_ingestion_store
+from spotify_assistant.services.watcher import process_new_rows
+
+
+def make_input(name):
+    return TrackPairInput(
+        brazilian_artist=f"BA {name}",
+        brazilian_track=f"BT {name}",
+        original_artist=f"OA {name}",
+        original_track=f"OT {name}",
+    )
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = open_ingestion_store(tmp_path / "track_pairs.csv", resolve=False)
+    yield store
+    close_ingestion_store(store)
+
+
+def test_ingest_track_pair_when_valid_is_written_on_flush(store):
+    row = ingest_track_pair(store, make_input("1"))
+
+    assert row["added_at"] is not None
+    assert read_track_pairs(store.csv_path) == []
+    assert flush_ingestion_store(store) == 1
+    assert read_track_pairs(store.csv_path) == [row]
+
+
+def test_ingest_track_pair_when_duplicate_of_pending_or_stored_row(store):
+    ingest_track_pair(store, make_input("1"))
+    with pytest.raises(DuplicateTrackPairError):
+        ingest_track_pair(store, make_input("1"))
+
+    flush_ingestion_store(store)
+    variant = make_input("1")
+    variant["brazilian_track"] = "bt 1 (feat. Someone)"
+    with pytest.raises(DuplicateTrackPairError):
+        ingest_track_pair(store, variant)
+
+
+def test_ingest_track_pair_when_invalid(store):
+    pair = make_input("1")
+    pair["original_track"] = " "
+    with pytest.raises(InvalidTrackPairError, match="Original track"):
+        ingest_track_pair(store, pair)
+
+
+def test_open_ingestion_store_indexes_existing_rows(tmp_path):
+    csv_path = tmp_path / "track_pairs.csv"
+    store = open_ingestion_store(csv_path, resolve=False)
+    ingest_track_pair(store, make_input("1"))
+    close_ingestion_store(store)
+
+    reopened = open_ingestion_store(csv_path, resolve=False)
+    try:
+        results = ingest_track_pairs(reopened, [make_input("1"), make_input("2")])
+    finally:
+        close_ingestion_store(reopened)
+
+    assert [res["status"] for res in results] == ["duplicate", "accepted"]
+    assert len(read_track_pairs(csv_path)) == 2
+
+
+def test_ingested_rows_are_padded_for_in_place_patching(store, monkeypatch):
+    """The build patches ingested rows in place instead of rewriting the file."""
+    write_track_pairs(store.csv_path, [])
+    ingest_track_pair(store, make_input("1"))
+    flush_ingestion_store(store)
+    monkeypatch.setattr(
+        "spotify_assistant.services.playlist_builder.search_track",
+        lambda track_name, artist: None,
+    )
+    rewrites = []
+    monkeypatch.setattr(
+        "spotify_assistant.services.playlist_builder.update_track_pairs",
+        lambda csv_path, updates: rewrites.append(updates),
+    )
+
+    process_new_rows(store.csv_path, "playlistid")
+
+    assert rewrites == []
+    assert read_track_pairs(store.csv_path)[0]["brazilian_has_spotify"] is False
+
+
+def test_open_ingestion_store_resolves_new_pairs_in_background(tmp_path, monkeypatch):
+    searched = []
+    monkeypatch.setattr(
+        "spotify_assistant.services.resolver.search_track",
+        lambda track_name, artist: searched.append(track_name),
+    )
+    store = open_ingestion_store(tmp_path / "track_pairs.csv", resolve=True)
+    try:
+        ingest_track_pair(store, make_input("1"))
+        for _ in range(100):
+            if len(searched) == 2:
+                break
+            time.sleep(0.01)
+    finally:
+        close_ingestion_store(store)
+
+    assert searched == ["BT 1", "OT 1"]
+
+
+def test_ingest_track_pairs_when_writers_overlap_stores_each_pair_once(tmp_path):
+    """Test that concurrent writers sending the same pairs store each pair once
+    and get a duplicate result for every other copy."""
+    writers, pairs_per_writer = 8, 2_000
+    store = open_ingestion_store(tmp_path / "track_pairs.csv", resolve=False)
+    results = []
+
+    def writer(worker):
+        names = [f"{worker // 2}-{i}" for i in range(pairs_per_writer)]
+        results.extend(ingest_track_pairs(store, (make_input(name) for name in names)))
+
+    threads = [threading.Thread(target=writer, args=(w,)) for w in range(writers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    stats = get_ingestion_stats(store)
+    close_ingestion_store(store)
+
+    unique = writers // 2 * pairs_per_writer
+    statuses = [res["status"] for res in results]
+    assert statuses.count("accepted") == stats["rows"] == unique
+    assert statuses.count("duplicate") == writers * pairs_per_writer - unique
+    pairs = read_track_pairs(tmp_path / "track_pairs.csv")
+    assert len({pair["brazilian_track"] for pair in pairs}) == len(pairs) == unique
@@ -0,0 +1,30 @@
+from loguru import logger
+
+from spotify_assistant.logs import Progress
+from spotify_assistant.logs import advance_progress
+from spotify_assistant.logs import format_eta
+
+
+def test_format_eta_when_durations_grow():
+    """Test that ETAs stay short whatever their magnitude."""
+    assert format_eta(42.4) == "42s"
+    assert format_eta(187) == "3m07s"
+    assert format_eta(7500) == "2h05m"
+
+
+def test_advance_progress_logs_every_n_rows_and_at_the_end():
+    """Test that per-row progress is sampled into lines with outcome counts."""
+    messages: list[str] = []
+    sink = logger.add(messages.append, level="INFO", format="{message}")
+    progress = Progress(label="Pending pairs", total=5, every=2)
+    try:
+        for outcome in ["added", None, "not found", "added", "added"]:
+            advance_progress(progress, outcome)
+    finally:
+        logger.remove(sink)
+
+    assert len(messages) == 3
+    assert messages[0].startswith("Pending pairs: 2/5 rows (40.0%)")
+    assert "ETA" in messages[0]
+    assert "5/5 rows (100.0%)" in messages[-1]
+    assert messages[-1].rstrip().endswith("ETA 0s, 3 added, 1 not found")
@@ -0,0 +1,94 @@
+import pytest
+
+from spotify_assistant import main
+from spotify_assistant.clients.quota import record_api_call
+from spotify_assistant.services.budget import create_run_budget
+from spotify_assistant.services.csv_manager import read_track_pairs
+from spotify_assistant.services.csv_manager import write_track_pairs
+from spotify_assistant.services.retry_queue import get_retry_entries
+from spotify_assistant.settings import settings
+
+
+@pytest.fixture
+def csv_path(tmp_path, monkeypatch, make_pair):
+    monkeypatch.setattr(settings, "DATA_DIR", tmp_path / "data")
+    monkeypatch.setattr(settings, "TRACK_PAIRS_FILENAME", "track_pairs.csv")
+    monkeypatch.setattr(main, "REQUEST_DELAY", 0)
+    path = settings.track_pairs_path
+    write_track_pairs(path, [make_pair(str(i)) for i in range(3)])
+    return path
+
+
+@pytest.fixture
+def added(monkeypatch):
+    """URIs added to the playlist, one list per add call."""
+    calls = []
+
+    def add_tracks_to_playlist(playlist_id, uris):
+        record_api_call("write_calls")
+        calls.append(uris)
+
+    monkeypatch.setattr(main, "add_tracks_to_playlist", add_tracks_to_playlist)
+    return calls
+
+
+@pytest.fixture
+def searched(monkeypatch, fake_search):
+    """Track names searched; "BT 1" raises like a network error."""
+    names = []
+
+    def search_track(track_name, artist):
+        record_api_call("search_calls")
+        names.append(track_name)
+        if track_name == "BT 1":
+            raise ConnectionError("network blip")
+        return fake_search(track_name, artist)
+
+    monkeypatch.setattr(main, "search_track", search_track)
+    return names
+
+
+@pytest.mark.usefixtures("searched")
+def test_main_when_row_raises_processes_other_rows_and_queues_it(csv_path, added):
+    """Test that an error on one row neither aborts the run nor marks the row
+    not found: it is queued for retry and the next rows are processed."""
+    main.main()
+
+    pairs = read_track_pairs(csv_path)
+    assert [pair["in_playlist"] for pair in pairs] == [True, False, True]
+    assert pairs[1]["brazilian_has_spotify"] is None
+    assert added == [
+        ["spotify:track:BT 0", "spotify:track:OT 0"],
+        ["spotify:track:BT 2", "spotify:track:OT 2"],
+    ]
+    assert [e["pair"]["brazilian_track"] for e in get_retry_entries()] == ["BT 1"]
+
+
+@pytest.mark.usefixtures("added")
+def test_main_when_search_refused_by_budget_stops_the_run(csv_path, searched):
+    """Test that a search past max_search_calls (ApiCallLimitError) leaves its
+    row pending, out of the retry queue, and no further row is started."""
+    budget = create_run_budget(max_search_calls=2)
+
+    main.main(budget)
+
+    assert searched == ["BT 0", "OT 0"]  # "BT 1" refused before any call
+    assert budget.exhausted == "search calls"
+    pairs = read_track_pairs(csv_path)
+    assert [pair["in_playlist"] for pair in pairs] == [True, False, False]
+    assert get_retry_entries() == []
+
+
+@pytest.mark.usefixtures("searched")
+def test_main_when_write_budget_spent_stops_before_next_row(csv_path, added):
+    """Test that main(budget) stops once max_write_calls is spent and saves
+    what it did."""
+    budget = create_run_budget(max_write_calls=1)
+
+    main.main(budget)
+
+    assert len(added) == 1
+    assert budget.exhausted == "write calls"
+    pairs = read_track_pairs(csv_path)
+    assert [pair["in_playlist"] for pair in pairs] == [True, False, False]
+    assert get_retry_entries() == []  # "BT 1" was never started
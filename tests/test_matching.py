@@ -0,0 +1,74 @@
+from spotify_assistant.matching import score_candidates
+from spotify_assistant.models.spotify import SpotifyTrack
+from spotify_assistant.settings import settings
+
+
+def make_candidate(
+    name: str, artist: str, duration_ms: int = 240_000, album: str = ""
+) -> SpotifyTrack:
+    return SpotifyTrack(
+        id=name,
+        name=name,
+        artist=artist,
+        uri=f"spotify:track:{name}",
+        url=f"https://open.spotify.com/track/{name}",
+        album=album,
+        duration_ms=duration_ms,
+    )
+
+
+def test_score_candidates_when_spelled_differently_is_confident() -> None:
+    """Accents, case, featuring credits and remaster suffixes do not count."""
+    scores = score_candidates(
+        "Louca Por Ti (feat. Fulano)",
+        "Calcinha Preta & Outro",
+        [make_candidate("LOUCA POR TI - Remastered 2011", "Calcinha Preta")],
+    )
+
+    assert scores.tolist() == [1.0]
+
+
+def test_score_candidates_when_wrong_rendition_ranks_it_lower() -> None:
+    """Live cuts, tributes and snippets lose to the studio recording."""
+    scores = score_candidates(
+        "Torn",
+        "Natalie Imbruglia",
+        [
+            make_candidate("Torn (Ao Vivo)", "Natalie Imbruglia"),
+            make_candidate("Torn", "Natalie Imbruglia Tribute Band"),
+            make_candidate("Torn", "Natalie Imbruglia", duration_ms=30_000),
+            make_candidate("Torn", "Natalie Imbruglia"),
+        ],
+    )
+
+    assert scores.argmax() == 3
+    assert (scores[:3] < scores[3]).all()
+    assert scores[0] < settings.SEARCH_MIN_CONFIDENCE
+    assert score_candidates(
+        "Torn (Ao Vivo)",
+        "Natalie Imbruglia",
+        [make_candidate("Torn (Ao Vivo)", "Natalie Imbruglia")],
+    ).tolist() == [1.0]
+
+
+def test_score_candidates_when_live_album_keeps_studio_title_confident() -> None:
+    """Only the candidate's title marks a rendition, not its album or artist."""
+    scores = score_candidates(
+        "Xote das Meninas",
+        "Falamansa",
+        [
+            make_candidate("Xote das Meninas", "Falamansa", album="Ao Vivo"),
+            make_candidate("Xote das Meninas", "Falamansa Acustico"),
+        ],
+    )
+
+    assert (scores >= settings.SEARCH_MIN_CONFIDENCE).all()
+
+
+def test_score_candidates_when_exact_title_by_another_artist_needs_review() -> None:
+    """The title weight alone must not pass the confidence threshold."""
+    scores = score_candidates(
+        "Umbrella", "Rihanna", [make_candidate("Umbrella", "Calcinha Preta")]
+    )
+
+    assert scores[0] < settings.SEARCH_MIN_CONFIDENCE
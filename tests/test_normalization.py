@@ -0,0 +1,64 @@
+from spotify_assistant.normalization import canonical_key
+from spotify_assistant.normalization import clean_text
+from spotify_assistant.normalization import normalize_text
+from spotify_assistant.normalization import primary_artist
+from spotify_assistant.normalization import query_variants
+from spotify_assistant.normalization import record_variant_result
+from spotify_assistant.normalization import strip_version_suffix
+
+
+def test_clean_text_when_featuring_and_punctuation() -> None:
+    """Featuring credits, quotes and punctuation are dropped, spacing collapsed."""
+    assert clean_text('"Que Tontos,  Que Loucos" feat. Fulano') == (
+        "Que Tontos Que Loucos"
+    )
+    assert clean_text("Agora Estou Sofrendo (part. Gusttavo Lima)") == (
+        "Agora Estou Sofrendo"
+    )
+
+
+def test_normalize_text_when_accents_and_case() -> None:
+    """Accents and case do not change the normalized form."""
+    assert normalize_text("Aviões do Forró") == normalize_text("AVIOES DO FORRO")
+
+
+def test_canonical_key_when_same_song_spelled_differently() -> None:
+    """Variants of the same track/artist share one canonical key."""
+    assert canonical_key("Que Tontos, Que Loucos", "Banda Calypso") == (
+        canonical_key("que tontos que loucos ", "banda  calypso")
+    )
+    assert canonical_key("Torn", "A") != canonical_key("Torn", "B")
+
+
+def test_primary_artist_when_multiple_credits() -> None:
+    assert primary_artist("Calcinha Preta & Gusttavo Lima") == "Calcinha Preta"
+    assert primary_artist("Zé Neto e Cristiano") == "Zé Neto"
+    assert primary_artist("Heart") == "Heart"
+
+
+def test_strip_version_suffix_when_live_or_remaster() -> None:
+    assert strip_version_suffix("Alone (Ao Vivo)") == "Alone"
+    assert strip_version_suffix("Torn - Remastered 2011") == "Torn"
+    assert strip_version_suffix("(Untitled)") == "(Untitled)"
+
+
+def test_query_variants_when_fresh_stats() -> None:
+    """Strictest query comes first, duplicates are dropped, free text is last."""
+    variants = query_variants("Alone (Ao Vivo)", "Heart")
+
+    assert variants[0] == ("exact", "track:Alone (Ao Vivo) artist:Heart")
+    assert variants[-1][0] == "free_text"
+    queries = [query for _, query in variants]
+    assert len(queries) == len(set(queries))
+
+
+def test_query_variants_when_stats_favor_looser_variant() -> None:
+    """Variants that keep missing move behind variants that keep hitting."""
+    for _ in range(10):
+        record_variant_result("exact", hit=False)
+        record_variant_result("bare_title", hit=True)
+
+    names = [name for name, _ in query_variants("Alone (Ao Vivo)", "Heart")]
+
+    assert names.index("bare_title") < names.index("exact")
+    assert names[-1] == "free_text"
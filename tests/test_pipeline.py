@@ -0,0 +1,69 @@
+import threading
+import time
+
+import pytest
+
+from spotify_assistant.services.pipeline import ordered_map
+from spotify_assistant.services.pipeline import prefetch
+
+
+def test_prefetch_when_consumed_yields_all_items_in_order() -> None:
+    assert list(prefetch(iter(range(100)), queue_size=4)) == list(range(100))
+
+
+def test_prefetch_when_producer_raises_reraises_in_consumer() -> None:
+    def rows():
+        yield 1
+        raise ValueError("bad row")
+
+    stream = prefetch(rows(), queue_size=2)
+
+    assert next(stream) == 1
+    with pytest.raises(ValueError, match="bad row"):
+        next(stream)
+
+
+def test_prefetch_when_consumer_slow_bounds_read_ahead() -> None:
+    produced = []
+
+    def rows():
+        for i in range(50):
+            produced.append(i)
+            yield i
+
+    stream = prefetch(rows(), queue_size=3)
+    next(stream)
+    time.sleep(0.05)
+
+    # one consumed, queue_size buffered, one blocked in put
+    assert len(produced) <= 5
+    stream.close()
+
+
+def test_ordered_map_when_workers_finish_out_of_order_keeps_input_order() -> None:
+    def slow_for_small(value):
+        time.sleep(0.01 * (5 - value))
+        return value * 10
+
+    results = list(ordered_map(range(5), slow_for_small, workers=5, window=5))
+
+    assert results == [0, 10, 20, 30, 40]
+
+
+def test_ordered_map_when_window_full_applies_backpressure() -> None:
+    in_flight = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def track(value):
+        nonlocal in_flight, peak
+        with lock:
+            in_flight += 1
+            peak = max(peak, in_flight)
+        time.sleep(0.005)
+        with lock:
+            in_flight -= 1
+        return value
+
+    assert list(ordered_map(range(20), track, workers=8, window=3)) == list(range(20))
+    assert peak <= 3
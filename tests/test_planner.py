@@ -0,0 +1,83 @@
+from unittest.mock import patch
+
+from spotify_assistant.clients.search_cache import set_cached_search
+from spotify_assistant.models.spotify import SpotifyTrack
+from spotify_assistant.normalization import canonical_key
+from spotify_assistant.normalization import pair_track_keys
+from spotify_assistant.services.csv_manager import write_track_pairs
+from spotify_assistant.services.planner import plan_playlist_build
+from spotify_assistant.services.playlist_builder import build_playlist_from_csv
+from spotify_assistant.services.retry_queue import record_failure
+from spotify_assistant.settings import settings
+
+ARTISTS = {"brazilian_artist": "A", "original_artist": "C"}
+
+
+def test_plan_playlist_build_counts_cache_hits_and_misses(tmp_path, make_pair):
+    """Plan splits lookups into cache hits/misses and never calls Spotify."""
+    csv_path = tmp_path / "track_pairs.csv"
+    write_track_pairs(
+        csv_path,
+        [
+            make_pair(brazilian_track="Cached", original_track="Shared", **ARTISTS),
+            make_pair(brazilian_track="Uncached", original_track="Shared", **ARTISTS),
+            make_pair(brazilian_track="Gone", original_track="D", **ARTISTS),
+            make_pair(
+                brazilian_track="Done", original_track="D", **ARTISTS, in_playlist=True
+            ),
+            make_pair(
+                brazilian_track="Missing",
+                original_track="D",
+                **ARTISTS,
+                brazilian_has_spotify=False,
+            ),
+        ],
+    )
+    set_cached_search(
+        canonical_key("Cached", "A"),
+        SpotifyTrack(id="1", name="Cached", artist="A", uri="u", url="l"),
+    )
+    set_cached_search(canonical_key("Gone", "A"), None)
+
+    with patch("spotify_assistant.clients.spotify.get_spotify_client") as client:
+        plan = plan_playlist_build(csv_path)
+        client.assert_not_called()
+
+    assert plan["total_rows"] == 5
+    assert plan["pending_rows"] == 3
+    assert plan["cache_hits"] == 2
+    # "Shared" is searched once for both rows; "Uncached" and "D" once each
+    assert plan["cache_misses"] == 3
+    assert plan["known_not_found"] == 1
+    assert plan["write_batches"] == 1  # both pairs fit one add call
+    assert plan["estimated_seconds"] > 0
+
+
+def test_plan_playlist_build_when_build_runs_matches_its_write_calls(
+    tmp_path, monkeypatch, make_pair
+):
+    """Test that write_batches is the number of add calls a build makes, with
+    pairs batched per call and pairs backing off left out."""
+    monkeypatch.setattr(settings, "PIPELINE_WRITE_BATCH_SIZE", 3)
+    csv_path = tmp_path / "track_pairs.csv"
+    pairs = [make_pair(str(i)) for i in range(8)]
+    write_track_pairs(csv_path, pairs)
+    for pair in pairs:
+        for key, name in zip(
+            pair_track_keys(pair),
+            (pair["brazilian_track"], pair["original_track"]),
+            strict=True,
+        ):
+            set_cached_search(
+                key,
+                SpotifyTrack(id=name, name=name, artist="A", uri=name, url=name),
+            )
+    record_failure(pairs[0], ConnectionError("network blip"))
+
+    plan = plan_playlist_build(csv_path)
+    with patch("spotify_assistant.clients.spotify.get_spotify_client") as client:
+        build_playlist_from_csv(csv_path, "playlistid")
+
+    assert plan["pending_rows"] == 7
+    assert plan["write_batches"] == 3
+    assert client.return_value.playlist_add_items.call_count == 3
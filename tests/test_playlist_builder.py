@@ -1,3 +1,5 @@
+import pytest
+
 from spotify_assistant.models.spotify import SpotifyTrack
 from spotify_assistant.models.tracks import TrackPair
 from spotify_assistant.services.playlist_builder import build_playlist_from_csv
@@ -307,3 +309,445 @@ def test_validate_track_availability_dry_run(tmp_path, monkeypatch):
     assert results[0]["brazilian_found"] is False
     after = read_track_pairs(csv_path)
     assert after[0]["brazilian_has_spotify"] is None  # Not updated
+
+
+def test_sync_playlist_with_csv_removes_stale_and_adds_missing(tmp_path, monkeypatch):
+    """Stale tracks are removed by position, missing pairs added, CSV updated."""
+    csv_path = tmp_path / "track_pairs.csv"
+    pairs = [
+        TrackPair(
+            brazilian_artist="A",
+            brazilian_track="B",
+            original_artist="C",
+            original_track="D",
+            added_at="2024-01-01T00:00:00Z",
+            source=None,
+            brazilian_has_spotify=True,
+            original_has_spotify=True,
+            in_playlist=True,
+        ),
+        TrackPair(
+            brazilian_artist="A2",
+            brazilian_track="B2",
+            original_artist="C2",
+            original_track="D2",
+            added_at="2024-01-01T00:00:00Z",
+            source=None,
+            brazilian_has_spotify=None,
+            original_has_spotify=None,
+            in_playlist=False,
+        ),
+    ]
+    from spotify_assistant.models.spotify import PlaylistSnapshot
+    from spotify_assistant.services.csv_manager import read_track_pairs
+    from spotify_assistant.services.csv_manager import write_track_pairs
+    from spotify_assistant.services.playlist_builder import sync_playlist_with_csv
+
+    write_track_pairs(csv_path, pairs)
+    monkeypatch.setattr(
+        "spotify_assistant.services.playlist_builder.search_track", dummy_search_track
+    )
+    monkeypatch.setattr(
+        "spotify_assistant.services.playlist_builder.get_playlist_snapshot",
+        lambda playlist_id: PlaylistSnapshot(
+            snapshot_id="snap1",
+            uris=[
+                "spotify:track:B",
+                "spotify:track:Deleted",
+                "spotify:track:D",
+                "spotify:track:B",
+            ],
+        ),
+    )
+    removed_calls = []
+    added_calls = []
+    monkeypatch.setattr(
+        "spotify_assistant.services.playlist_builder.remove_tracks_from_playlist",
+        lambda *a: removed_calls.append(a),
+    )
+    monkeypatch.setattr(
+        "spotify_assistant.services.playlist_builder.add_tracks_to_playlist",
+        lambda *a: added_calls.append(a),
+    )
+
+    result = sync_playlist_with_csv(csv_path, "playlistid")
+
+    assert result["expected_pairs"] == 2
+    assert result["added_uris"] == ["spotify:track:B2", "spotify:track:D2"]
+    assert result["removed"] == [
+        {"uri": "spotify:track:Deleted", "positions": [1]},
+        {"uri": "spotify:track:B", "positions": [3]},
+    ]
+    assert removed_calls[0][2] == "snap1"
+    assert added_calls == [("playlistid", result["added_uris"])]
+    after = read_track_pairs(csv_path)
+    assert after[1]["in_playlist"] is True
+    assert after[1]["brazilian_has_spotify"] is True
+
+
+def test_sync_playlist_with_csv_readds_pair_with_missing_half(tmp_path, monkeypatch):
+    """A pair with only one track left is removed and re-added as a unit."""
+    csv_path = tmp_path / "track_pairs.csv"
+    pairs = [
+        TrackPair(
+            brazilian_artist="A",
+            brazilian_track="B",
+            original_artist="C",
+            original_track="D",
+            added_at="2024-01-01T00:00:00Z",
+            source=None,
+            brazilian_has_spotify=True,
+            original_has_spotify=True,
+            in_playlist=True,
+        )
+    ]
+    from spotify_assistant.models.spotify import PlaylistSnapshot
+    from spotify_assistant.services.csv_manager import write_track_pairs
+    from spotify_assistant.services.playlist_builder import sync_playlist_with_csv
+
+    write_track_pairs(csv_path, pairs)
+    monkeypatch.setattr(
+        "spotify_assistant.services.playlist_builder.search_track", dummy_search_track
+    )
+    monkeypatch.setattr(
+        "spotify_assistant.services.playlist_builder.get_playlist_snapshot",
+        lambda playlist_id: PlaylistSnapshot(
+            snapshot_id="snap1", uris=["spotify:track:B"]
+        ),
+    )
+
+    result = sync_playlist_with_csv(csv_path, "playlistid", dry_run=True)
+
+    assert result["removed"] == [{"uri": "spotify:track:B", "positions": [0]}]
+    assert result["added_uris"] == ["spotify:track:B", "spotify:track:D"]
+    assert result["updated_rows"] == 0
+
+
+def test_build_playlist_from_csv_isolates_errors(tmp_path, monkeypatch):
+    """An exception on one pair queues it for retry and the run continues."""
+    csv_path = tmp_path / "track_pairs.csv"
+    pairs = [
+        TrackPair(
+            brazilian_artist="A",
+            brazilian_track="Boom",
+            original_artist="C",
+            original_track="D",
+            added_at="2024-01-01T00:00:00Z",
+            source=None,
+            brazilian_has_spotify=None,
+            original_has_spotify=None,
+            in_playlist=False,
+        ),
+        TrackPair(
+            brazilian_artist="A2",
+            brazilian_track="B2",
+            original_artist="C2",
+            original_track="D2",
+            added_at="2024-01-01T00:00:00Z",
+            source=None,
+            brazilian_has_spotify=None,
+            original_has_spotify=None,
+            in_playlist=False,
+        ),
+    ]
+    from spotify_assistant.services.csv_manager import read_track_pairs
+    from spotify_assistant.services.csv_manager import write_track_pairs
+    from spotify_assistant.services.retry_queue import get_retry_entries
+
+    def flaky_search_track(track_name, artist):
+        if track_name == "Boom":
+            raise ConnectionError("network blip")
+        return dummy_search_track(track_name, artist)
+
+    write_track_pairs(csv_path, pairs)
+    monkeypatch.setattr(
+        "spotify_assistant.services.playlist_builder.search_track", flaky_search_track
+    )
+    monkeypatch.setattr(
+        "spotify_assistant.services.playlist_builder.add_tracks_to_playlist",
+        lambda *a, **k: None,
+    )
+
+    results = build_playlist_from_csv(csv_path, "playlistid")
+
+    assert "network blip" in results[0]["error"]
+    assert results[1]["added_to_playlist"] is True
+    after = read_track_pairs(csv_path)
+    assert after[0]["brazilian_has_spotify"] is None  # error is not "not found"
+    assert [e["pair"]["brazilian_track"] for e in get_retry_entries()] == ["Boom"]
+    # Backing off: the errored pair is not retried on an immediate re-run
+    assert build_playlist_from_csv(csv_path, "playlistid") == []
+
+
+def test_build_playlist_from_csv_when_search_needs_review_leaves_row_pending(
+    tmp_path, monkeypatch, make_pair
+):
+    """A match sent to review is neither "not found" nor an error: the row
+    stays pending and the next run searches it again."""
+    from spotify_assistant.exceptions import SearchNeedsReviewError
+    from spotify_assistant.services.csv_manager import read_track_pairs
+    from spotify_assistant.services.csv_manager import write_track_pairs
+    from spotify_assistant.services.retry_queue import get_retry_entries
+
+    csv_path = tmp_path / "track_pairs.csv"
+    write_track_pairs(csv_path, [make_pair("1"), make_pair("2")], pad_status=True)
+    searched = []
+
+    def reviewing_search_track(track_name, artist):
+        searched.append(track_name)
+        if track_name == "BT 1":
+            raise SearchNeedsReviewError(track_name)
+        return dummy_search_track(track_name, artist)
+
+    monkeypatch.setattr(
+        "spotify_assistant.services.playlist_builder.search_track",
+        reviewing_search_track,
+    )
+    monkeypatch.setattr(
+        "spotify_assistant.services.playlist_builder.add_tracks_to_playlist",
+        lambda *a, **k: None,
+    )
+
+    results = build_playlist_from_csv(csv_path, "playlistid")
+
+    assert [res["index"] for res in results] == [1]
+    after = read_track_pairs(csv_path)
+    assert after[0] == make_pair("1")
+    assert after[1]["in_playlist"] is True
+    assert get_retry_entries() == []
+    searched.clear()
+    assert build_playlist_from_csv(csv_path, "playlistid") == []
+    assert searched == ["BT 1"]
+
+
+def test_iter_build_playlist_batches_playlist_writes(tmp_path, monkeypatch):
+    """Found pairs are added in batched calls, in CSV order, results streamed."""
+    csv_path = tmp_path / "track_pairs.csv"
+    pairs = [
+        TrackPair(
+            brazilian_artist=f"A{i}",
+            brazilian_track="NotFound" if i == 2 else f"B{i}",
+            original_artist=f"C{i}",
+            original_track=f"D{i}",
+            added_at="2024-01-01T00:00:00Z",
+            source=None,
+            brazilian_has_spotify=None,
+            original_has_spotify=None,
+            in_playlist=False,
+        )
+        for i in range(5)
+    ]
+    from spotify_assistant.services.csv_manager import read_track_pairs
+    from spotify_assistant.services.csv_manager import write_track_pairs
+    from spotify_assistant.services.pipeline import PipelineConfig
+    from spotify_assistant.services.playlist_builder import iter_build_playlist
+
+    write_track_pairs(csv_path, pairs)
+    monkeypatch.setattr(
+        "spotify_assistant.services.playlist_builder.search_track", dummy_search_track
+    )
+    added_calls = []
+    monkeypatch.setattr(
+        "spotify_assistant.services.playlist_builder.add_tracks_to_playlist",
+        lambda playlist_id, uris: added_calls.append(uris),
+    )
+    config = PipelineConfig(
+        read_queue_size=2, search_workers=3, search_queue_size=2, write_batch_size=2
+    )
+
+    results = iter_build_playlist(csv_path, "playlistid", config)
+
+    assert [res["index"] for res in results] == [0, 1, 2, 3, 4]
+    assert added_calls == [
+        [
+            "spotify:track:B0",
+            "spotify:track:D0",
+            "spotify:track:B1",
+            "spotify:track:D1",
+        ],
+        [
+            "spotify:track:B3",
+            "spotify:track:D3",
+            "spotify:track:B4",
+            "spotify:track:D4",
+        ],
+    ]
+    after = read_track_pairs(csv_path)
+    assert [pair["in_playlist"] for pair in after] == [True, True, False, True, True]
+    assert after[2]["brazilian_has_spotify"] is False
+
+
+def test_iter_build_playlist_when_cells_unpadded_persists_each_outcome(
+    tmp_path, monkeypatch
+):
+    """Outcomes are in the CSV before they are yielded; one rewrite pads the
+    status cells and the other rows are patched in place."""
+    from spotify_assistant.services import csv_manager
+    from spotify_assistant.services.csv_manager import read_track_pairs
+    from spotify_assistant.services.csv_manager import write_track_pairs
+    from spotify_assistant.services.playlist_builder import iter_build_playlist
+
+    csv_path = tmp_path / "track_pairs.csv"
+    write_track_pairs(
+        csv_path,
+        [
+            TrackPair(
+                brazilian_artist=f"A{i}",
+                brazilian_track=f"B{i}",
+                original_artist=f"C{i}",
+                original_track="NotFound" if i % 2 else f"D{i}",
+                added_at=None,
+                source=None,
+                brazilian_has_spotify=None,
+                original_has_spotify=None,
+                in_playlist=False,
+            )
+            for i in range(4)
+        ],
+    )
+    monkeypatch.setattr(
+        "spotify_assistant.services.playlist_builder.search_track", dummy_search_track
+    )
+    monkeypatch.setattr(
+        "spotify_assistant.services.playlist_builder.add_tracks_to_playlist",
+        lambda playlist_id, uris: None,
+    )
+    rewrites = []
+    write = csv_manager.write_track_pairs
+    monkeypatch.setattr(
+        csv_manager,
+        "write_track_pairs",
+        lambda *args, **kwargs: rewrites.append(args[0]) or write(*args, **kwargs),
+    )
+
+    results = []
+    for result in iter_build_playlist(csv_path, "playlistid"):
+        assert read_track_pairs(csv_path)[result["index"]] == result["pair"]
+        results.append(result["index"])
+
+    assert results == [0, 1, 2, 3]
+    assert len(rewrites) == 1
+
+
+@pytest.mark.parametrize(
+    ("dry_run", "fetched_ids", "added_uris"),
+    [
+        (False, ["D"], []),
+        # Dry runs use only the ISRC index, which does not know "D" yet
+        (True, [], ["spotify:track:B", "spotify:track:D"]),
+    ],
+)
+def test_sync_playlist_with_csv_keeps_equivalent_release(
+    tmp_path, monkeypatch, dry_run, fetched_ids, added_uris
+):
+    """Another release of an expected track (same ISRC) is not swapped, and
+    dry runs never look up unknown ISRCs."""
+    csv_path = tmp_path / "track_pairs.csv"
+    pair = TrackPair(
+        brazilian_artist="A",
+        brazilian_track="B",
+        original_artist="C",
+        original_track="D",
+        added_at="2024-01-01T00:00:00Z",
+        source=None,
+        brazilian_has_spotify=True,
+        original_has_spotify=True,
+        in_playlist=True,
+    )
+    from spotify_assistant.models.spotify import PlaylistSnapshot
+    from spotify_assistant.services.csv_manager import write_track_pairs
+    from spotify_assistant.services.playlist_builder import sync_playlist_with_csv
+
+    write_track_pairs(csv_path, [pair])
+    monkeypatch.setattr(
+        "spotify_assistant.services.playlist_builder.search_track", dummy_search_track
+    )
+    monkeypatch.setattr(
+        "spotify_assistant.services.playlist_builder.get_playlist_snapshot",
+        lambda playlist_id: PlaylistSnapshot(
+            snapshot_id="snap1",
+            uris=["spotify:track:B", "spotify:track:D-remaster"],
+            isrcs=["ISRC-B", "ISRC-D"],
+        ),
+    )
+    fetched = []
+
+    def fake_get_tracks(track_ids):
+        fetched.extend(track_ids)
+        return [{**dummy_search_track(i, "C"), "isrc": "ISRC-D"} for i in track_ids]
+
+    monkeypatch.setattr(
+        "spotify_assistant.services.playlist_builder.get_tracks", fake_get_tracks
+    )
+    monkeypatch.setattr(
+        "spotify_assistant.services.playlist_builder.remove_tracks_from_playlist",
+        lambda *a: None,
+    )
+    monkeypatch.setattr(
+        "spotify_assistant.services.playlist_builder.add_tracks_to_playlist",
+        lambda *a: None,
+    )
+
+    result = sync_playlist_with_csv(csv_path, "playlistid", dry_run=dry_run)
+
+    assert fetched == fetched_ids
+    assert result["added_uris"] == added_uris
+    assert (result["removed"] == []) is not dry_run
+
+
+def test_sync_playlist_with_csv_when_pairs_cached_searches_only_the_rest(
+    tmp_path, monkeypatch
+):
+    """Pairs resolved in the search cache are not searched again."""
+    from spotify_assistant.clients.search_cache import set_cached_search
+    from spotify_assistant.models.spotify import PlaylistSnapshot
+    from spotify_assistant.normalization import pair_track_keys
+    from spotify_assistant.services.csv_manager import write_track_pairs
+    from spotify_assistant.services.playlist_builder import sync_playlist_with_csv
+
+    csv_path = tmp_path / "track_pairs.csv"
+    pairs = [
+        TrackPair(
+            brazilian_artist=f"A{i}",
+            brazilian_track=f"B{i}",
+            original_artist=f"C{i}",
+            original_track=f"D{i}",
+            added_at=None,
+            source=None,
+            brazilian_has_spotify=True,
+            original_has_spotify=True,
+            in_playlist=True,
+        )
+        for i in range(3)
+    ]
+    write_track_pairs(csv_path, pairs)
+    for pair in pairs[:2]:
+        brazilian_key, original_key = pair_track_keys(pair)
+        set_cached_search(
+            brazilian_key, dummy_search_track(pair["brazilian_track"], "")
+        )
+        set_cached_search(original_key, dummy_search_track(pair["original_track"], ""))
+    searched = []
+
+    def counting_search_track(track_name, artist):
+        searched.append(track_name)
+        return dummy_search_track(track_name, artist)
+
+    monkeypatch.setattr(
+        "spotify_assistant.services.playlist_builder.search_track",
+        counting_search_track,
+    )
+    monkeypatch.setattr(
+        "spotify_assistant.services.playlist_builder.get_playlist_snapshot",
+        lambda playlist_id: PlaylistSnapshot(
+            snapshot_id="snap1",
+            uris=[f"spotify:track:{name}{i}" for i in range(3) for name in "BD"],
+        ),
+    )
+
+    result = sync_playlist_with_csv(csv_path, "playlistid", dry_run=True)
+
+    assert searched == ["B2", "D2"]
+    assert result["expected_pairs"] == 3
+    assert result["added_uris"] == []
+    assert result["removed"] == []
@@ -0,0 +1,82 @@
+import time
+from pathlib import Path
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+import pytest
+
+from spotify_assistant.clients.search_cache import get_cached_search
+from spotify_assistant.models.tracks import TrackPair
+from spotify_assistant.normalization import canonical_key
+from spotify_assistant.services import resolver
+from spotify_assistant.services.csv_manager import append_track_pair
+from spotify_assistant.services.resolver import resolve_in_background
+from spotify_assistant.settings import settings
+
+PAIR = TrackPair(
+    brazilian_artist="Calcinha Preta",
+    brazilian_track="Louca Por Ti",
+    original_artist="Natalie Imbruglia",
+    original_track="Torn",
+    added_at=None,
+    source=None,
+    brazilian_has_spotify=None,
+    original_has_spotify=None,
+    in_playlist=False,
+)
+
+
+def empty_client() -> MagicMock:
+    client = MagicMock()
+    client.search.return_value = {"tracks": {"items": []}}
+    return client
+
+
+def wait_for(condition) -> None:
+    for _ in range(200):
+        if condition():
+            return
+        time.sleep(0.01)
+
+
+@pytest.fixture(autouse=True)
+def no_delay(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(settings, "SPOTIFY_REQUEST_DELAY", 0)
+
+
+def test_append_track_pair_when_resolving_fills_search_cache(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Test that an appended pair is searched before any build runs."""
+    monkeypatch.setattr(settings, "RESOLVE_ON_APPEND", True)
+    keys = [
+        canonical_key(PAIR["brazilian_track"], PAIR["brazilian_artist"]),
+        canonical_key(PAIR["original_track"], PAIR["original_artist"]),
+    ]
+    with patch(
+        "spotify_assistant.clients.spotify.get_spotify_client",
+        return_value=empty_client(),
+    ):
+        append_track_pair(tmp_path / "track_pairs.csv", PAIR)
+        wait_for(lambda: all(get_cached_search(key) for key in keys))
+
+    assert all(get_cached_search(key) is not None for key in keys)
+    assert resolver._resolver is not None
+    assert resolver._resolver.resolved == 1
+
+
+def test_resolve_in_background_when_daily_quota_spent_skips_pair(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Test that the resolver leaves the remaining quota to builds."""
+    monkeypatch.setattr(settings, "DAILY_SEARCH_QUOTA", 0)
+    client = empty_client()
+    with patch(
+        "spotify_assistant.clients.spotify.get_spotify_client", return_value=client
+    ):
+        resolve_in_background(PAIR)
+        wait_for(lambda: resolver._resolver is not None and resolver._resolver.skipped)
+
+    assert resolver._resolver is not None
+    assert resolver._resolver.skipped == 1
+    client.search.assert_not_called()
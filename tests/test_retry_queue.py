@@ -0,0 +1,70 @@
+from datetime import UTC
+from datetime import datetime
+from datetime import timedelta
+
+import pytest
+
+from spotify_assistant.models.tracks import TrackPair
+from spotify_assistant.services.retry_queue import get_retry_entries
+from spotify_assistant.services.retry_queue import is_deferred
+from spotify_assistant.services.retry_queue import record_failure
+from spotify_assistant.services.retry_queue import record_success
+from spotify_assistant.services.retry_queue import reset_retry_queue
+from spotify_assistant.settings import settings
+
+
+@pytest.fixture
+def pair() -> TrackPair:
+    return TrackPair(
+        brazilian_artist="A",
+        brazilian_track="B",
+        original_artist="C",
+        original_track="D",
+        added_at=None,
+        source=None,
+        brazilian_has_spotify=None,
+        original_has_spotify=None,
+        in_playlist=False,
+    )
+
+
+def test_record_failure_when_first_error_backs_off(pair) -> None:
+    """An errored pair is deferred until its backoff expires, across reloads."""
+    entry = record_failure(pair, RuntimeError("503"))
+    reset_retry_queue()
+
+    assert entry["attempts"] == 1
+    assert is_deferred(pair)
+    later = datetime.now(UTC) + timedelta(seconds=settings.RETRY_BASE_DELAY + 1)
+    assert not is_deferred(pair, now=later)
+
+
+def test_record_failure_when_repeated_doubles_delay(pair) -> None:
+    first = record_failure(pair, RuntimeError("503"))
+    second = record_failure(pair, RuntimeError("503"))
+
+    first_at = datetime.fromisoformat(first["next_attempt_at"])
+    second_at = datetime.fromisoformat(second["next_attempt_at"])
+    assert second["attempts"] == 2
+    assert second_at - first_at >= timedelta(seconds=settings.RETRY_BASE_DELAY)
+
+
+def test_record_failure_when_attempts_exhausted_dead_letters(pair, monkeypatch) -> None:
+    monkeypatch.setattr(settings, "RETRY_MAX_ATTEMPTS", 2)
+    record_failure(pair, RuntimeError("503"))
+    record_failure(pair, RuntimeError("503"))
+    reset_retry_queue()
+
+    assert get_retry_entries() == []
+    assert "RuntimeError" in settings.dead_letters_path.read_text()
+    far_future = datetime.now(UTC) + timedelta(days=365)
+    assert is_deferred(pair, now=far_future)
+
+
+def test_record_success_when_queued_removes_entry(pair) -> None:
+    record_failure(pair, RuntimeError("503"))
+
+    record_success(pair)
+
+    assert get_retry_entries() == []
+    assert not is_deferred(pair)
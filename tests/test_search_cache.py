@@ -0,0 +1,227 @@
+import gzip
+import json
+import sqlite3
+from contextlib import closing
+from datetime import UTC
+from datetime import datetime
+from unittest.mock import patch
+
+import pytest
+
+from spotify_assistant.clients.search_cache import EXPORT_SCHEMA_VERSION
+from spotify_assistant.clients.search_cache import close_search_cache
+from spotify_assistant.clients.search_cache import export_search_cache
+from spotify_assistant.clients.search_cache import get_cached_search
+from spotify_assistant.clients.search_cache import get_cached_track_id
+from spotify_assistant.clients.search_cache import get_isrcs
+from spotify_assistant.clients.search_cache import get_search_cache_stats
+from spotify_assistant.clients.search_cache import import_search_cache
+from spotify_assistant.clients.search_cache import preload_search_cache
+from spotify_assistant.clients.search_cache import reset_search_cache_stats
+from spotify_assistant.clients.search_cache import set_cached_search
+from spotify_assistant.exceptions import SearchCacheFormatError
+from spotify_assistant.models.spotify import SpotifyTrack
+from spotify_assistant.settings import settings
+
+
+def make_track(track_id: str) -> SpotifyTrack:
+    return SpotifyTrack(
+        id=track_id,
+        name=f"Track {track_id}",
+        artist="Artist",
+        uri=f"spotify:track:{track_id}",
+        url=f"https://open.spotify.com/track/{track_id}",
+    )
+
+
+@pytest.fixture(autouse=True)
+def reset_stats():
+    reset_search_cache_stats()
+
+
+def test_get_cached_search_when_never_searched() -> None:
+    assert get_cached_search("unknown") is None
+    assert get_search_cache_stats()["misses"] == 1
+
+
+def test_get_cached_search_when_written_hits_memory_tier() -> None:
+    set_cached_search("key", make_track("1"))
+
+    entry = get_cached_search("key")
+
+    assert entry is not None
+    assert entry["track"] == make_track("1")
+    assert get_search_cache_stats()["memory_hits"] == 1
+
+
+def test_get_cached_search_when_memory_cold_reads_disk_once() -> None:
+    """Write-through entries survive a restart and are promoted to memory."""
+    set_cached_search("found", make_track("1"))
+    set_cached_search("not_found", None)
+    close_search_cache()
+
+    assert get_cached_search("found")["track"] == make_track("1")  # type: ignore[index]
+    assert get_cached_search("not_found")["track"] is None  # type: ignore[index]
+    get_cached_search("found")
+
+    stats = get_search_cache_stats()
+    assert stats["disk_hits"] == 2
+    assert stats["memory_hits"] == 1
+
+
+def test_get_cached_track_id_when_found_not_found_or_unknown() -> None:
+    set_cached_search("found", make_track("1"))
+    set_cached_search("not_found", None)
+
+    assert get_cached_track_id("found") == "1"
+    assert get_cached_track_id("not_found") is None
+    assert get_cached_track_id("unknown") is None
+
+
+def test_set_cached_search_when_memory_full_evicts_least_recent(monkeypatch) -> None:
+    monkeypatch.setattr(settings, "SEARCH_CACHE_MEMORY_SIZE", 2)
+    set_cached_search("a", make_track("a"))
+    set_cached_search("b", make_track("b"))
+    get_cached_search("a")  # "b" becomes least recently used
+    set_cached_search("c", make_track("c"))
+
+    get_cached_search("b")
+
+    stats = get_search_cache_stats()
+    assert stats["evictions"] == 2  # "b", then "a" when "b" came back
+    assert stats["disk_hits"] == 1
+
+
+def test_preload_search_cache_when_keys_on_disk() -> None:
+    for track_id in ("1", "2", "3"):
+        set_cached_search(track_id, make_track(track_id))
+    close_search_cache()
+
+    loaded = preload_search_cache(["1", "2", "missing", "1"])
+    get_cached_search("1")
+    get_cached_search("2")
+
+    assert loaded == 2
+    stats = get_search_cache_stats()
+    assert stats["memory_hits"] == 2
+    assert stats["disk_hits"] == 0
+
+
+def test_get_cached_search_when_miss_older_than_ttl_searches_again(
+    monkeypatch,
+) -> None:
+    """Test that an old "not found" expires while an old found track stays."""
+    monkeypatch.setattr(settings, "SEARCH_CACHE_MISS_TTL_DAYS", 30)
+    with patch("spotify_assistant.clients.search_cache.datetime") as clock:
+        clock.now.return_value = datetime(2000, 1, 1, tzinfo=UTC)
+        set_cached_search("old-miss", None)
+        set_cached_search("old-found", make_track("1"))
+    set_cached_search("new-miss", None)
+
+    assert get_cached_search("old-miss") is None
+    assert get_cached_search("old-found")["track"] == make_track("1")  # type: ignore[index]
+    assert get_cached_search("new-miss")["track"] is None  # type: ignore[index]
+    close_search_cache()
+    assert preload_search_cache(["old-miss", "old-found", "new-miss"]) == 2
+    assert get_cached_search("old-miss") is None
+
+
+def test_get_cached_search_when_stored_by_older_matcher_searches_again() -> None:
+    """Entries of a cache created before candidates were scored are not trusted."""
+    settings.search_cache_path.parent.mkdir(parents=True)
+    with closing(sqlite3.connect(settings.search_cache_path)) as connection:
+        connection.execute(
+            "CREATE TABLE searches"
+            " (key TEXT PRIMARY KEY, track TEXT, verified_at TEXT NOT NULL)"
+        )
+        connection.execute(
+            "INSERT INTO searches VALUES (?, ?, ?)",
+            ("old", json.dumps(make_track("1")), datetime.now(UTC).isoformat()),
+        )
+        connection.commit()
+
+    assert get_cached_search("old") is None
+    assert preload_search_cache(["old"]) == 0
+    set_cached_search("old", make_track("2"))
+    close_search_cache()
+    assert get_cached_search("old")["track"] == make_track("2")  # type: ignore[index]
+
+
+def test_import_search_cache_when_both_sides_know_key_keeps_newest(tmp_path) -> None:
+    """Test that an imported search replaces only an older local one."""
+    set_cached_search("old-locally", None)
+    set_cached_search("new-locally", make_track("local"))
+    artifact = tmp_path / "search_cache.json.gz"
+    with gzip.open(artifact, "wt", encoding="utf-8") as f:
+        json.dump(
+            {
+                "schema_version": EXPORT_SCHEMA_VERSION,
+                "exported_at": "2030-01-01T00:00:00+00:00",
+                "ttl_seconds": None,
+                "searches": [
+                    [
+                        "old-locally",
+                        json.dumps(make_track("a")),
+                        "2999-01-01T00:00:00+00:00",
+                    ],
+                    ["new-locally", None, "2000-01-01T00:00:00+00:00"],
+                    [
+                        "only-remote",
+                        json.dumps(make_track("b")),
+                        "2000-01-01T00:00:00+00:00",
+                    ],
+                ],
+                "recordings": [],
+                "track_isrcs": [["b", "ISRC-B"]],
+            },
+            f,
+        )
+
+    result = import_search_cache(artifact)
+
+    assert result == {"searches": 2, "kept": 1, "expired": 0, "recordings": 0}
+    tracks = {}
+    for key in ("old-locally", "new-locally", "only-remote"):
+        cached = get_cached_search(key)
+        assert cached is not None
+        tracks[key] = cached["track"]
+    assert tracks == {
+        "old-locally": make_track("a"),
+        "new-locally": make_track("local"),
+        "only-remote": make_track("b"),
+    }
+    assert get_isrcs(["b"]) == {"b": "ISRC-B"}
+
+
+def test_export_search_cache_when_imported_elsewhere_warms_cache(
+    tmp_path, monkeypatch
+) -> None:
+    """Test the round trip to a fresh cache, expired searches left out."""
+    set_cached_search("fresh", make_track("1"))
+    set_cached_search("miss", None)
+    with patch("spotify_assistant.clients.search_cache.datetime") as clock:
+        clock.now.return_value = datetime(2000, 1, 1, tzinfo=UTC)
+        set_cached_search("stale", make_track("2"))
+    artifact = tmp_path / "search_cache.json.gz"
+
+    assert export_search_cache(artifact, ttl_days=30) == 2
+
+    close_search_cache()
+    monkeypatch.setattr(settings, "STATE_DIR", tmp_path / "other")
+    assert import_search_cache(artifact)["searches"] == 2
+    fresh = get_cached_search("fresh")
+    assert fresh is not None
+    assert fresh["track"] == make_track("1")
+    miss = get_cached_search("miss")
+    assert miss is not None
+    assert miss["track"] is None
+    assert get_cached_search("stale") is None
+
+
+def test_import_search_cache_when_other_schema_version_raises(tmp_path) -> None:
+    artifact = tmp_path / "search_cache.json.gz"
+    with gzip.open(artifact, "wt", encoding="utf-8") as f:
+        json.dump({"schema_version": EXPORT_SCHEMA_VERSION + 1}, f)
+
+    with pytest.raises(SearchCacheFormatError):
+        import_search_cache(artifact)
@@ -0,0 +1,161 @@
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+import pytest
+from pydantic import ValidationError
+
+from spotify_assistant.models.spotify import PlaylistDetails
+from spotify_assistant.models.spotify import PlaylistSnapshot
+from spotify_assistant.normalization import pair_key
+from spotify_assistant.services import playlist_builder
+from spotify_assistant.services import shards
+from spotify_assistant.services.csv_manager import read_track_pairs
+from spotify_assistant.services.csv_manager import write_track_pairs
+from spotify_assistant.services.pipeline import PipelineConfig
+from spotify_assistant.services.playlist_builder import build_playlist_from_csv
+from spotify_assistant.services.playlist_builder import sync_playlist_with_csv
+from spotify_assistant.services.shards import assign_volumes
+from spotify_assistant.services.shards import get_volumes
+from spotify_assistant.settings import Settings
+from spotify_assistant.settings import settings
+
+SERIAL = PipelineConfig(
+    read_queue_size=4, search_workers=1, search_queue_size=1, write_batch_size=10
+)
+
+
+@pytest.fixture
+def volume_ids(monkeypatch):
+    """Shard two pairs per volume of a private playlist; created volumes have
+    IDs vol2, vol3... and their names are collected."""
+    monkeypatch.setattr(settings, "PLAYLIST_SHARD_PAIRS", 2)
+    created: list[str] = []
+
+    def create_playlist(name, public, collaborative):
+        assert (public, collaborative) == (False, False)
+        created.append(name)
+        return f"vol{len(created) + 1}"
+
+    monkeypatch.setattr(shards, "create_playlist", create_playlist)
+    monkeypatch.setattr(
+        shards,
+        "get_playlist_details",
+        lambda playlist_id: PlaylistDetails(
+            name="Forró", public=False, collaborative=False
+        ),
+    )
+    return created
+
+
+def test_assign_volumes_when_volume_full_creates_next_and_keeps_mapping(
+    volume_ids, make_pair
+):
+    """Test that pairs fill volumes in order and never move afterwards, and
+    volumes are as private as the base playlist."""
+    pairs = [make_pair(str(i)) for i in range(5)]
+
+    first = assign_volumes("base", pairs[:3])
+    again = assign_volumes("base", reversed(pairs))
+
+    assert list(first.values()) == ["base", "base", "vol2"]
+    assert again == {
+        **first,
+        pair_key(pairs[4]): "vol2",  # new pairs are assigned in the given order
+        pair_key(pairs[3]): "vol3",
+    }
+    assert volume_ids == ["Forró Vol. 2", "Forró Vol. 3"]
+    assert [volume["pairs"] for volume in get_volumes("base")] == [2, 2, 1]
+
+
+def test_settings_when_shard_pairs_out_of_range_raises() -> None:
+    """A volume holds at most 5,000 pairs (Spotify's 10,000 items)."""
+    for value in ("0", "5001"):
+        with pytest.raises(ValidationError):
+            Settings(PLAYLIST_SHARD_PAIRS=value)  # type: ignore[call-arg,arg-type]
+    assert Settings(PLAYLIST_SHARD_PAIRS="5000").PLAYLIST_SHARD_PAIRS == 5000  # type: ignore[call-arg,arg-type]
+
+
+def test_assign_volumes_when_not_creating_leaves_overflow_unassigned(
+    volume_ids, make_pair
+):
+    """Test that a dry run never creates playlists."""
+    pairs = [make_pair(str(i)) for i in range(3)]
+
+    targets = assign_volumes("base", pairs, create=False)
+
+    assert list(targets.values()) == ["base", "base", None]
+    assert volume_ids == []
+
+
+def test_build_playlist_from_csv_when_sharded_writes_each_pair_to_its_volume(
+    tmp_path, volume_ids, make_pair, fake_search
+):
+    """Test that both halves of a pair are added to the pair's volume."""
+    csv_path = tmp_path / "pairs.csv"
+    write_track_pairs(csv_path, [make_pair(str(i)) for i in range(3)])
+    client = MagicMock()
+
+    with (
+        patch.object(playlist_builder, "search_track", fake_search),
+        patch(
+            "spotify_assistant.clients.spotify.get_spotify_client", return_value=client
+        ),
+    ):
+        build_playlist_from_csv(csv_path, "base", SERIAL)
+
+    calls = [call.args for call in client.playlist_add_items.call_args_list]
+    assert calls == [
+        (
+            "base",
+            [
+                "spotify:track:BT 0",
+                "spotify:track:OT 0",
+                "spotify:track:BT 1",
+                "spotify:track:OT 1",
+            ],
+        ),
+        ("vol2", ["spotify:track:BT 2", "spotify:track:OT 2"]),
+    ]
+    assert all(pair["in_playlist"] for pair in read_track_pairs(csv_path))
+
+
+def test_sync_playlist_with_csv_when_sharded_skips_unchanged_volumes(
+    tmp_path, monkeypatch, volume_ids, make_pair, fake_search
+):
+    """Test that a second sync only reads snapshot ids of untouched volumes."""
+    csv_path = tmp_path / "pairs.csv"
+    write_track_pairs(csv_path, [make_pair(str(i)) for i in range(3)])
+    contents: dict[str, list[str | None]] = {"base": [], "vol2": []}
+    paged: list[str] = []
+
+    def get_snapshot(playlist_id):
+        paged.append(playlist_id)
+        return PlaylistSnapshot(
+            snapshot_id=f"{playlist_id}-{len(contents[playlist_id])}",
+            uris=list(contents[playlist_id]),
+        )
+
+    def add_tracks(playlist_id, uris):
+        contents[playlist_id].extend(uris)
+        return {"snapshot_id": f"{playlist_id}-{len(contents[playlist_id])}"}
+
+    monkeypatch.setattr(playlist_builder, "search_track", fake_search)
+    monkeypatch.setattr(playlist_builder, "get_playlist_snapshot", get_snapshot)
+    monkeypatch.setattr(
+        playlist_builder,
+        "get_playlist_snapshot_id",
+        lambda playlist_id: f"{playlist_id}-{len(contents[playlist_id])}",
+    )
+    monkeypatch.setattr(playlist_builder, "add_tracks_to_playlist", add_tracks)
+    monkeypatch.setattr(playlist_builder, "remove_tracks_from_playlist", MagicMock())
+
+    first = sync_playlist_with_csv(csv_path, "base")
+    paged.clear()
+    contents["vol2"].append("spotify:track:Stray")  # edited by hand
+    second = sync_playlist_with_csv(csv_path, "base")
+
+    assert len(first["added_uris"]) == 6
+    assert len(contents["base"]) == 4
+    assert paged == ["vol2"]
+    assert second["added_uris"] == []
+    assert second["removed"] == [{"uri": "spotify:track:Stray", "positions": [2]}]
@@ -0,0 +1,79 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from spotify_assistant.clients.single_flight import get_single_flight_stats
+from spotify_assistant.clients.single_flight import reset_single_flight_stats
+from spotify_assistant.clients.single_flight import run_once
+from spotify_assistant.clients.single_flight import run_once_async
+
+
+@pytest.fixture(autouse=True)
+def reset_stats():
+    reset_single_flight_stats()
+
+
+def test_run_once_when_concurrent_same_key_shares_result() -> None:
+    """Threads calling with the same key while in flight get one execution."""
+    release = threading.Event()
+    calls = []
+
+    def slow_search():
+        calls.append(1)
+        release.wait(timeout=5)
+        return "track"
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        futures = [pool.submit(run_once, "key", slow_search) for _ in range(4)]
+        while get_single_flight_stats()["coalesced"] < 3:
+            time.sleep(0.001)
+        release.set()
+        results = [f.result() for f in futures]
+
+    assert results == ["track"] * 4
+    assert len(calls) == 1
+    assert get_single_flight_stats() == {"executed": 1, "coalesced": 3}
+
+
+def test_run_once_when_leader_raises_followers_get_exception() -> None:
+    release = threading.Event()
+
+    def failing_search():
+        release.wait(timeout=5)
+        raise ConnectionError("blip")
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        futures = [pool.submit(run_once, "key", failing_search) for _ in range(2)]
+        while get_single_flight_stats()["coalesced"] < 1:
+            time.sleep(0.001)
+        release.set()
+        for future in futures:
+            with pytest.raises(ConnectionError, match="blip"):
+                future.result()
+
+    # Nothing is retained: the next call runs again
+    assert run_once("key", lambda: "ok") == "ok"
+
+
+def test_run_once_async_when_concurrent_same_key_shares_result() -> None:
+    calls = []
+
+    async def search():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "track"
+
+    async def run_all():
+        return await asyncio.gather(
+            *(run_once_async("key", search) for _ in range(5)),
+            run_once_async("other", search),
+        )
+
+    results = asyncio.run(run_all())
+
+    assert results == ["track"] * 6
+    assert len(calls) == 2
+    assert get_single_flight_stats()["coalesced"] == 4
@@ -0,0 +1,150 @@
+import os
+import threading
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from spotify_assistant.main import DTYPES
+from spotify_assistant.main import load_dataset
+from spotify_assistant.main import save_dataset
+from spotify_assistant.services import csv_manager
+from spotify_assistant.services import snapshot
+from spotify_assistant.services.csv_manager import append_track_pair
+from spotify_assistant.services.csv_manager import read_track_pairs
+from spotify_assistant.services.csv_manager import update_track_pair
+from spotify_assistant.services.csv_manager import write_track_pairs
+from spotify_assistant.services.csv_rows import iter_track_pairs
+from spotify_assistant.services.dataset_lock import dataset_lock
+from spotify_assistant.services.snapshot import snapshot_path
+from spotify_assistant.services.snapshot import table_from_frame
+from spotify_assistant.services.snapshot import write_snapshot
+from spotify_assistant.settings import settings
+
+
+@pytest.fixture
+def quoted_pair(make_pair):
+    """Pairs with quotes and a comma in a field, which snapshots must keep."""
+
+    def factory(name, **fields):
+        return make_pair(
+            name,
+            brazilian_track=f'BT "{name}", live',
+            added_at="2024-01-01T00:00:00+00:00",
+            **fields,
+        )
+
+    return factory
+
+
+@pytest.fixture
+def csv_path(tmp_path: Path, monkeypatch: pytest.MonkeyPatch, quoted_pair) -> Path:
+    monkeypatch.setattr(settings, "DATA_DIR", tmp_path)
+    monkeypatch.setattr(settings, "TRACK_PAIRS_FILENAME", "track_pairs.csv")
+    monkeypatch.setattr(settings, "DATASET_SNAPSHOT_MIN_BYTES", 0)
+    path = settings.track_pairs_path
+    write_track_pairs(
+        path,
+        [quoted_pair("1", brazilian_has_spotify=True), quoted_pair("2")],
+        pad_status=True,
+    )
+    return path
+
+
+def test_read_track_pairs_when_snapshot_fresh_skips_parsing(csv_path, monkeypatch):
+    """Test that a second read comes from the snapshot, identical to a parse."""
+    parsed = read_track_pairs(csv_path)
+    assert snapshot_path(csv_path).exists()
+
+    def fail(path):
+        raise AssertionError("CSV parsed again")
+
+    monkeypatch.setattr(csv_manager, "_parse_track_pairs", fail)
+    assert read_track_pairs(csv_path) == parsed
+
+
+def test_read_track_pairs_when_csv_changed_since_snapshot(csv_path, quoted_pair):
+    """Test that in-place patches invalidate the snapshot and appends extend it."""
+    read_track_pairs(csv_path)
+
+    update_track_pair(
+        csv_path, 1, quoted_pair("2", brazilian_has_spotify=False), in_place=True
+    )
+    append_track_pair(csv_path, quoted_pair("3"))
+
+    pairs = read_track_pairs(csv_path)
+    assert [pair["brazilian_has_spotify"] for pair in pairs] == [True, False, None]
+    assert pairs[2]["brazilian_artist"] == "BA 3"
+    assert read_track_pairs(csv_path) == pairs
+
+
+def test_load_dataset_when_snapshot_fresh_matches_csv_parse(csv_path, monkeypatch):
+    """Test that the snapshot DataFrame has the values and dtypes of read_csv."""
+    save_dataset(load_dataset())
+    from_snapshot = load_dataset()
+
+    monkeypatch.setattr(settings, "DATASET_SNAPSHOT_MIN_BYTES", None)
+    from_csv = load_dataset()
+
+    pd.testing.assert_frame_equal(from_snapshot, from_csv)
+    assert from_snapshot.dtypes.astype(str).to_dict() == DTYPES
+
+
+def test_read_track_pairs_when_snapshot_written_from_frame_matches_csv_parse(
+    csv_path,
+):
+    """Test that a snapshot written by load_dataset/save_dataset reads back like
+    the CSV parser: no pandas NA coercion of "None", blank statuses kept apart."""
+    with csv_path.open("a", encoding="utf-8") as f:
+        f.write("BA 3,BT 3,None,OT 3,,null,,     ,\r\n")
+    parsed = list(iter_track_pairs(csv_path))
+
+    df = load_dataset()
+    assert read_track_pairs(csv_path) == parsed
+    save_dataset(df)
+    assert read_track_pairs(csv_path) == parsed
+    assert parsed[2]["original_artist"] == "None"
+    assert parsed[2]["in_playlist"] is False
+
+
+def test_load_snapshot_when_content_changed_keeping_mtime(csv_path):
+    """Test that the sampled hash catches edits that keep size and mtime."""
+    read_track_pairs(csv_path)
+    stat = csv_path.stat()
+    data = csv_path.read_bytes()
+    with csv_path.open("r+b") as f:  # same inode and size
+        f.write(data.replace(b"BA 1", b"BA 9"))
+    os.utime(csv_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+    assert read_track_pairs(csv_path)[0]["brazilian_artist"] == "BA 9"
+
+
+def test_write_snapshot_when_threads_write_at_once_both_succeed(csv_path, monkeypatch):
+    """Test that threads writing the snapshot together use their own temp file."""
+    table = table_from_frame(load_dataset())
+    both_writing = threading.Barrier(2, timeout=5)
+    new_file = snapshot.ipc.new_file
+
+    def new_file_when_both_writing(sink, schema):
+        both_writing.wait()
+        return new_file(sink, schema)
+
+    monkeypatch.setattr(snapshot.ipc, "new_file", new_file_when_both_writing)
+    errors = []
+
+    def write():
+        try:
+            with dataset_lock(csv_path):
+                write_snapshot(csv_path, table)
+        except Exception as error:
+            errors.append(error)
+
+    threads = [threading.Thread(target=write) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert list(csv_path.parent.glob("*.tmp")) == []
+    assert read_track_pairs(csv_path) == list(iter_track_pairs(csv_path))
@@ -1,11 +1,21 @@
+import json
 from unittest.mock import MagicMock
 from unittest.mock import patch
 
 import pytest
 
 import spotify_assistant.clients.spotify as spotify_module
+from spotify_assistant.clients.quota import get_session_usage
+from spotify_assistant.clients.search_cache import get_isrcs
+from spotify_assistant.clients.spotify import add_tracks_to_playlist
+from spotify_assistant.clients.spotify import get_playlist_snapshot
 from spotify_assistant.clients.spotify import get_spotify_client
+from spotify_assistant.clients.spotify import get_tracks
+from spotify_assistant.clients.spotify import remove_tracks_from_playlist
 from spotify_assistant.clients.spotify import search_track
+from spotify_assistant.exceptions import SearchNeedsReviewError
+from spotify_assistant.models.spotify import PlaylistItemPositions
+from spotify_assistant.settings import settings
 
 
 @pytest.fixture(autouse=True)
@@ -59,8 +69,11 @@ def test_search_track_returns_track_when_found(mock_search_response: dict) -> No
         assert result["artist"] == "Rihanna"
         assert result["uri"] == "spotify:track:abc123"
         assert result["url"] == "https://open.spotify.com/track/abc123"
+        assert result["match_confidence"] == 1.0
         mock_client.search.assert_called_once_with(
-            q="track:Umbrella artist:Rihanna", type="track", limit=1
+            q="track:Umbrella artist:Rihanna",
+            type="track",
+            limit=settings.SEARCH_CANDIDATES,
         )
 
 
@@ -80,18 +93,19 @@ def test_search_track_returns_none_when_not_found(
         assert result is None
 
 
-def test_search_track_uses_first_result_when_multiple(
+def test_search_track_when_top_hit_is_a_remix_picks_best_candidate(
     mock_search_response: dict,
 ) -> None:
-    """Test that search_track uses the first result when multiple are returned."""
-    mock_search_response["tracks"]["items"].append(
+    """Test that search_track scores all candidates instead of trusting the first."""
+    mock_search_response["tracks"]["items"].insert(
+        0,
         {
             "id": "def456",
             "name": "Umbrella (Remix)",
             "artists": [{"name": "Rihanna"}],
             "uri": "spotify:track:def456",
             "external_urls": {"spotify": "https://open.spotify.com/track/def456"},
-        }
+        },
     )
 
     with patch(
@@ -104,7 +118,38 @@ def test_search_track_uses_first_result_when_multiple(
         result = search_track("Umbrella", "Rihanna")
 
         assert result is not None
-        assert result["id"] == "abc123"  # First result
+        assert result["id"] == "abc123"
+
+
+def test_search_track_when_only_low_confidence_records_review(
+    mock_search_response: dict,
+) -> None:
+    """Test that a poor best match is left for review, without looser queries
+    and without caching it as not found."""
+    mock_search_response["tracks"]["items"][0]["name"] = "Umbrella (Karaoke Version)"
+    mock_search_response["tracks"]["items"][0]["artists"] = [
+        {"name": "Sing Along Stars"}
+    ]
+
+    with patch(
+        "spotify_assistant.clients.spotify.get_spotify_client"
+    ) as mock_get_client:
+        mock_client = MagicMock()
+        mock_client.search.return_value = mock_search_response
+        mock_get_client.return_value = mock_client
+
+        with pytest.raises(SearchNeedsReviewError):
+            search_track("Umbrella", "Rihanna")
+        mock_client.search.assert_called_once()
+        with pytest.raises(SearchNeedsReviewError):
+            search_track("Umbrella", "Rihanna")
+
+    assert mock_client.search.call_count == 2  # not cached as a miss
+    line = settings.search_review_path.read_text("utf-8").splitlines()[0]
+    review = json.loads(line)
+    assert review["query"] == "track:Umbrella artist:Rihanna"
+    assert review["candidates"][0]["id"] == "abc123"
+    assert review["candidates"][0]["confidence"] < settings.SEARCH_MIN_CONFIDENCE
 
 
 def test_get_spotify_client_uses_oauth() -> None:
@@ -120,6 +165,7 @@ def test_get_spotify_client_uses_oauth() -> None:
         mock_settings.SPOTIFY_CLIENT_ID = "test_client_id"
         mock_settings.SPOTIFY_CLIENT_SECRET = "test_client_secret"
         mock_settings.SPOTIFY_REDIRECT_URI = "http://localhost:8888/callback"
+        mock_settings.SPOTIFY_CASSETTE_MODE = "off"
 
         get_spotify_client()
 
@@ -131,3 +177,169 @@ def test_get_spotify_client_uses_oauth() -> None:
             cache_path=".cache",
         )
         mock_spotify.assert_called_once()
+
+
+def test_add_tracks_to_playlist_batches_by_100() -> None:
+    """Test that add_tracks_to_playlist splits URIs into batches of 100."""
+    uris = [f"spotify:track:{i}" for i in range(250)]
+    with patch(
+        "spotify_assistant.clients.spotify.get_spotify_client"
+    ) as mock_get_client:
+        mock_client = MagicMock()
+        mock_get_client.return_value = mock_client
+
+        add_tracks_to_playlist("playlistid", uris)
+
+        batches = [c.args[1] for c in mock_client.playlist_add_items.call_args_list]
+        assert [len(b) for b in batches] == [100, 100, 50]
+        assert [uri for batch in batches for uri in batch] == uris
+
+
+def test_get_playlist_snapshot_pages_through_items() -> None:
+    """Test that get_playlist_snapshot follows pages and keeps positions."""
+    first_page = {
+        "items": [{"track": {"uri": "spotify:track:a"}}, {"track": None}],
+        "next": "https://api.spotify.com/next",
+    }
+    second_page = {"items": [{"track": {"uri": "spotify:track:b"}}], "next": None}
+    with patch(
+        "spotify_assistant.clients.spotify.get_spotify_client"
+    ) as mock_get_client:
+        mock_client = MagicMock()
+        mock_client.playlist.return_value = {"snapshot_id": "snap1"}
+        mock_client.playlist_items.return_value = first_page
+        mock_client.next.return_value = second_page
+        mock_get_client.return_value = mock_client
+
+        snapshot = get_playlist_snapshot("playlistid")
+
+        assert snapshot["snapshot_id"] == "snap1"
+        assert snapshot["uris"] == ["spotify:track:a", None, "spotify:track:b"]
+
+
+def test_remove_tracks_from_playlist_batches_with_snapshot() -> None:
+    """Test that removals are batched and all use the same snapshot_id."""
+    items = [
+        PlaylistItemPositions(uri=f"spotify:track:{i}", positions=[i])
+        for i in range(150)
+    ]
+    with patch(
+        "spotify_assistant.clients.spotify.get_spotify_client"
+    ) as mock_get_client:
+        mock_client = MagicMock()
+        mock_get_client.return_value = mock_client
+
+        remove_tracks_from_playlist("playlistid", items, "snap1")
+
+        calls = mock_client.playlist_remove_specific_occurrences_of_items.call_args_list
+        assert [len(c.args[1]) for c in calls] == [100, 50]
+        assert all(c.kwargs["snapshot_id"] == "snap1" for c in calls)
+
+
+def test_search_track_when_cached_skips_api(mock_search_response: dict) -> None:
+    """Test that a repeated search for the same song is served from the cache."""
+    with patch(
+        "spotify_assistant.clients.spotify.get_spotify_client"
+    ) as mock_get_client:
+        mock_client = MagicMock()
+        mock_client.search.return_value = mock_search_response
+        mock_get_client.return_value = mock_client
+
+        first = search_track("Umbrella", "Rihanna")
+        second = search_track("umbrella ", "RIHANNA")
+
+        assert first == second
+        mock_client.search.assert_called_once()
+
+
+def test_search_track_when_exact_query_misses_tries_ladder(
+    mock_search_response: dict, mock_empty_search_response: dict
+) -> None:
+    """Test that looser queries are tried until the first hit."""
+    with patch(
+        "spotify_assistant.clients.spotify.get_spotify_client"
+    ) as mock_get_client:
+        mock_client = MagicMock()
+        mock_client.search.side_effect = [
+            mock_empty_search_response,
+            mock_search_response,
+        ]
+        mock_get_client.return_value = mock_client
+
+        result = search_track("Umbrella (feat. JAY-Z)", "Rihanna")
+
+        assert result is not None
+        assert result["id"] == "abc123"
+        queries = [c.kwargs["q"] for c in mock_client.search.call_args_list]
+        assert queries == [
+            "track:Umbrella (feat. JAY-Z) artist:Rihanna",
+            "track:Umbrella artist:Rihanna",
+        ]
+
+
+def make_track_item(track_id: str, name: str, isrc: str) -> dict:
+    return {
+        "id": track_id,
+        "name": name,
+        "artists": [{"name": "Rihanna"}],
+        "uri": f"spotify:track:{track_id}",
+        "external_urls": {"spotify": f"https://open.spotify.com/track/{track_id}"},
+        "external_ids": {"isrc": isrc},
+        "album": {"name": f"{name} album"},
+        "duration_ms": 275_000,
+    }
+
+
+def test_search_track_collapses_releases_of_same_recording() -> None:
+    """Test that another release of a known recording resolves to the first one."""
+    single = make_track_item("single", "Umbrella", "USUM70741299")
+    compilation = make_track_item(
+        "compilation", "Umbrella - Remastered", "USUM70741299"
+    )
+    with patch(
+        "spotify_assistant.clients.spotify.get_spotify_client"
+    ) as mock_get_client:
+        mock_client = MagicMock()
+        mock_client.search.side_effect = [
+            {"tracks": {"items": [single]}},
+            {"tracks": {"items": [compilation]}},
+        ]
+        mock_get_client.return_value = mock_client
+
+        first = search_track("Umbrella", "Rihanna")
+        second = search_track("Umbrella (Remastered)", "Rihanna")
+
+    assert first is not None
+    assert first["isrc"] == "USUM70741299"
+    assert first["album"] == "Umbrella album"
+    assert first["duration_ms"] == 275_000
+    assert second == first
+
+
+def test_get_tracks_batches_ids_and_indexes_isrcs() -> None:
+    """Test that tracks are fetched 50 IDs at a time, keeping order and gaps."""
+    track_ids = [f"t{i}" for i in range(60)]
+
+    def fake_tracks(batch):
+        return {
+            "tracks": [
+                None if i == "t3" else make_track_item(i, i, f"ISRC{i}") for i in batch
+            ]
+        }
+
+    with patch(
+        "spotify_assistant.clients.spotify.get_spotify_client"
+    ) as mock_get_client:
+        mock_client = MagicMock()
+        mock_client.tracks.side_effect = fake_tracks
+        mock_get_client.return_value = mock_client
+
+        tracks = get_tracks(track_ids)
+
+    assert [len(c.args[0]) for c in mock_client.tracks.call_args_list] == [50, 10]
+    assert tracks[3] is None
+    assert [t["id"] for t in tracks if t is not None] == [
+        i for i in track_ids if i != "t3"
+    ]
+    assert get_isrcs(["t0", "t3", "t59"]) == {"t0": "ISRCt0", "t59": "ISRCt59"}
+    assert get_session_usage()["search_calls"] == 2  # seen by budgets and quotas
@@ -0,0 +1,124 @@
+import os
+from pathlib import Path
+
+import pytest
+
+from spotify_assistant.services import csv_manager
+from spotify_assistant.services import status_index
+from spotify_assistant.services.csv_manager import append_track_pair
+from spotify_assistant.services.csv_manager import read_track_pairs
+from spotify_assistant.services.csv_manager import update_track_pair
+from spotify_assistant.services.csv_manager import write_track_pairs
+from spotify_assistant.services.status_index import get_status_counts
+from spotify_assistant.services.status_index import iter_pending_pairs
+from spotify_assistant.services.status_index import load_status_index
+from spotify_assistant.services.status_index import pending_rows
+from spotify_assistant.services.status_index import status_index_path
+
+
+@pytest.fixture
+def csv_path(tmp_path: Path, make_pair) -> Path:
+    path = tmp_path / "track_pairs.csv"
+    write_track_pairs(
+        path,
+        [
+            make_pair("done", brazilian_has_spotify=True, in_playlist=True),
+            make_pair("missing", brazilian_has_spotify=False),
+            make_pair("new\nline"),
+            make_pair("found", brazilian_has_spotify=True),
+        ],
+    )
+    return path
+
+
+def test_iter_pending_pairs_reads_only_pending_rows(csv_path):
+    """Test that pending rows are found from the index, multi-line cells included."""
+    pending = list(iter_pending_pairs(csv_path, chunk_size=1))
+
+    assert [idx for idx, _ in pending] == [2, 3]
+    assert pending[0][1]["brazilian_track"] == "BT new\nline"
+    counts = get_status_counts(csv_path)
+    assert counts["rows"] == 4
+    assert counts["pending"] == 2
+    assert counts["in_playlist"] == 1
+    assert counts["not_found"] == 1
+    assert counts["unchecked"] == 1
+
+
+def test_iter_pending_pairs_when_rewritten_between_chunks_keeps_rows_aligned(
+    csv_path,
+    make_pair,
+):
+    """Test that a rewrite between chunks does not shift indices against rows."""
+    pending = iter_pending_pairs(csv_path, chunk_size=1)
+    first = next(pending)
+    write_track_pairs(csv_path, [make_pair("inserted"), *read_track_pairs(csv_path)])
+
+    assert [first, *pending] == [
+        (2, make_pair("new\nline")),
+        (3, make_pair("found", brazilian_has_spotify=True)),
+    ]
+
+
+def test_update_track_pair_when_status_patched_updates_index_in_place(
+    csv_path, monkeypatch, make_pair
+):
+    """Test that a status patch keeps the index valid without a rebuild."""
+    load_status_index(csv_path)
+    pair = make_pair("found", brazilian_has_spotify=True, in_playlist=True)
+    update_track_pair(csv_path, 3, pair)
+
+    def fail_rebuild(*args):
+        raise AssertionError("index rebuilt")
+
+    monkeypatch.setattr(status_index, "_indexes", {})
+    monkeypatch.setattr(status_index, "_rebuild", fail_rebuild)
+    assert pending_rows(csv_path) == [2]
+
+
+def test_load_status_index_when_rows_appended_parses_only_new_rows(
+    csv_path, monkeypatch, make_pair
+):
+    """Test that appends extend the persisted index incrementally."""
+    previous_rows = len(load_status_index(csv_path).codes)
+    append_track_pair(csv_path, make_pair("appended"))
+    parsed = []
+    read_range = status_index.read_track_pairs_range
+
+    def spy(path, start, end):
+        pairs = read_range(path, start, end)
+        parsed.extend(pairs)
+        return pairs
+
+    monkeypatch.setattr(status_index, "read_track_pairs_range", spy)
+    monkeypatch.setattr(status_index, "_indexes", {})
+
+    assert pending_rows(csv_path) == [2, 3, previous_rows]
+    assert [pair["brazilian_track"] for pair in parsed] == ["BT appended"]
+
+
+def test_load_status_index_when_csv_rewritten_rebuilds(csv_path, make_pair):
+    """Test that a sidecar of an older file state is not trusted."""
+    load_status_index(csv_path)
+    write_track_pairs(csv_path, [make_pair("only")])
+
+    assert status_index_path(csv_path).exists()
+    assert pending_rows(csv_path) == [0]
+    assert get_status_counts(csv_path)["rows"] == 1
+
+
+def test_load_status_index_when_patched_elsewhere_with_same_identity_rebuilds(
+    csv_path, monkeypatch, make_pair
+):
+    """Test that a status patch the index did not see is caught by the dataset
+    version even when inode, mtime and size are unchanged."""
+    write_track_pairs(csv_path, read_track_pairs(csv_path), pad_status=True)
+    identity = load_status_index(csv_path).identity
+    stat = csv_path.stat()
+    monkeypatch.setattr(csv_manager, "record_status_patch", lambda *args: None)
+    pair = make_pair("found", brazilian_has_spotify=True, in_playlist=True)
+    update_track_pair(csv_path, 3, pair, in_place=True)
+    os.utime(csv_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    assert status_index.csv_identity(csv_path) == identity
+
+    assert pending_rows(csv_path) == [2]
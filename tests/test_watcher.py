@@ -0,0 +1,158 @@
+import threading
+
+from spotify_assistant.models.spotify import SpotifyTrack
+from spotify_assistant.services import playlist_builder
+from spotify_assistant.services.csv_manager import append_track_pair
+from spotify_assistant.services.csv_manager import read_track_pairs
+from spotify_assistant.services.csv_manager import write_track_pairs
+from spotify_assistant.services.watcher import load_watch_cursors
+from spotify_assistant.services.watcher import process_new_rows
+from spotify_assistant.services.watcher import watch_csvs
+from spotify_assistant.settings import settings
+
+
+def patch_spotify(monkeypatch):
+    searched = []
+
+    def fake_search_track(track_name, artist):
+        searched.append(track_name)
+        return SpotifyTrack(
+            id=track_name,
+            name=track_name,
+            artist=artist,
+            uri=f"spotify:track:{track_name}",
+            url="",
+        )
+
+    monkeypatch.setattr(
+        "spotify_assistant.services.playlist_builder.search_track", fake_search_track
+    )
+    monkeypatch.setattr(
+        "spotify_assistant.services.playlist_builder.add_tracks_to_playlist",
+        lambda *a, **k: None,
+    )
+    return searched
+
+
+def test_process_new_rows_only_processes_appended_rows(
+    tmp_path, monkeypatch, make_pair
+):
+    """Rows before the committed cursor are not read or searched again."""
+    csv_path = tmp_path / "track_pairs.csv"
+    write_track_pairs(csv_path, [make_pair("1"), make_pair("2")])
+    searched = patch_spotify(monkeypatch)
+
+    assert len(process_new_rows(csv_path, "playlistid")) == 2
+    assert process_new_rows(csv_path, "playlistid") == []
+
+    append_track_pair(csv_path, make_pair("3"))
+    searched.clear()
+    results = process_new_rows(csv_path, "playlistid")
+
+    assert [res["index"] for res in results] == [2]
+    assert searched == ["BT 3", "OT 3"]
+    assert all(pair["in_playlist"] for pair in read_track_pairs(csv_path))
+
+
+def test_process_new_rows_resumes_from_persisted_cursor(
+    tmp_path, monkeypatch, make_pair
+):
+    """The cursor lives in STATE_DIR, so a restarted daemon picks up the tail."""
+    csv_path = tmp_path / "track_pairs.csv"
+    write_track_pairs(csv_path, [make_pair("1")])
+    patch_spotify(monkeypatch)
+    process_new_rows(csv_path, "playlistid")
+
+    cursor = load_watch_cursors()[str(csv_path)]
+    assert cursor["row_index"] == 1
+    assert cursor["offset"] == csv_path.stat().st_size
+
+    append_track_pair(csv_path, make_pair("2"))
+    results = process_new_rows(csv_path, "playlistid")
+    assert [res["index"] for res in results] == [1]
+
+
+def test_process_new_rows_relocates_cursor_after_rewrite(
+    tmp_path, monkeypatch, make_pair
+):
+    """A rewritten file (different bytes before the cursor) is rescanned by index."""
+    csv_path = tmp_path / "track_pairs.csv"
+    write_track_pairs(csv_path, [make_pair("1"), make_pair("2")])
+    patch_spotify(monkeypatch)
+    process_new_rows(csv_path, "playlistid")
+
+    pairs = read_track_pairs(csv_path)
+    pairs[0]["source"] = "a much longer source value that shifts every offset"
+    write_track_pairs(csv_path, [*pairs, make_pair("3")])
+
+    results = process_new_rows(csv_path, "playlistid")
+    assert [res["index"] for res in results] == [2]
+
+
+def test_process_new_rows_when_last_row_unterminated_holds_it_back(
+    tmp_path, monkeypatch, make_pair
+):
+    """A row still being appended (no newline yet) is left for the next poll."""
+    csv_path = tmp_path / "track_pairs.csv"
+    write_track_pairs(csv_path, [make_pair("1")])
+    searched = patch_spotify(monkeypatch)
+    with csv_path.open("a", encoding="utf-8") as f:
+        f.write("BA 2,BT 2,OA 2")
+
+    assert [res["index"] for res in process_new_rows(csv_path, "playlistid")] == [0]
+    with csv_path.open("a", encoding="utf-8") as f:
+        f.write(",OT 2,,,,,\r\n")
+    searched.clear()
+
+    assert [res["index"] for res in process_new_rows(csv_path, "playlistid")] == [1]
+    assert searched == ["BT 2", "OT 2"]
+
+
+def test_process_new_rows_when_row_errored_retries_it_later(
+    tmp_path, monkeypatch, make_pair
+):
+    """A row whose search raised is kept by the cursor and retried once due."""
+    csv_path = tmp_path / "track_pairs.csv"
+    write_track_pairs(csv_path, [make_pair("1"), make_pair("2")])
+    searched = patch_spotify(monkeypatch)
+    monkeypatch.setattr(settings, "RETRY_BASE_DELAY", 0)
+    search = playlist_builder.search_track
+
+    def flaky_search(track_name, artist):
+        if track_name == "BT 2" and searched.count("BT 2") == 0:
+            searched.append(track_name)
+            raise ConnectionError("reset")
+        return search(track_name, artist)
+
+    monkeypatch.setattr(playlist_builder, "search_track", flaky_search)
+    first = process_new_rows(csv_path, "playlistid")
+    assert [res["error"] is not None for res in first] == [False, True]
+
+    retried = process_new_rows(csv_path, "playlistid")
+
+    assert [(res["index"], res["added_to_playlist"]) for res in retried] == [(1, True)]
+    assert all(pair["in_playlist"] for pair in read_track_pairs(csv_path))
+    assert process_new_rows(csv_path, "playlistid") == []
+
+
+def test_watch_csvs_stops_when_event_is_set(tmp_path, monkeypatch, make_pair):
+    csv_path = tmp_path / "track_pairs.csv"
+    write_track_pairs(csv_path, [make_pair("1")])
+    patch_spotify(monkeypatch)
+    stop = threading.Event()
+    thread = threading.Thread(
+        target=watch_csvs, args=({csv_path: "playlistid"}, 0.01, stop)
+    )
+    thread.start()
+    try:
+        append_track_pair(csv_path, make_pair("2"))
+        for _ in range(200):
+            if all(pair["in_playlist"] for pair in read_track_pairs(csv_path)):
+                break
+            stop.wait(0.01)
+    finally:
+        stop.set()
+        thread.join(timeout=2)
+
+    assert not thread.is_alive()
+    assert all(pair["in_playlist"] for pair in read_track_pairs(csv_path))